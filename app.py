@@ -1,6 +1,4 @@
 import streamlit as st
-import json
-import base64
 import textwrap
 
 st.set_page_config(
@@ -13,11 +11,12 @@ from datetime import datetime, timezone
 
 import src.services.sistema_alertas as sa
 import backup_auditoria as ba
-from src.repositories.fornecedores import carregar_fornecedores
 from src.core.config import configure_page  # noqa: F401
-from src.core.db import init_supabase_admin, init_supabase_anon, get_supabase_user_client
+from src.core.db import init_supabase_admin, init_supabase_anon, get_supabase_user_client, jwt_claim_exp
 from src.core.auth import verificar_autenticacao, exibir_login, fazer_logout
-from src.repositories.pedidos import carregar_pedidos
+from src.repositories.pedidos import pedidos_atualizados_em
+from src.services.aquecimento import iniciar_aquecedor
+from src.services.contexto import ContextoDados
 from src.utils.formatting import formatar_moeda_br
 
 from src.ui.dashboard import exibir_dashboard
@@ -26,36 +25,25 @@ from src.ui.consulta import exibir_consulta_pedidos
 from src.ui.gestao_pedidos import exibir_gestao_pedidos
 from src.ui.ficha_material_page import exibir_ficha_material
 from src.ui.gestao_usuarios import exibir_gestao_usuarios
+from src.ui.cache import exibir_cache
 
 # Conexão (cacheada) com Supabase
 supabase_admin = init_supabase_admin()
 supabase_anon = init_supabase_anon()
 
+# Pré-carrega os dados dos tenants ativos (na partida e antes do expediente)
+iniciar_aquecedor(supabase_admin)
 
 
 
 
-def _jwt_claim_exp(token: str):
-    """Extrai 'exp' (epoch seconds) do JWT sem validar assinatura."""
-    try:
-        parts = token.split(".")
-        if len(parts) < 2:
-            return None
-        payload_b64 = parts[1]
-        # base64url padding
-        payload_b64 += "=" * (-len(payload_b64) % 4)
-        payload = json.loads(base64.urlsafe_b64decode(payload_b64.encode("utf-8")).decode("utf-8"))
-        return payload.get("exp")
-    except Exception:
-        return None
-
 
 def _jwt_expirou() -> bool:
         exp = st.session_state.get("auth_expires_at")
         if not exp:
             token = st.session_state.get("auth_access_token")
             if token:
-                exp = _jwt_claim_exp(token)
+                exp = jwt_claim_exp(token)
                 # guarda pra próximas execuções
                 if exp:
                     st.session_state.auth_expires_at = exp
@@ -82,11 +70,6 @@ def _refresh_session() -> bool:
         return True
     except Exception:
         return False
-def _safe_len(x) -> int:
-    try:
-        return int(len(x or []))
-    except Exception:
-        return 0
 
 
 def _industrial_sidebar_css() -> None:
@@ -191,6 +174,36 @@ def _industrial_sidebar_css() -> None:
     )
 
 
+# Páginas que leem o frame completo de pedidos (ctx.pedidos()): o bootstrap já
+# busca esse frame e recorta dele a projeção enxuta dos alertas.
+_PAGINAS_FRAME_COMPLETO = {"Dashboard", "Gestão de Pedidos"}
+
+
+def _cartao_usuario(nome: str, perfil: str, atrasados, criticos, vencendo) -> str:
+    return textwrap.dedent(f"""<div class="fu-card">
+  <p class="fu-user-label">👷 Sistema de Follow-Up</p>
+  <div class="fu-bar"></div>
+  <p class="fu-user-name">{nome}</p>
+  <p class="fu-user-role">{perfil}</p>
+
+  <div class="fu-kpi-row">
+    <div class="fu-kpi">
+      <p class="fu-kpi-title">⚠️ Atrasados</p>
+      <p class="fu-kpi-value">{atrasados}</p>
+    </div>
+    <div class="fu-kpi">
+      <p class="fu-kpi-title">🚨 Críticos</p>
+      <p class="fu-kpi-value">{criticos}</p>
+    </div>
+    <div class="fu-kpi">
+      <p class="fu-kpi-title">⏰ Vencendo</p>
+      <p class="fu-kpi-value">{vencendo}</p>
+    </div>
+  </div>
+</div>
+""")
+
+
 def _label_alertas(total_alertas: int) -> str:
     if total_alertas and total_alertas > 0:
         return f"🔔 Alertas e Notificações  🔴 ({int(total_alertas)})"
@@ -295,15 +308,16 @@ def main():
         st.error("❌ Não foi possível determinar sua empresa (tenant).")
         return
 
-    df_pedidos = carregar_pedidos(supabase, tenant_id)
-    df_fornecedores = carregar_fornecedores(supabase, tenant_id, incluir_inativos=True)
-
-    alertas = sa.calcular_alertas(df_pedidos, df_fornecedores)
-    total_alertas = int(alertas.get("total", 0) or 0)
-
-    atrasados = _safe_len(alertas.get("pedidos_atrasados"))
-    criticos = _safe_len(alertas.get("pedidos_criticos"))
-    vencendo = _safe_len(alertas.get("pedidos_vencendo"))
+    # Dados do tenant para este rerun: a sidebar e a página usam o mesmo contexto.
+    # As leituras saem em paralelo já aqui; a sidebar aparece com placeholders
+    # enquanto os alertas (sobre o frame enxuto) são contados; as listas
+    # completas só são montadas na página de alertas.
+    ctx = ContextoDados(supabase, tenant_id)
+    pagina_inicial = st.session_state.get("current_page", "Dashboard")
+    ctx.iniciar(
+        completo=pagina_inicial in _PAGINAS_FRAME_COMPLETO,
+        alertas=str(pagina_inicial).startswith("🔔 Alertas"),
+    )
 
     _industrial_sidebar_css()
 
@@ -312,31 +326,21 @@ def main():
         nome = st.session_state.usuario.get("nome", "Usuário")
         perfil = str(st.session_state.usuario.get("perfil", "")).title() or "—"
 
-        st.markdown(
-            textwrap.dedent(f"""<div class="fu-card">
-  <p class="fu-user-label">👷 Sistema de Follow-Up</p>
-  <div class="fu-bar"></div>
-  <p class="fu-user-name">{nome}</p>
-  <p class="fu-user-role">{perfil}</p>
+        cartao = st.empty()
+        cartao.markdown(_cartao_usuario(nome, perfil, "…", "…", "…"), unsafe_allow_html=True)
 
-  <div class="fu-kpi-row">
-    <div class="fu-kpi">
-      <p class="fu-kpi-title">⚠️ Atrasados</p>
-      <p class="fu-kpi-value">{atrasados}</p>
-    </div>
-    <div class="fu-kpi">
-      <p class="fu-kpi-title">🚨 Críticos</p>
-      <p class="fu-kpi-value">{criticos}</p>
-    </div>
-    <div class="fu-kpi">
-      <p class="fu-kpi-title">⏰ Vencendo</p>
-      <p class="fu-kpi-value">{vencendo}</p>
-    </div>
-  </div>
-</div>
-"""),
-            unsafe_allow_html=True,
-        )
+        contagem = ctx.contagem_alertas
+        total_alertas = int(contagem.get("total", 0) or 0)
+
+        atrasados = int(contagem.get("pedidos_atrasados", 0) or 0)
+        criticos = int(contagem.get("pedidos_criticos", 0) or 0)
+        vencendo = int(contagem.get("pedidos_vencendo", 0) or 0)
+
+        cartao.markdown(_cartao_usuario(nome, perfil, atrasados, criticos, vencendo), unsafe_allow_html=True)
+
+        dados_em = pedidos_atualizados_em(tenant_id)
+        if dados_em is not None:
+            st.caption(f"🕒 Dados de {dados_em:%H:%M:%S}")
 
         if total_alertas > 0:
             st.markdown(
@@ -400,7 +404,7 @@ def main():
             if is_admin:
                 pagina_gestao = st.radio(
                     "",
-                    ["Ficha de Material", "Gestão de Pedidos", "Mapa Geográfico", "👥 Gestão de Usuários", "💾 Backup"],
+                    ["Ficha de Material", "Gestão de Pedidos", "Mapa Geográfico", "👥 Gestão de Usuários", "💾 Backup", "🧠 Cache"],
                     label_visibility="collapsed",
                     key="menu_gestao_admin",
                     on_change=_set_page_from_gestao_admin,
@@ -423,21 +427,25 @@ def main():
 
     # ===== Página (pode adicionar filtros na sidebar aqui) =====
     if pagina == "Dashboard":
-        exibir_dashboard(supabase)
+        exibir_dashboard(ctx)
     elif pagina == "🔔 Alertas e Notificações":
-        sa.exibir_painel_alertas(alertas, formatar_moeda_br)
+        sa.exibir_painel_alertas(
+            ctx.alertas, formatar_moeda_br, hidratar=ctx.hidratar, limiares=ctx.limiares_alertas
+        )
     elif pagina == "Consultar Pedidos":
-        exibir_consulta_pedidos(supabase)
+        exibir_consulta_pedidos(ctx)
     elif pagina == "Ficha de Material":
-        exibir_ficha_material(supabase)
+        exibir_ficha_material(ctx)
     elif pagina == "Gestão de Pedidos":
-        exibir_gestao_pedidos(supabase)
+        exibir_gestao_pedidos(ctx)
     elif pagina == "Mapa Geográfico":
-        exibir_mapa(supabase)
+        exibir_mapa(ctx)
     elif pagina == "👥 Gestão de Usuários":
-        exibir_gestao_usuarios(supabase)
+        exibir_gestao_usuarios(ctx)
     elif pagina == "💾 Backup":
         ba.realizar_backup_manual(supabase)
+    elif pagina == "🧠 Cache":
+        exibir_cache(ctx)
 
     # ===== Rodapé da sidebar: sempre depois dos filtros =====
     with st.sidebar:
@@ -0,0 +1,85 @@
+"""
+Benchmark e conferência: AlertasIncrementais x calcular_alertas completo.
+
+Parte das linhas sintéticas de tests/sinteticos.py e faz rodadas aleatórias
+de alterações (entregas, valores, previsões, troca de fornecedor), exclusões
+e pedidos novos, mescladas no frame como no delta de carregar_pedidos (as
+linhas alteradas vão para o fim). A cada rodada, o estado incremental, tanto
+por aplicar(alterados, removidos) quanto por atualizar(frame novo, com
+limiares de tenant diferentes dos padrões), tem de devolver exatamente os
+alertas de calcular_alertas sobre o frame novo. A mesma conferência, com
+semente fixa e vários tamanhos, roda em tests/test_sistema_alertas.py
+(junto com o percentil da lista ordenada contra o Series.quantile).
+
+Uso (na raiz do repositório):
+    python benchmarks/alertas_incrementais.py [linhas ...]
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.calcular_alertas import _medir  # noqa: E402
+from src.services.sistema_alertas import AlertasIncrementais, Limiares, calcular_alertas  # noqa: E402
+from tests.sinteticos import (  # noqa: E402
+    conferir_alertas,
+    fornecedores_sinteticos,
+    frame_pedidos,
+    linhas_pedidos,
+    rodada_delta,
+)
+
+RODADAS = 20
+# limiares de um tenant com configuração própria (o estado por atualizar() usa estes)
+OUTROS_LIMIARES = Limiares(janela_dias=5, taxa_sucesso_minima=80, pedidos_minimos_fornecedor=3, percentil_critico=90)
+
+
+def main(tamanhos: list[int]) -> None:
+    rnd = random.Random(7)
+    fornecedores = fornecedores_sinteticos()
+
+    print(f"{'linhas':>8} {'alertas':>8} | {'completo':>9} {'incremental':>11} {'ganho':>6}")
+    for n in tamanhos:
+        linhas = linhas_pedidos(n)
+        df = frame_pedidos(linhas)
+        por_aplicar = AlertasIncrementais(df, fornecedores)
+        por_atualizar = AlertasIncrementais(df, fornecedores, limiares=OUTROS_LIMIARES)
+        conferir_alertas(calcular_alertas(df, fornecedores), por_aplicar.alertas())
+
+        t_completo = t_incremental = 0.0
+        for carimbo in range(1, RODADAS + 1):
+            linhas, alterados, removidos = rodada_delta(rnd, linhas, carimbo)
+            # o frame novo é o do delta: mantidas (na ordem) + alteradas no fim
+            df = pd.concat([df[~df["id"].isin(removidos | {a["id"] for a in alterados})], frame_pedidos(alterados)],
+                           ignore_index=True) if alterados else df[~df["id"].isin(removidos)].reset_index(drop=True)
+
+            inicio = time.perf_counter()
+            completo = calcular_alertas(df, fornecedores)
+            t_completo += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            por_aplicar.aplicar(df.iloc[len(df) - len(alterados):], removidos)
+            incremental = por_aplicar.alertas()
+            t_incremental += time.perf_counter() - inicio
+
+            conferir_alertas(completo, incremental)
+            assert por_atualizar.atualizar(df), "atualizar() não casou as linhas do delta"
+            conferir_alertas(calcular_alertas(df, fornecedores, OUTROS_LIMIARES), por_atualizar.alertas())
+
+        # frame reordenado: atualizar() recusa e o estado é remontado
+        assert not por_atualizar.atualizar(df.sample(frac=1, random_state=1)) or len(df) < 2
+        t_novo = _medir(lambda: AlertasIncrementais(df, fornecedores).alertas())
+        print(
+            f"{n:>8} {completo['total']:>8} | {t_completo / RODADAS:>8.3f}s {t_incremental / RODADAS:>10.3f}s "
+            f"{t_completo / t_incremental:>5.1f}x  (montagem do estado: {t_novo:.3f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
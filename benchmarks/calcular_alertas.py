@@ -0,0 +1,307 @@
+"""
+Benchmark: calcular_alertas, implementação antiga (apply por linha para o
+nome do fornecedor, iterrows para montar os alertas) x vetorizada (atual).
+
+Usa as linhas sintéticas de tests/sinteticos.py normalizadas como no
+carregamento (_normalizar_pedidos) e a tabela de fornecedores
+correspondente, confere que as duas versões devolvem exatamente os mesmos
+alertas e mede o tempo de cada uma.
+
+Uso (na raiz do repositório):
+    python benchmarks/calcular_alertas.py [linhas ...]
+"""
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from src.repositories.pedidos import _normalizar_pedidos  # noqa: E402
+from src.services.sistema_alertas import calcular_alertas  # noqa: E402
+from tests.sinteticos import conferir_alertas, fornecedores_sinteticos, linhas_pedidos  # noqa: E402
+
+REPETICOES = 3
+
+
+def _calcular_alertas_antigo(df_pedidos: pd.DataFrame, df_fornecedores: pd.DataFrame | None = None):
+    """Implementação anterior, com apply por linha e iterrows (referência)."""
+    hoje = pd.Timestamp.now().normalize()
+
+    alertas = {
+        "pedidos_atrasados": [],
+        "pedidos_vencendo": [],
+        "fornecedores_baixa_performance": [],
+        "pedidos_criticos": [],
+        "total": 0,
+    }
+
+    if df_pedidos is None or df_pedidos.empty:
+        return alertas
+
+    df = df_pedidos.copy()
+
+    # ============================
+    # Normalizações e tipos
+    # ============================
+    if "entregue" in df.columns:
+        df["entregue"] = df["entregue"].astype(str).str.lower().isin(["true", "1", "yes", "sim"])
+    else:
+        df["entregue"] = False
+
+    if "qtde_pendente" in df.columns:
+        df["_qtd_pendente"] = pd.to_numeric(df["qtde_pendente"], errors="coerce").fillna(0)
+    else:
+        df["_qtd_pendente"] = 0
+
+    df["_pendente"] = (~df["entregue"]) | (df["_qtd_pendente"] > 0)
+
+    if "valor_total" in df.columns:
+        df["_valor_total"] = pd.to_numeric(df["valor_total"], errors="coerce").fillna(0.0)
+    else:
+        df["_valor_total"] = 0.0
+
+    def _dt(col: str) -> pd.Series:
+        if col not in df.columns:
+            return pd.Series([pd.NaT] * len(df), index=df.index)
+        return pd.to_datetime(df[col], errors="coerce", dayfirst=True)
+
+    data_oc = _dt("data_oc")
+    prev = _dt("previsao_entrega")
+    prazo = _dt("prazo_entrega")
+
+    due = prev.combine_first(prazo)
+    fallback_due = data_oc + pd.to_timedelta(30, unit="D")
+    df["_due"] = due.combine_first(fallback_due)
+
+    df["_atrasado"] = df["_pendente"] & df["_due"].notna() & (df["_due"] < hoje)
+
+        # ============================
+    # Fornecedor: tentar manter nome já vindo da view (vw_pedidos_completo),
+    # e usar df_fornecedores apenas como complemento.
+    # ============================
+    if "fornecedor_id" in df.columns:
+        df["fornecedor_id"] = df["fornecedor_id"].astype(str).str.strip()
+    else:
+        df["fornecedor_id"] = ""
+
+    # Nome base (quando já vem da view)
+    if "fornecedor_nome" in df.columns:
+        df["_fornecedor_nome_base"] = (
+            df["fornecedor_nome"]
+            .fillna("")
+            .astype(str)
+            .str.strip()
+            .replace({"nan": "", "None": "", "null": ""})
+        )
+    elif "fornecedor" in df.columns:
+        # fallback: algumas fontes usam 'fornecedor' como nome
+        df["_fornecedor_nome_base"] = (
+            df["fornecedor"]
+            .fillna("")
+            .astype(str)
+            .str.strip()
+            .replace({"nan": "", "None": "", "null": ""})
+        )
+    else:
+        df["_fornecedor_nome_base"] = ""
+
+    df_f = None
+    if df_fornecedores is not None and not df_fornecedores.empty:
+        df_f = df_fornecedores.copy()
+        df_f.columns = [c.strip().lower() for c in df_f.columns]
+        if "id" in df_f.columns:
+            df_f["id"] = df_f["id"].astype(str).str.strip()
+        else:
+            df_f = None
+
+    if df_f is not None:
+        # Procurar a coluna de nome (com múltiplas tentativas)
+        nome_col = None
+        for possivel_nome in ["nome_fantasia", "nome", "razao_social"]:
+            if possivel_nome in df_f.columns:
+                nome_col = possivel_nome
+                break
+
+        cols_keep = ["id"]
+        if nome_col:
+            cols_keep.append(nome_col)
+
+        df = df.merge(
+            df_f[cols_keep],
+            left_on="fornecedor_id",
+            right_on="id",
+            how="left",
+            suffixes=("", "_forn"),
+        )
+
+        # Nome vindo da tabela de fornecedores
+        if nome_col and nome_col in df.columns:
+            df["_fornecedor_nome_merge"] = df[nome_col].fillna("").astype(str).str.strip()
+        else:
+            df["_fornecedor_nome_merge"] = ""
+
+        # Prioridade:
+        # 1) nome da tabela fornecedores (merge)
+        # 2) nome já vindo da view (base)
+        # 3) fallback "Fornecedor <id>"
+        df["fornecedor_nome"] = df.apply(
+            lambda row: (
+                row["_fornecedor_nome_merge"]
+                if row["_fornecedor_nome_merge"]
+                else (
+                    row["_fornecedor_nome_base"]
+                    if row["_fornecedor_nome_base"]
+                    else (
+                        f"Fornecedor {row['fornecedor_id']}"
+                        if row.get("fornecedor_id") and str(row.get("fornecedor_id")).strip()
+                        else "N/A"
+                    )
+                )
+            ),
+            axis=1,
+        )
+
+        # Limpeza
+        # o id do fornecedor veio como id_forn; o "id" é o do pedido
+        df.drop(columns=["id_forn", "_fornecedor_nome_merge"], inplace=True, errors="ignore")
+    else:
+        # Sem tabela de fornecedores: usar o nome base da view, e por último o id
+        df["fornecedor_nome"] = df.apply(
+            lambda row: (
+                row["_fornecedor_nome_base"]
+                if row["_fornecedor_nome_base"]
+                else (
+                    f"Fornecedor {row['fornecedor_id']}"
+                    if row.get("fornecedor_id") and str(row.get("fornecedor_id")).strip()
+                    else "N/A"
+                )
+            ),
+            axis=1,
+        )
+
+    df.drop(columns=["_fornecedor_nome_base"], inplace=True, errors="ignore")
+
+    df_atrasados = df[df["_atrasado"]].copy()
+    if not df_atrasados.empty:
+        for _, pedido in df_atrasados.iterrows():
+            due_dt = pedido.get("_due")
+            dias_atraso = int((hoje - due_dt).days) if pd.notna(due_dt) else 0
+
+            alertas["pedidos_atrasados"].append({
+                "id": pedido.get("id", pedido.get("id_x")),
+                "nr_oc": pedido.get("nr_oc"),
+                "descricao": pedido.get("descricao", ""),
+                "fornecedor": pedido.get("fornecedor_nome", "N/A"),
+                "dias_atraso": dias_atraso,
+                "valor": float(pedido.get("_valor_total", 0.0)),
+                "departamento": pedido.get("departamento", "N/A"),
+            })
+
+    
+    data_limite = hoje + timedelta(days=3)
+    df_vencendo = df[
+        df["_pendente"] &
+        df["_due"].notna() &
+        (df["_due"] >= hoje) &
+        (df["_due"] <= data_limite)
+    ].copy()
+
+    if not df_vencendo.empty:
+        for _, pedido in df_vencendo.iterrows():
+            dias_restantes = int((pedido.get("_due") - hoje).days) if pd.notna(pedido.get("_due")) else 0
+            alertas["pedidos_vencendo"].append({
+                "id": pedido.get("id", pedido.get("id_x")),
+                "nr_oc": pedido.get("nr_oc"),
+                "descricao": pedido.get("descricao", ""),
+                "fornecedor": pedido.get("fornecedor_nome", "N/A"),
+                "dias_restantes": dias_restantes,
+                "valor": float(pedido.get("_valor_total", 0.0)),
+                "previsao": pedido.get("previsao_entrega") or pedido.get("prazo_entrega"),
+            })
+
+    # ============================
+    # 3) Fornecedores com Baixa Performance
+    # ============================
+    if "fornecedor_nome" in df.columns and df["fornecedor_nome"].notna().any():
+        id_col = "id" if "id" in df.columns else ("id_x" if "id_x" in df.columns else df.columns[0])
+
+        grp = df.groupby("fornecedor_nome", dropna=False, observed=True).agg(
+            total_pedidos=(id_col, "count"),
+            entregues=("entregue", "sum"),
+            atrasados=("_atrasado", "sum"),
+        ).reset_index()
+
+        grp["taxa_sucesso"] = ((grp["entregues"] - grp["atrasados"]) / grp["total_pedidos"] * 100).fillna(0)
+
+        baixa = grp[(grp["taxa_sucesso"] < 70) & (grp["total_pedidos"] >= 5)]
+        for _, f in baixa.iterrows():
+            alertas["fornecedores_baixa_performance"].append({
+                "fornecedor": f["fornecedor_nome"],
+                "taxa_sucesso": float(f["taxa_sucesso"]),
+                "total_pedidos": int(f["total_pedidos"]),
+                "atrasados": int(f["atrasados"]),
+            })
+
+    # ============================
+    # 4) Pedidos Críticos (Alto valor + urgente)
+    # ============================
+    valor_critico = df["_valor_total"].quantile(0.75) if len(df) >= 4 else df["_valor_total"].max()
+    df_criticos = df[
+        df["_pendente"] &
+        (df["_valor_total"] >= float(valor_critico)) &
+        df["_due"].notna() &
+        (df["_due"] <= data_limite)
+    ].copy()
+
+    if not df_criticos.empty:
+        for _, pedido in df_criticos.iterrows():
+            alertas["pedidos_criticos"].append({
+                "id": pedido.get("id", pedido.get("id_x")),
+                "nr_oc": pedido.get("nr_oc"),
+                "descricao": pedido.get("descricao", ""),
+                "valor": float(pedido.get("_valor_total", 0.0)),
+                "fornecedor": pedido.get("fornecedor_nome", "N/A"),
+                "previsao": pedido.get("previsao_entrega") or pedido.get("prazo_entrega"),
+                "departamento": pedido.get("departamento", "N/A"),
+            })
+
+    # Total
+    alertas["total"] = (
+        len(alertas["pedidos_atrasados"])
+        + len(alertas["pedidos_vencendo"])
+        + len(alertas["pedidos_criticos"])
+        + len(alertas["fornecedores_baixa_performance"])
+    )
+
+    return alertas
+
+
+def _medir(fn, *args) -> float:
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        fn(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main(tamanhos: list[int]) -> None:
+    fornecedores = fornecedores_sinteticos()
+    print(f"{'linhas':>8} {'alertas':>8} | {'antigo':>8} {'vetorizado':>10} {'ganho':>6}")
+    for n in tamanhos:
+        pedidos = _normalizar_pedidos(pd.DataFrame(linhas_pedidos(n)))
+        novo = calcular_alertas(pedidos, fornecedores)
+        conferir_alertas(_calcular_alertas_antigo(pedidos, fornecedores), novo)
+        t_antigo = _medir(_calcular_alertas_antigo, pedidos, fornecedores)
+        t_novo = _medir(calcular_alertas, pedidos, fornecedores)
+        print(f"{n:>8} {novo['total']:>8} | {t_antigo:>7.3f}s {t_novo:>9.3f}s {t_antigo / t_novo:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
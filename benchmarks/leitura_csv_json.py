@@ -0,0 +1,94 @@
+"""
+Benchmark: leitura em massa de pedidos em JSON x CSV.
+
+Parte das linhas sintéticas de tests/sinteticos.py (formato de
+vw_pedidos_completo), serializa como o PostgREST responderia (JSON e
+text/csv) e mede, sem rede:
+
+  - tamanho do payload (cru e com gzip);
+  - leitura: JSON (json.loads + pd.DataFrame) x CSV (ler_csv, já tipado);
+  - leitura + _normalizar_pedidos (o frame que vai para o snapshot).
+
+Uso (na raiz do repositório):
+    python benchmarks/leitura_csv_json.py [linhas ...]
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from src.repositories.leitura_csv import ler_csv  # noqa: E402
+from src.repositories.pedidos import _DATAS_CSV, _TIPOS_CSV, _normalizar_pedidos  # noqa: E402
+from tests.sinteticos import linhas_pedidos  # noqa: E402
+
+REPETICOES = 5
+
+
+def _celula_csv(v) -> str:
+    """Representação texto de um campo de registro do Postgres (como no CSV do PostgREST)."""
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "t" if v else "f"
+    s = str(v)
+    if len(s) >= 19 and s[4] == "-" and s[10] == "T":
+        s = s.replace("T", " ", 1)
+    if s == "" or any(ch in s for ch in ',"\\() \n'):
+        s = '"' + s.replace("\\", "\\\\").replace('"', '""') + '"'
+    return s
+
+
+def _payloads(linhas: list[dict]) -> tuple[bytes, bytes]:
+    colunas = list(linhas[0])
+    corpo_json = json.dumps(linhas).encode()
+    corpo_csv = "\n".join(
+        [",".join(colunas)] + [",".join(_celula_csv(r[c]) for c in colunas) for r in linhas]
+    ).encode()
+    return corpo_json, corpo_csv
+
+
+def _ler_json(corpo: bytes) -> pd.DataFrame:
+    return pd.DataFrame(json.loads(corpo))
+
+
+def _ler_csv(corpo: bytes) -> pd.DataFrame:
+    return ler_csv(corpo, _TIPOS_CSV, _DATAS_CSV)
+
+
+def _medir(fn, corpo: bytes) -> float:
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        fn(corpo)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main(tamanhos: list[int]) -> None:
+    print(
+        f"{'linhas':>8} | {'json KB':>9} {'gz':>7} | {'csv KB':>9} {'gz':>7} | "
+        f"{'leitura json':>12} {'csv':>7} | {'+normalizar json':>16} {'csv':>7}"
+    )
+    for n in tamanhos:
+        corpo_json, corpo_csv = _payloads(linhas_pedidos(n))
+        t_json = _medir(_ler_json, corpo_json)
+        t_csv = _medir(_ler_csv, corpo_csv)
+        n_json = _medir(lambda c: _normalizar_pedidos(_ler_json(c)), corpo_json)
+        n_csv = _medir(lambda c: _normalizar_pedidos(_ler_csv(c)), corpo_csv)
+        print(
+            f"{n:>8} | {len(corpo_json) / 1024:>9.0f} {len(gzip.compress(corpo_json)) / 1024:>7.0f} | "
+            f"{len(corpo_csv) / 1024:>9.0f} {len(gzip.compress(corpo_csv)) / 1024:>7.0f} | "
+            f"{t_json:>11.3f}s {t_csv:>6.3f}s | {n_json:>15.3f}s {n_csv:>6.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 50_000, 100_000])
@@ -0,0 +1,108 @@
+"""
+Benchmark: normalização de pedidos, pipeline antigo (apply por célula) x
+vetorizado (_normalizar_pedidos atual).
+
+Usa as linhas sintéticas de tests/sinteticos.py, com uma fração de
+textos contendo HTML/entidades, confere que os dois pipelines produzem
+exatamente o mesmo frame e mede o tempo de cada um.
+
+Uso (na raiz do repositório):
+    python benchmarks/normalizacao_pedidos.py [linhas ...]
+"""
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from src.repositories.pedidos import _limpar_html, _normalizar_pedidos  # noqa: E402
+from tests.sinteticos import linhas_pedidos  # noqa: E402
+
+REPETICOES = 3
+
+
+def _normalizar_pedidos_antigo(df: pd.DataFrame) -> pd.DataFrame:
+    """Pipeline anterior, célula a célula (referência)."""
+    date_columns = ['data_solicitacao', 'data_oc', 'previsao_entrega', 'data_entrega_real', 'criado_em', 'atualizado_em']
+    for col in date_columns:
+        if col in df.columns:
+            if df[col].dtype == 'object':
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+                if df[col].isna().all():
+                    df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce')
+                if df[col].isna().all():
+                    df[col] = pd.to_datetime(df[col], format='%d/%m/%Y', errors='coerce')
+            else:
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    bool_columns = ['entregue', 'atrasado']
+    for col in bool_columns:
+        if col in df.columns:
+            if df[col].dtype == 'object':
+                df[col] = df[col].astype(str).str.lower().map({
+                    'true': True, 'false': False, 't': True, 'f': False, '1': True, '0': False,
+                    'yes': True, 'no': False, 'sim': True, 'não': False, 'nao': False,
+                })
+            df[col] = df[col].fillna(False).astype(bool)
+
+    numeric_columns = ['qtde_solicitada', 'qtde_entregue', 'valor_total', 'valor_ultima_compra']
+    for col in numeric_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    text_columns = ['descricao', 'nr_oc', 'nr_solicitacao', 'departamento',
+                    'cod_equipamento', 'cod_material', 'fornecedor_nome',
+                    'fornecedor_cidade', 'status', 'observacoes']
+    for col in text_columns:
+        if col in df.columns:
+            df[col] = df[col].apply(_limpar_html)
+    return df
+
+
+def _frame(n: int, seed: int = 7) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    linhas = linhas_pedidos(n)
+    for r in linhas:
+        # Textos vindos de editores ricos / importações: tags, entidades, espaços
+        if rnd.random() < 0.05:
+            r["descricao"] = f"<p>{r['descricao']} &amp; acessórios</p>"
+        if rnd.random() < 0.02:
+            r["observacoes"] = "  entregar   na <b>portaria</b>  "
+        if rnd.random() < 0.01:
+            r["fornecedor_nome"] = r["fornecedor_nome"].replace(" Ltda", " &amp; Cia")
+        if rnd.random() < 0.01:
+            r["cod_material"] = rnd.choice(["", "   ", "MAT\t01\n", "&lt;sem código&gt;"])
+        r["entregue"] = rnd.choice([r["entregue"], "true", "f", None])
+    return pd.DataFrame(linhas)
+
+
+def _medir(fn, base: pd.DataFrame) -> float:
+    tempos = []
+    for _ in range(REPETICOES):
+        df = base.copy()
+        inicio = time.perf_counter()
+        fn(df)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main(tamanhos: list[int]) -> None:
+    warnings.simplefilter("ignore", FutureWarning)  # fillna com downcast no pipeline antigo
+    print(f"{'linhas':>8} | {'antigo':>8} {'vetorizado':>10} {'ganho':>6}")
+    for n in tamanhos:
+        base = _frame(n)
+        pd.testing.assert_frame_equal(_normalizar_pedidos_antigo(base.copy()), _normalizar_pedidos(base.copy()))
+        t_antigo = _medir(_normalizar_pedidos_antigo, base)
+        t_novo = _medir(_normalizar_pedidos, base)
+        print(f"{n:>8} | {t_antigo:>7.3f}s {t_novo:>9.3f}s {t_antigo / t_novo:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 50_000, 100_000])
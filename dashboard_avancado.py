@@ -4,7 +4,7 @@ Gráficos interativos e análises preditivas
 
 Melhorias aplicadas:
 - Pré-processamento de datas (data_solicitacao) feito uma única vez
-- Agregações pesadas com cache (st.cache_data)
+- Agregações pesadas com cache (src.core.store.memoizar, dentro do orçamento de memória)
 - Filtros em st.form (evita rerun a cada clique no sidebar)
 - Redução de cópias desnecessárias de DataFrame
 """
@@ -17,6 +17,8 @@ import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
+from src.core import store
+
 
 # ----------------------------
 # Helpers (performance)
@@ -44,7 +46,7 @@ def _df_key(df: pd.DataFrame) -> tuple:
     return (int(len(df)), str(max_updated) if max_updated is not None else "no-updated-col")
 
 
-@st.cache_data(ttl=300)
+@store.memoizar(ttl=300)
 def _prepare_datas(_key: tuple, df_small: pd.DataFrame) -> pd.DataFrame:
     """Normaliza a coluna data_solicitacao para datetime e remove nulos/invalidos."""
     if df_small.empty or "data_solicitacao" not in df_small.columns:
@@ -60,7 +62,7 @@ def _prepare_datas(_key: tuple, df_small: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-@st.cache_data(ttl=300)
+@store.memoizar(ttl=300)
 def _agg_evolucao(_key: tuple, df_small: pd.DataFrame) -> pd.DataFrame:
     """Agrupa por mês para o gráfico de evolução."""
     dfp = _prepare_datas(_key, df_small)
@@ -82,7 +84,7 @@ def _agg_evolucao(_key: tuple, df_small: pd.DataFrame) -> pd.DataFrame:
     return agg
 
 
-@st.cache_data(ttl=300)
+@store.memoizar(ttl=300)
 def _agg_heatmap(_key: tuple, df_small: pd.DataFrame) -> pd.DataFrame:
     """Retorna pivot (dias x períodos) para heatmap."""
     dfp = _prepare_datas(_key, df_small)
@@ -130,7 +132,7 @@ def _agg_heatmap(_key: tuple, df_small: pd.DataFrame) -> pd.DataFrame:
     return pivot
 
 
-@st.cache_data(ttl=300)
+@store.memoizar(ttl=300)
 def _agg_comparativo(_key: tuple, df_small: pd.DataFrame, tipo_periodo: str, metrica: str) -> pd.DataFrame:
     """Agrupa por período (M/Q) para o comparativo."""
     dfp = _prepare_datas(_key, df_small)
@@ -304,7 +304,7 @@ def criar_relatorio_executivo(df_pedidos, formatar_moeda_br):
     st.markdown("---")
     st.markdown("#### 🏢 Análise por Departamento")
     
-    df_dept = df_pedidos.groupby('departamento').agg({
+    df_dept = df_pedidos.groupby('departamento', observed=True).agg({
         'id': 'count',
         'valor_total': 'sum',
         'entregue': lambda x: (x == True).sum(),
@@ -597,7 +597,7 @@ def criar_grafico_barras_fornecedores(df, doc_width_cm=24, max_itens=8):
             return None
 
         base = (
-            df.groupby('fornecedor_nome', dropna=False)['valor_total']
+            df.groupby('fornecedor_nome', dropna=False, observed=True)['valor_total']
             .sum()
             .sort_values(ascending=False)
             .head(max_itens)
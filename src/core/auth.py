@@ -7,6 +7,7 @@ import streamlit as st
 import hashlib
 import backup_auditoria as ba
 from src.core.db import get_supabase_user_client
+from src.core.resiliencia import executar
 
 
 def verificar_autenticacao() -> bool:
@@ -16,10 +17,9 @@ def verificar_autenticacao() -> bool:
 def _carregar_tenants_do_usuario(supabase_user) -> list[dict]:
     """Retorna lista de tenants vinculados ao usuário (tenant_users)."""
     # Política RLS recomendada: usuário pode ler apenas suas linhas em tenant_users.
-    resp = (
+    resp = executar(
         supabase_user.table("tenant_users")
         .select("tenant_id, role, tenants(nome)")
-        .execute()
     )
     data = resp.data or []
     # normaliza
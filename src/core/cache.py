@@ -0,0 +1,86 @@
+"""
+Registro de invalidação de cache por tabela e tenant.
+
+Os loaders cacheados incluem na chave de cache a "versão" das tabelas de que
+dependem (por tenant). Uma escrita chama invalidar(tabela, tenant_id=...), que
+incrementa só as versões afetadas: as entradas antigas daquele tenant deixam de
+ser encontradas (e expiram pelo TTL), enquanto as dos demais tenants continuam
+valendo. Substitui o st.cache_data.clear(), que zerava o cache do servidor inteiro.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable
+
+TABELAS = ("pedidos", "fornecedores", "usuarios")
+
+_lock = threading.Lock()
+_versoes_globais: dict[str, int] = {}
+_versoes_tenant: dict[tuple[str, str | None], int] = {}
+_loaders: dict[str, tuple[str, ...]] = {}
+_callbacks: dict[str, list[Callable[[str | None], None]]] = {}
+
+
+def _validar_tabela(tabela: str) -> None:
+    if tabela not in TABELAS:
+        raise ValueError(f"Tabela sem registro de cache: {tabela!r} (esperado: {', '.join(TABELAS)})")
+
+
+def registrar_loader(
+    nome: str,
+    *tabelas: str,
+    ao_invalidar: Callable[[str | None], None] | None = None,
+) -> None:
+    """
+    Declara que o loader `nome` depende das tabelas informadas.
+
+    ao_invalidar (opcional) é chamado com o tenant_id (ou None = todos) sempre
+    que uma dessas tabelas for invalidada; útil para estado fora do st.cache_data.
+    """
+    for tabela in tabelas:
+        _validar_tabela(tabela)
+    with _lock:
+        _loaders[nome] = tuple(tabelas)
+        if ao_invalidar is not None:
+            for tabela in tabelas:
+                _callbacks.setdefault(tabela, []).append(ao_invalidar)
+
+
+def loaders_registrados() -> dict[str, tuple[str, ...]]:
+    """Mapa loader -> tabelas de que depende."""
+    with _lock:
+        return dict(_loaders)
+
+
+def versao(tabela: str, tenant_id: str | None = None) -> tuple[int, int]:
+    """Versão atual de (tabela, tenant). Muda a cada invalidação que o afeta."""
+    _validar_tabela(tabela)
+    with _lock:
+        return (_versoes_globais.get(tabela, 0), _versoes_tenant.get((tabela, tenant_id), 0))
+
+
+def versao_dados(tenant_id: str | None, *tabelas: str) -> tuple:
+    """Versão combinada de várias tabelas (para usar como argumento de cache)."""
+    return tuple(versao(t, tenant_id) for t in tabelas)
+
+
+def invalidar(*tabelas: str, tenant_id: str | None = None) -> None:
+    """
+    Invalida as entradas de cache que dependem das tabelas informadas.
+
+    Com tenant_id, afeta apenas aquele tenant (e as entradas sem tenant, que
+    podem conter dados dele). Sem tenant_id, afeta todos os tenants.
+    """
+    chamadas = []
+    with _lock:
+        for tabela in tabelas:
+            _validar_tabela(tabela)
+            if tenant_id is None:
+                _versoes_globais[tabela] = _versoes_globais.get(tabela, 0) + 1
+            else:
+                for chave in ((tabela, tenant_id), (tabela, None)):
+                    _versoes_tenant[chave] = _versoes_tenant.get(chave, 0) + 1
+            chamadas.extend(_callbacks.get(tabela, []))
+
+    for fn in dict.fromkeys(chamadas):
+        fn(tenant_id)
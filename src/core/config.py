@@ -1,3 +1,137 @@
 """Configuração da aplicação Streamlit."""
+import os
+
+
 def configure_page():
-    pass
\ No newline at end of file
+    pass
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lê um inteiro de variável de ambiente (com fallback seguro)."""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# ============================================
+# CARGA DE PEDIDOS (vw_pedidos_completo)
+# ============================================
+
+# Tamanho de cada página pedida ao PostgREST. Mantenha <= max-rows do projeto
+# (padrão Supabase: 1000); páginas maiores são cortadas pelo servidor.
+PEDIDOS_TAMANHO_PAGINA = _env_int("FU_PEDIDOS_TAMANHO_PAGINA", 1000)
+
+# Quantidade de páginas buscadas em paralelo (threads).
+PEDIDOS_MAX_WORKERS = _env_int("FU_PEDIDOS_MAX_WORKERS", 4)
+
+# Intervalo máximo entre cargas completas quando a sincronização incremental
+# (delta por atualizado_em) está ativa. Entre elas, só o delta é buscado.
+PEDIDOS_SYNC_COMPLETO_SEGUNDOS = _env_int("FU_PEDIDOS_SYNC_COMPLETO_SEGUNDOS", 1800)
+
+# Tempo (s) que um DataFrame de pedidos fica residente no armazém do processo
+# antes de nova sincronização com o banco.
+PEDIDOS_TTL_SEGUNDOS = _env_int("FU_PEDIDOS_TTL_SEGUNDOS", 60)
+
+# Origem da carga: "view" (vw_pedidos_completo, fornecedor repetido em cada
+# linha) ou "tabelas" (pedidos + fornecedores em separado, junção em memória).
+PEDIDOS_FONTE = os.getenv("FU_PEDIDOS_FONTE", "view")
+
+# Formato da leitura em massa: "json" (padrão do cliente) ou "csv" (text/csv
+# comprimido, lido direto em colunas tipadas; ver benchmarks/leitura_csv_json.py).
+PEDIDOS_FORMATO = os.getenv("FU_PEDIDOS_FORMATO", "json")
+
+# Stale-while-revalidate: por quanto tempo (s) além do TTL um DataFrame vencido
+# ainda é servido na hora enquanto é recarregado em segundo plano (0 desliga).
+PEDIDOS_MAX_DEFASAGEM_SEGUNDOS = _env_int("FU_PEDIDOS_MAX_DEFASAGEM_SEGUNDOS", 300)
+
+# Diretório dos snapshots em disco (Parquet por tenant + watermark) usados
+# para, depois de um reinício, buscar só o delta. Os arquivos têm os pedidos
+# dos tenants: use um diretório da aplicação, fora do /tmp compartilhado (é
+# criado com permissão só para o dono). Vazio (padrão) desliga.
+PEDIDOS_SNAPSHOT_DIR = os.getenv("FU_PEDIDOS_SNAPSHOT_DIR", "")
+
+# Textos longos (descricao/observacoes) buscados sob demanda: ids por requisição
+# (limitado pelo tamanho da URL do filtro in_) e capacidade do cache LRU.
+PEDIDOS_TEXTOS_LOTE = _env_int("FU_PEDIDOS_TEXTOS_LOTE", 150)
+PEDIDOS_TEXTOS_LRU = _env_int("FU_PEDIDOS_TEXTOS_LRU", 20000)
+
+# ============================================
+# CARGA DE FORNECEDORES
+# ============================================
+
+FORNECEDORES_TTL_SEGUNDOS = _env_int("FU_FORNECEDORES_TTL_SEGUNDOS", 300)
+FORNECEDORES_MAX_DEFASAGEM_SEGUNDOS = _env_int("FU_FORNECEDORES_MAX_DEFASAGEM_SEGUNDOS", 900)
+FORNECEDORES_FORMATO = os.getenv("FU_FORNECEDORES_FORMATO", "json")
+
+# ============================================
+# CLIENTES SUPABASE POR USUÁRIO (src.core.db)
+# ============================================
+
+# Clientes PostgREST mantidos por access token (LRU) e conexões HTTP
+# keep-alive do pool compartilhado entre eles.
+SUPABASE_POOL_CLIENTES = _env_int("FU_SUPABASE_POOL_CLIENTES", 64)
+SUPABASE_POOL_CONEXOES = _env_int("FU_SUPABASE_POOL_CONEXOES", 32)
+
+# ============================================
+# EXECUÇÃO DAS CONSULTAS (src.core.resiliencia)
+# ============================================
+
+# Tempo máximo (s) de cada chamada ao PostgREST, por tentativa.
+SUPABASE_TIMEOUT_SEGUNDOS = _env_int("FU_SUPABASE_TIMEOUT_SEGUNDOS", 20)
+
+# Tentativas das leituras (idempotentes) em falha transitória, com espera
+# exponencial com jitter a partir de SUPABASE_RETRY_BASE_MS.
+SUPABASE_TENTATIVAS = _env_int("FU_SUPABASE_TENTATIVAS", 3)
+SUPABASE_RETRY_BASE_MS = _env_int("FU_SUPABASE_RETRY_BASE_MS", 200)
+
+# Leitura duplicada (hedge) quando a primeira passa deste percentil da latência
+# recente da mesma rota (0 desliga).
+SUPABASE_HEDGE_PERCENTIL = _env_int("FU_SUPABASE_HEDGE_PERCENTIL", 95)
+
+# Disjuntor: falhas seguidas que abrem o circuito e por quanto tempo (s) as
+# chamadas falham na hora (as telas caem para o último dado em memória).
+SUPABASE_DISJUNTOR_FALHAS = _env_int("FU_SUPABASE_DISJUNTOR_FALHAS", 5)
+SUPABASE_DISJUNTOR_SEGUNDOS = _env_int("FU_SUPABASE_DISJUNTOR_SEGUNDOS", 30)
+
+# ============================================
+# AQUECIMENTO DE CACHE (src.services.aquecimento)
+# ============================================
+
+# Horários (HH:MM, hora local do servidor, separados por vírgula) em que os
+# dados dos tenants ativos são recarregados em segundo plano; vazio desliga.
+AQUECIMENTO_HORARIOS = os.getenv("FU_AQUECIMENTO_HORARIOS", "06:30")
+
+# Aquece também logo na partida do processo (1) ou não (0).
+AQUECIMENTO_NA_PARTIDA = _env_int("FU_AQUECIMENTO_NA_PARTIDA", 1)
+
+# Tenant "ativo" = algum usuário dele com registro em logs_auditoria nos
+# últimos AQUECIMENTO_DIAS dias. No máximo AQUECIMENTO_MAX_TENANTS por vez,
+# AQUECIMENTO_CONCORRENCIA carregando ao mesmo tempo.
+AQUECIMENTO_DIAS = _env_int("FU_AQUECIMENTO_DIAS", 7)
+AQUECIMENTO_MAX_TENANTS = _env_int("FU_AQUECIMENTO_MAX_TENANTS", 20)
+AQUECIMENTO_CONCORRENCIA = _env_int("FU_AQUECIMENTO_CONCORRENCIA", 2)
+
+# ============================================
+# ORÇAMENTO DE MEMÓRIA DOS CACHES (src.core.store)
+# ============================================
+
+# Teto (MB) da soma de datasets e resultados derivados residentes no processo;
+# acima dele, os menos usados recentemente são descartados.
+CACHE_ORCAMENTO_MB = _env_int("FU_CACHE_ORCAMENTO_MB", 1024)
+
+# ============================================
+# REGRAS DE ALERTA (src.services.sistema_alertas)
+# ============================================
+
+# Limiares padrão: janela (dias) de "vencendo" e de urgência dos críticos;
+# taxa de sucesso mínima (%) e pedidos mínimos para um fornecedor entrar em
+# baixa performance; percentil do valor a partir do qual um pedido é crítico.
+ALERTAS_JANELA_DIAS = _env_int("FU_ALERTAS_JANELA_DIAS", 3)
+ALERTAS_TAXA_SUCESSO_MINIMA = _env_int("FU_ALERTAS_TAXA_SUCESSO_MINIMA", 70)
+ALERTAS_PEDIDOS_MINIMOS_FORNECEDOR = _env_int("FU_ALERTAS_PEDIDOS_MINIMOS_FORNECEDOR", 5)
+ALERTAS_PERCENTIL_CRITICO = _env_int("FU_ALERTAS_PERCENTIL_CRITICO", 75)
+
+# Limiares por tenant, em JSON: {"<tenant_id>": {"janela_dias": 5, "percentil_critico": 90}}.
+# Os campos omitidos (e os tenants ausentes) ficam com os padrões acima.
+ALERTAS_LIMIARES_TENANT = os.getenv("FU_ALERTAS_LIMIARES_TENANT", "")
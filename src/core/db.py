@@ -1,7 +1,18 @@
+import base64
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
 import streamlit as st
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
 from supabase import create_client
 
+from src.core.config import SUPABASE_POOL_CLIENTES, SUPABASE_POOL_CONEXOES, SUPABASE_TIMEOUT_SEGUNDOS
+
 
 def _get_secret(name: str) -> str | None:
     if "SUPABASE_URL" in st.secrets and name in st.secrets:
@@ -19,6 +30,11 @@ def init_supabase_admin():
     return create_client(url, key)
 
 
+def service_role_configurada() -> bool:
+    """True se SUPABASE_SERVICE_ROLE_KEY está configurada (sem ela, init_supabase_admin usa SUPABASE_KEY, que pode ser a anon)."""
+    return bool(_get_secret("SUPABASE_SERVICE_ROLE_KEY"))
+
+
 @st.cache_resource
 def init_supabase_anon():
     """Cliente Supabase com ANON KEY (respeita RLS quando autenticado)."""
@@ -29,16 +45,195 @@ def init_supabase_anon():
     return create_client(url, key)
 
 
-def get_supabase_user_client(access_token: str):
-    """Cria um client Supabase autenticado com JWT do usuário (RLS ativo)."""
-    supa = init_supabase_anon()
-    # supabase-py: aplica JWT no PostgREST
+def jwt_claim_exp(token: str):
+    """Extrai 'exp' (epoch seconds) do JWT sem validar assinatura."""
     try:
-        supa.postgrest.auth(access_token)
+        parts = token.split(".")
+        if len(parts) < 2:
+            return None
+        payload_b64 = parts[1]
+        # base64url padding
+        payload_b64 += "=" * (-len(payload_b64) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(payload_b64.encode("utf-8")).decode("utf-8"))
+        return payload.get("exp")
     except Exception:
-        # fallback: algumas versões usam "auth" em outro ponto
+        return None
+
+
+# ============================================
+# POOL DE CLIENTES POR USUÁRIO
+# ============================================
+#
+# Cada access token tem o seu cliente PostgREST (o JWT vai no header
+# Authorization da sessão HTTP dele), guardado num LRU limitado do processo.
+# Todos usam o mesmo transporte httpx: as conexões keep-alive com o Supabase
+# são compartilhadas, sem que uma sessão altere o header de outra. Um token
+# vencido sai do pool na próxima consulta ao pool.
+
+
+class _FluxoContado(httpx.SyncByteStream):
+    def __init__(self, fluxo, ao_fechar):
+        self._fluxo = fluxo
+        self._ao_fechar = ao_fechar
+
+    def __iter__(self):
+        yield from self._fluxo
+
+    def close(self) -> None:
         try:
-            supa.auth.set_session(access_token, "")  # type: ignore
-        except Exception:
-            pass
-    return supa
+            self._fluxo.close()
+        finally:
+            ao_fechar, self._ao_fechar = self._ao_fechar, None
+            if ao_fechar is not None:
+                ao_fechar()
+
+
+class _TransporteContado(httpx.BaseTransport):
+    """HTTPTransport que conta as requisições em andamento (até o corpo da resposta ser fechado)."""
+
+    def __init__(self, transporte: httpx.BaseTransport):
+        self._transporte = transporte
+        self._lock = threading.Lock()
+        self.em_andamento = 0
+
+    def _fim(self) -> None:
+        with self._lock:
+            self.em_andamento -= 1
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.em_andamento += 1
+        try:
+            resposta = self._transporte.handle_request(request)
+        except BaseException:
+            self._fim()
+            raise
+        resposta.stream = _FluxoContado(resposta.stream, self._fim)
+        return resposta
+
+    def close(self) -> None:
+        # Compartilhado entre todos os clientes: não fecha quando um deles é descartado.
+        pass
+
+
+_transporte: _TransporteContado | None = None
+_transporte_lock = threading.Lock()
+
+
+def _transporte_compartilhado() -> _TransporteContado:
+    global _transporte
+    with _transporte_lock:
+        if _transporte is None:
+            limites = httpx.Limits(
+                max_connections=SUPABASE_POOL_CONEXOES,
+                max_keepalive_connections=SUPABASE_POOL_CONEXOES,
+            )
+            _transporte = _TransporteContado(httpx.HTTPTransport(limits=limites))
+        return _transporte
+
+
+class _PostgrestCompartilhado(SyncPostgrestClient):
+    """SyncPostgrestClient cuja sessão usa o transporte (pool de conexões) compartilhado."""
+
+    def create_session(self, base_url, headers, timeout) -> SyncClient:
+        return SyncClient(base_url=base_url, headers=headers, timeout=timeout, transport=_transporte_compartilhado())
+
+
+class ClienteUsuario:
+    """
+    Cliente autenticado com o JWT de um usuário (RLS ativo).
+
+    table/from_, rpc e o postgrest usam o pool compartilhado. Qualquer outro
+    atributo do supabase.Client (auth, storage, functions...) é delegado a um
+    Client completo deste usuário (chave anon + JWT no PostgREST, como antes
+    do pool), criado só na primeira vez que for pedido.
+    """
+
+    def __init__(self, url: str, anon_key: str, access_token: str):
+        self._url = url
+        self._anon_key = anon_key
+        self._access_token = access_token
+        self._cliente = None
+        self._cliente_lock = threading.Lock()
+        self.postgrest = _PostgrestCompartilhado(
+            f"{url}/rest/v1",
+            headers={"apiKey": anon_key},
+            timeout=SUPABASE_TIMEOUT_SEGUNDOS,  # o mesmo prazo de src.core.resiliencia
+        )
+        self.postgrest.auth(access_token)
+        self.expira_em = jwt_claim_exp(access_token)
+
+    def table(self, table_name: str):
+        return self.postgrest.from_(table_name)
+
+    def from_(self, table_name: str):
+        return self.postgrest.from_(table_name)
+
+    def rpc(self, fn: str, params: dict | None = None):
+        return self.postgrest.rpc(fn, params or {})
+
+    def _cliente_completo(self):
+        with self._cliente_lock:
+            if self._cliente is None:
+                cliente = create_client(self._url, self._anon_key)
+                cliente.postgrest.auth(self._access_token)
+                self._cliente = cliente
+            return self._cliente
+
+    def __getattr__(self, nome: str):
+        # Só chega aqui o que a classe não define.
+        if nome.startswith("_"):
+            raise AttributeError(nome)
+        return getattr(self._cliente_completo(), nome)
+
+
+_clientes: OrderedDict[str, ClienteUsuario] = OrderedDict()
+_clientes_lock = threading.Lock()
+_contadores = {"acertos": 0, "faltas": 0, "expirados": 0, "despejados": 0}
+
+
+def _expirado(cliente: ClienteUsuario, agora: float) -> bool:
+    try:
+        return cliente.expira_em is not None and float(cliente.expira_em) <= agora
+    except (TypeError, ValueError):
+        return False
+
+
+def get_supabase_user_client(access_token: str) -> ClienteUsuario:
+    """Client autenticado com o JWT do usuário (RLS ativo), reaproveitado do pool por token."""
+    agora = time.time()
+    with _clientes_lock:
+        for token in [t for t, c in _clientes.items() if _expirado(c, agora)]:
+            del _clientes[token]
+            _contadores["expirados"] += 1
+
+        cliente = _clientes.get(access_token)
+        if cliente is not None:
+            _clientes.move_to_end(access_token)
+            _contadores["acertos"] += 1
+            return cliente
+        _contadores["faltas"] += 1
+
+    url = _get_secret("SUPABASE_URL")
+    key = _get_secret("SUPABASE_ANON_KEY") or _get_secret("SUPABASE_KEY")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL e SUPABASE_ANON_KEY (ou SUPABASE_KEY) não configurados.")
+    cliente = ClienteUsuario(url, key, access_token)
+
+    with _clientes_lock:
+        cliente = _clientes.setdefault(access_token, cliente)
+        _clientes.move_to_end(access_token)
+        while len(_clientes) > max(1, SUPABASE_POOL_CLIENTES):
+            _clientes.popitem(last=False)
+            _contadores["despejados"] += 1
+    return cliente
+
+
+def estatisticas_clientes() -> dict:
+    """Métricas do pool: clientes residentes, taxa de acerto e requisições em andamento."""
+    with _clientes_lock:
+        stats = dict(_contadores, clientes=len(_clientes), capacidade=SUPABASE_POOL_CLIENTES)
+    consultas = stats["acertos"] + stats["faltas"]
+    stats["taxa_acerto"] = stats["acertos"] / consultas if consultas else 0.0
+    stats["requisicoes_em_andamento"] = _transporte.em_andamento if _transporte is not None else 0
+    return stats
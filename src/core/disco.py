@@ -0,0 +1,82 @@
+"""
+Snapshots de DataFrame em disco (Parquet), para reinícios a quente.
+
+Cada arquivo guarda o frame e, nos metadados do Parquet, um dicionário JSON
+com a versão de esquema e o que mais o chamador precisar (watermark, hora da
+última carga completa...). A gravação vai para um arquivo temporário no mesmo
+diretório e é publicada com os.replace (atômico): um leitor nunca vê um
+arquivo pela metade, nem se o processo morrer no meio da escrita.
+
+Um arquivo com versão diferente da esperada, ilegível ou de outro formato é
+descartado (apagado) na leitura. pyarrow vem com o streamlit; se não estiver
+disponível, gravar/ler simplesmente não fazem nada.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+_CHAVE_META = b"fu_snapshot"
+
+
+def gravar(caminho: str, df: pd.DataFrame, versao: int, meta: dict | None = None) -> bool:
+    """Grava `df` + metadados em `caminho` (escrita atômica). Devolve False se não deu para gravar."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        # colunas object com tipos misturados: sem snapshot, a carga segue normal
+        return False
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[_CHAVE_META] = json.dumps({**(meta or {}), "versao": versao}, default=str).encode()
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    diretorio = os.path.dirname(caminho) or "."
+    os.makedirs(diretorio, mode=0o700, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=diretorio, prefix=".tmp-", suffix=".parquet")
+    try:
+        with os.fdopen(fd, "wb") as arquivo:
+            pq.write_table(tabela, arquivo)
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.unlink(temporario)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def ler(caminho: str, versao: int) -> tuple[pd.DataFrame, dict] | None:
+    """(df, metadados) do snapshot em `caminho`, ou None se não existe / é incompatível."""
+    if not os.path.exists(caminho):
+        return None
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+
+    try:
+        tabela = pq.read_table(caminho)
+        meta = json.loads((tabela.schema.metadata or {})[_CHAVE_META])
+        if meta.get("versao") != versao:
+            raise ValueError(f"versão {meta.get('versao')!r} != {versao!r}")
+        return tabela.to_pandas(), meta
+    except Exception:
+        remover(caminho)
+        return None
+
+
+def remover(caminho: str) -> None:
+    try:
+        os.unlink(caminho)
+    except OSError:
+        pass
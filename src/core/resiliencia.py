@@ -0,0 +1,234 @@
+"""
+Execução das consultas ao Supabase com timeout, retentativas, hedge e disjuntor.
+
+Todo .execute() dos repositórios passa por executar() (ou chamar(), para
+requisições montadas à mão, como a leitura em CSV):
+
+  - timeout: cada tentativa roda numa thread do pool e o chamador espera no
+    máximo SUPABASE_TIMEOUT_SEGUNDOS (a sessão HTTP dos clientes usa o mesmo
+    limite, então a thread abandonada também termina);
+  - retentativas: só leituras (GET/HEAD, idempotentes) e só em falha
+    transitória (rede, timeout, 408/429/5xx, PGRST00x), com espera exponencial
+    com jitter ("full jitter");
+  - hedge: se uma leitura passa do percentil SUPABASE_HEDGE_PERCENTIL da
+    latência recente da mesma rota, sai uma cópia; vale a primeira resposta;
+  - disjuntor: SUPABASE_DISJUNTOR_FALHAS chamadas seguidas com falha
+    transitória abrem o circuito por SUPABASE_DISJUNTOR_SEGUNDOS; nesse tempo
+    as chamadas levantam CircuitoAberto na hora (sem esperar o timeout) e os
+    loaders servem o último dado em memória. Passado o prazo, uma chamada de
+    teste fecha o circuito (sucesso) ou o reabre (falha).
+
+Escritas (insert/update/delete/rpc) não passam pelo pool: rodam na thread do
+chamador, sem timeout próprio, retentativa nem hedge. Uma escrita abandonada
+no prazo continuaria rodando na thread do pool e poderia gravar depois de a
+tela ter mostrado a falha (e a nova tentativa do usuário duplicaria o pedido
+ou a entrega). O limite delas é o da sessão HTTP (SUPABASE_TIMEOUT_SEGUNDOS,
+ver src.core.db); o disjuntor vale para elas também (recusa na hora com o
+circuito aberto, e falhas transitórias contam).
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+import httpx
+import numpy as np
+from postgrest.exceptions import APIError
+
+from src.core.config import (
+    SUPABASE_DISJUNTOR_FALHAS,
+    SUPABASE_DISJUNTOR_SEGUNDOS,
+    SUPABASE_HEDGE_PERCENTIL,
+    SUPABASE_RETRY_BASE_MS,
+    SUPABASE_TENTATIVAS,
+    SUPABASE_TIMEOUT_SEGUNDOS,
+)
+
+_METODOS_LEITURA = ("GET", "HEAD")
+_CODIGOS_TRANSITORIOS = {"408", "429", "500", "502", "503", "504"}
+_RETRY_TETO_S = 5.0
+_AMOSTRAS_LATENCIA = 200
+_AMOSTRAS_MINIMAS_HEDGE = 20
+
+
+class CircuitoAberto(RuntimeError):
+    """O disjuntor está aberto: o banco vem falhando e a chamada nem foi feita."""
+
+
+def transitoria(e: BaseException) -> bool:
+    """Falha que pode passar sozinha (rede, timeout, sobrecarga do servidor)."""
+    if isinstance(e, (httpx.TransportError, TimeoutError, CircuitoAberto)):
+        return True
+    if isinstance(e, APIError):
+        codigo = str(e.code or "")
+        return codigo in _CODIGOS_TRANSITORIOS or codigo.startswith("PGRST00")
+    return False
+
+
+def resultado_incerto(e: BaseException) -> bool:
+    """A requisição saiu, mas a resposta não chegou: uma escrita pode ter sido gravada mesmo assim."""
+    return isinstance(e, (httpx.ReadTimeout, httpx.ReadError, httpx.RemoteProtocolError, TimeoutError))
+
+
+# ============================================
+# DISJUNTOR
+# ============================================
+
+class _Disjuntor:
+    def __init__(self):
+        self.falhas = 0
+        self.aberto_ate = 0.0
+        self.em_teste = False
+
+    def permitir(self, agora: float) -> bool:
+        if self.falhas < SUPABASE_DISJUNTOR_FALHAS:
+            return True
+        if agora < self.aberto_ate or self.em_teste:
+            return False
+        self.em_teste = True  # meio-aberto: deixa passar uma chamada
+        return True
+
+    def sucesso(self) -> None:
+        self.falhas = 0
+        self.em_teste = False
+
+    def falha(self, agora: float) -> None:
+        self.falhas += 1
+        self.em_teste = False
+        if self.falhas >= SUPABASE_DISJUNTOR_FALHAS:
+            self.aberto_ate = agora + SUPABASE_DISJUNTOR_SEGUNDOS
+
+
+_lock = threading.Lock()
+_disjuntores: dict[str, _Disjuntor] = {}
+_latencias: dict[str, deque] = {}
+_contadores = {"chamadas": 0, "retentativas": 0, "hedges": 0, "timeouts": 0, "rejeitadas": 0, "falhas": 0}
+
+_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="fu-supabase")
+
+
+def _limiar_hedge(rota: str) -> float | None:
+    if SUPABASE_HEDGE_PERCENTIL <= 0:
+        return None
+    with _lock:
+        amostras = list(_latencias.get(rota, ()))
+    if len(amostras) < _AMOSTRAS_MINIMAS_HEDGE:
+        return None
+    return float(np.percentile(amostras, SUPABASE_HEDGE_PERCENTIL))
+
+
+def _registrar_latencia(rota: str, segundos: float) -> None:
+    with _lock:
+        _latencias.setdefault(rota, deque(maxlen=_AMOSTRAS_LATENCIA)).append(segundos)
+
+
+def _tentativa(fn: Callable[[], Any], rota: str, timeout: float) -> Any:
+    """Uma tentativa de leitura com prazo `timeout`; dispara uma cópia (hedge) após o limiar de latência."""
+    inicio = time.monotonic()
+    prazo = inicio + timeout
+    pendentes = {_pool.submit(fn)}
+    limiar = _limiar_hedge(rota)
+    erro = None
+    while pendentes:
+        espera = prazo - time.monotonic()
+        if limiar is not None:
+            espera = min(espera, inicio + limiar - time.monotonic())
+        prontos, pendentes = wait(pendentes, timeout=max(0.0, espera), return_when=FIRST_COMPLETED)
+        for fut in prontos:
+            if fut.exception() is None:
+                _registrar_latencia(rota, time.monotonic() - inicio)
+                return fut.result()
+            erro = erro or fut.exception()
+        if limiar is not None and time.monotonic() >= inicio + limiar:
+            limiar = None
+            if pendentes:
+                with _lock:
+                    _contadores["hedges"] += 1
+                pendentes.add(_pool.submit(fn))
+        elif not prontos and time.monotonic() >= prazo:
+            with _lock:
+                _contadores["timeouts"] += 1
+            _registrar_latencia(rota, timeout)
+            raise TimeoutError(f"Supabase não respondeu em {timeout:g}s ({rota})")
+    raise erro
+
+
+def chamar(
+    fn: Callable[[], Any],
+    *,
+    leitura: bool = True,
+    rota: str = "",
+    circuito: str = "supabase",
+    timeout: float | None = None,
+) -> Any:
+    """
+    Executa `fn` (uma requisição ao Supabase) pelo disjuntor; leituras com
+    timeout, retentativas e hedge, escritas direto na thread do chamador.
+    """
+    timeout = float(timeout or SUPABASE_TIMEOUT_SEGUNDOS)
+    tentativas = max(1, SUPABASE_TENTATIVAS) if leitura else 1
+    with _lock:
+        _contadores["chamadas"] += 1
+        disjuntor = _disjuntores.setdefault(circuito, _Disjuntor())
+        if not disjuntor.permitir(time.monotonic()):
+            _contadores["rejeitadas"] += 1
+            raise CircuitoAberto(f"Supabase indisponível (circuito '{circuito}' aberto)")
+
+    for n in range(tentativas):
+        try:
+            # escrita: sem prazo próprio (ver o docstring do módulo)
+            resultado = _tentativa(fn, rota, timeout) if leitura else fn()
+        except Exception as e:
+            if not transitoria(e):
+                with _lock:
+                    disjuntor.sucesso()  # o servidor respondeu: erro da consulta, não do banco
+                raise
+            if n + 1 < tentativas:
+                with _lock:
+                    _contadores["retentativas"] += 1
+                teto = min(_RETRY_TETO_S, SUPABASE_RETRY_BASE_MS / 1000 * 2 ** n)
+                time.sleep(random.uniform(0, teto))
+                continue
+            with _lock:
+                _contadores["falhas"] += 1
+                disjuntor.falha(time.monotonic())
+            raise
+        with _lock:
+            disjuntor.sucesso()
+        return resultado
+
+
+def executar(q, *, leitura: bool | None = None, circuito: str = "supabase", timeout: float | None = None):
+    """q.execute() (builder do postgrest) pela política acima; leitura = método GET/HEAD se não informado."""
+    metodo = getattr(q, "http_method", "GET")
+    if leitura is None:
+        leitura = metodo in _METODOS_LEITURA
+    return chamar(
+        q.execute,
+        leitura=leitura,
+        rota=f"{metodo} {getattr(q, 'path', '')}",
+        circuito=circuito,
+        timeout=timeout,
+    )
+
+
+def circuito_aberto(circuito: str = "supabase") -> bool:
+    """True se o disjuntor está recusando chamadas agora."""
+    with _lock:
+        disjuntor = _disjuntores.get(circuito)
+        return (
+            disjuntor is not None
+            and disjuntor.falhas >= SUPABASE_DISJUNTOR_FALHAS
+            and time.monotonic() < disjuntor.aberto_ate
+        )
+
+
+def estatisticas() -> dict:
+    """Contadores (chamadas, retentativas, hedges, timeouts, rejeitadas, falhas) e circuitos abertos."""
+    abertos = [c for c in list(_disjuntores) if circuito_aberto(c)]
+    with _lock:
+        return {**_contadores, "circuitos_abertos": abertos}
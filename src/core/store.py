@@ -0,0 +1,520 @@
+"""
+Armazém de datasets por tenant, compartilhado pelo processo inteiro.
+
+O st.cache_data serializa (pickle) o DataFrame ao gravar e desserializa uma
+cópia nova a cada leitura, por sessão. Com dezenas de usuários no mesmo
+processo Streamlit isso multiplica a memória. Aqui cada (dataset, tenant) tem
+uma única cópia residente, com os arrays marcados como somente leitura; as
+páginas recebem uma visão rasa (df.copy(deep=False)) que compartilha esses
+arrays. Criar ou substituir colunas na visão funciona normalmente e não afeta
+as demais sessões; escrever dentro de uma coluna existente (df.loc[...] = ...)
+levanta "assignment destination is read-only".
+
+Cargas são coalescidas (single-flight): se várias sessões pedem o mesmo
+(dataset, tenant, chave) enquanto ele está sendo carregado, só a primeira vai
+ao banco e as demais esperam o mesmo resultado (ou a mesma exceção).
+
+Opcionalmente (max_defasagem), uma entrada vencida é servida enquanto uma
+thread em segundo plano a recarrega (stale-while-revalidate).
+
+Cargas feitas fora de uma sessão (o aquecedor, com o cliente admin) rodam
+dentro de preservando_residentes(): um resultado vazio não é publicado, para
+que um frame vazio (RLS sem usuário, por exemplo) nunca substitua o residente
+nem seja servido às sessões como dado válido.
+
+Resultados derivados (índices de busca, rótulos, agregações) ficam aqui também,
+por memo()/memoizar() no lugar do st.cache_data, sempre sob o tenant de quem
+os calculou e com o mesmo single-flight das cargas. Datasets e derivados dividem
+um orçamento único de memória (CACHE_ORCAMENTO_MB, medido por entrada): quando
+a soma passa dele, saem as entradas usadas há mais tempo (LRU).
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import itertools
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+from src.core.config import CACHE_ORCAMENTO_MB
+
+
+@dataclass
+class _Entrada:
+    df: pd.DataFrame
+    chave: Hashable          # versão dos dados (ou qualquer carimbo) que gerou o df
+    criado_em: float         # time.monotonic()
+    bytes: int               # memory_usage(deep=True), medido antes de congelar
+    gerado_em: datetime      # hora local da carga (indicador "dados de HH:MM:SS")
+    acessado_em: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Derivado:
+    valor: Any
+    criado_em: float
+    bytes: int
+    ttl: float | None
+    acessado_em: float
+
+
+_ATTR_GERACAO = "fu_geracao"
+_AMOSTRA_TAMANHO = 200  # itens medidos por lista grande (ver _tamanho_valor)
+
+_lock = threading.Lock()
+_geracoes = itertools.count(1)
+_entradas: dict[tuple[str, str | None], _Entrada] = {}
+_derivados: dict[tuple[str, str | None, Hashable], _Derivado] = {}
+_em_voo: dict[tuple[str, str | None, Hashable], Future] = {}
+_contadores = {
+    "hits": 0, "defasados": 0, "revalidacoes": 0, "renovacoes": 0, "esperas": 0, "cargas": 0, "erros": 0,
+    "vazios_descartados": 0, "memo_hits": 0, "memo_calculos": 0, "memo_esperas": 0, "despejos": 0,
+}
+_preservar: ContextVar[bool] = ContextVar("fu_store_preservar", default=False)
+
+
+@contextmanager
+def preservando_residentes():
+    """Dentro do bloco (nesta thread), cargas que voltam vazias não são publicadas no armazém."""
+    token = _preservar.set(True)
+    try:
+        yield
+    finally:
+        _preservar.reset(token)
+
+
+def preservando() -> bool:
+    """True dentro de preservando_residentes() (para caches próprios dos loaders, como o snapshot de pedidos)."""
+    return _preservar.get()
+
+
+def congelar(df: pd.DataFrame) -> pd.DataFrame:
+    """Marca os arrays do DataFrame como somente leitura (no próprio objeto)."""
+    for bloco in df._mgr.blocks:
+        valores = bloco.values
+        arr = valores if isinstance(valores, np.ndarray) else getattr(valores, "_ndarray", None)
+        if isinstance(arr, np.ndarray):
+            arr.flags.writeable = False
+    return df
+
+
+def _tamanho(df: pd.DataFrame) -> int:
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except ValueError:
+        # deep=True não lê colunas object já congeladas (recorte de outra
+        # entrada): os dados são compartilhados, conta só os ponteiros.
+        return int(df.memory_usage(index=True, deep=False).sum())
+
+
+def visao(df: pd.DataFrame) -> pd.DataFrame:
+    """Visão rasa (sem copiar dados) de um DataFrame residente."""
+    return df.copy(deep=False)
+
+
+def obter(
+    nome: str,
+    tenant_id: str | None,
+    chave: Hashable,
+    carregar: Callable[[], pd.DataFrame],
+    ttl: float | None = None,
+    max_defasagem: float | None = None,
+) -> pd.DataFrame:
+    """
+    Devolve uma visão do dataset (nome, tenant) para a `chave` informada.
+
+    Se não há entrada residente, se a chave mudou (nova versão dos dados) ou se
+    passou de `ttl` segundos, chama `carregar()` e substitui a entrada: só a
+    versão mais recente de cada (nome, tenant) fica em memória. Chamadas
+    simultâneas para a mesma chave esperam a carga já em andamento.
+
+    Com max_defasagem (stale-while-revalidate), uma entrada da mesma chave
+    vencida há menos de max_defasagem segundos é devolvida na hora e recarregada
+    em segundo plano; a nova versão substitui a antiga quando fica pronta.
+    Mudança de chave (escrita, virada do dia) sempre recarrega antes de devolver.
+    """
+    k = (nome, tenant_id, chave)
+    agora = time.monotonic()
+    with _lock:
+        entrada = _entradas.get((nome, tenant_id))
+        if entrada is not None and entrada.chave == chave:
+            idade = agora - entrada.criado_em
+            if ttl is None or idade < ttl:
+                _contadores["hits"] += 1
+                entrada.acessado_em = agora
+                return visao(entrada.df)
+            if max_defasagem is not None and idade < ttl + max_defasagem:
+                _contadores["defasados"] += 1
+                entrada.acessado_em = agora
+                if k not in _em_voo:
+                    _em_voo[k] = Future()
+                    _contadores["revalidacoes"] += 1
+                    threading.Thread(
+                        target=_revalidar, args=(k, carregar, preservando()), name=f"store-{nome}", daemon=True
+                    ).start()
+                return visao(entrada.df)
+
+        fut = _em_voo.get(k)
+        lider = fut is None
+        if lider:
+            fut = _em_voo[k] = Future()
+            _contadores["cargas"] += 1
+        else:
+            _contadores["esperas"] += 1
+
+    if not lider:
+        return visao(fut.result())
+    return visao(_carregar_e_publicar(k, carregar))
+
+
+def _carregar_e_publicar(k: tuple, carregar: Callable[[], pd.DataFrame], preservar: bool | None = None) -> pd.DataFrame:
+    """
+    Executa a carga do futuro em voo `k` e publica o resultado (ou a exceção).
+
+    Com `preservar` (padrão: preservando()), um resultado vazio não é
+    publicado: quem espera recebe o frame residente, se houver.
+
+    Se `carregar()` devolve uma visão do próprio residente (o loader viu que a
+    origem não mudou, ver residente()), só o TTL é renovado: a geração fica a
+    mesma e os resultados derivados dela continuam valendo.
+    """
+    nome, tenant_id, chave = k
+    if preservar is None:
+        preservar = preservando()
+    inicio = time.monotonic()
+    with _lock:
+        fut = _em_voo[k]
+    try:
+        df = carregar()
+        renovado = _renovar(k, df)
+        if renovado is None:
+            tamanho = _tamanho(df)
+            congelar(df)
+            df.attrs[_ATTR_GERACAO] = next(_geracoes)
+    except BaseException as e:
+        with _lock:
+            _em_voo.pop(k, None)
+            _contadores["erros"] += 1
+        fut.set_exception(e)
+        raise
+
+    if renovado is not None:
+        fut.set_result(renovado)
+        return renovado
+
+    if preservar and df.empty:
+        with _lock:
+            atual = _entradas.get((nome, tenant_id))
+            _em_voo.pop(k, None)
+            _contadores["vazios_descartados"] += 1
+        if atual is not None:
+            df = atual.df
+        fut.set_result(df)
+        return df
+
+    with _lock:
+        atual = _entradas.get((nome, tenant_id))
+        # Não sobrescreve uma versão diferente publicada depois que esta carga começou.
+        if atual is None or atual.chave == chave or atual.criado_em < inicio:
+            _entradas[(nome, tenant_id)] = _Entrada(
+                df=df, chave=chave, criado_em=time.monotonic(), bytes=tamanho, gerado_em=datetime.now()
+            )
+        _em_voo.pop(k, None)
+        _aplicar_orcamento(protegida=(nome, tenant_id))
+    fut.set_result(df)
+    return df
+
+
+def _renovar(k: tuple, df: pd.DataFrame) -> pd.DataFrame | None:
+    """Se `df` é da mesma geração da entrada residente de `k`, renova o TTL dela e a devolve; senão None."""
+    nome, tenant_id, chave = k
+    g = geracao(df)
+    with _lock:
+        atual = _entradas.get((nome, tenant_id))
+        if g is None or atual is None or atual.chave != chave or geracao(atual.df) != g:
+            return None
+        atual.criado_em = atual.acessado_em = time.monotonic()
+        atual.gerado_em = datetime.now()
+        _em_voo.pop(k, None)
+        _contadores["renovacoes"] += 1
+    return atual.df
+
+
+def _revalidar(k: tuple, carregar: Callable[[], pd.DataFrame], preservar: bool) -> None:
+    try:
+        _carregar_e_publicar(k, carregar, preservar)
+    except Exception:
+        # Falha em segundo plano: a entrada antiga continua servindo até max_defasagem.
+        pass
+
+
+def residente(nome: str, tenant_id: str | None, chave: Hashable, ttl: float | None = None) -> pd.DataFrame | None:
+    """Visão da entrada residente se ela é da `chave` e está dentro do ttl; senão None (não carrega)."""
+    with _lock:
+        entrada = _entradas.get((nome, tenant_id))
+    if entrada is None or entrada.chave != chave:
+        return None
+    agora = time.monotonic()
+    if ttl is not None and agora - entrada.criado_em >= ttl:
+        return None
+    entrada.acessado_em = agora
+    return visao(entrada.df)
+
+
+def ultima(nome: str, tenant_id: str | None) -> tuple[pd.DataFrame, datetime] | None:
+    """(visão, hora da carga) da entrada residente de (nome, tenant), de qualquer chave e idade; None se não há."""
+    with _lock:
+        entrada = _entradas.get((nome, tenant_id))
+    if entrada is None:
+        return None
+    return visao(entrada.df), entrada.gerado_em
+
+
+def geracao(df: pd.DataFrame) -> int | None:
+    """
+    Número da carga que produziu `df` (as visões herdam o número); None para
+    frames que não vieram do armazém. Serve de chave para resultados
+    derivados de um dataset: muda a cada recarga, inclusive pelo TTL.
+    """
+    return df.attrs.get(_ATTR_GERACAO)
+
+
+def atualizado_em(nome: str, tenant_id: str | None) -> datetime | None:
+    """Hora (relógio local) em que a versão residente de (nome, tenant) foi carregada."""
+    with _lock:
+        entrada = _entradas.get((nome, tenant_id))
+    return entrada.gerado_em if entrada is not None else None
+
+
+def estatisticas() -> dict:
+    """Contadores do armazém: hits, defasados/revalidações (SWR), renovações, esperas (coalescidas), cargas, erros e em voo."""
+    with _lock:
+        return {**_contadores, "em_voo": len(_em_voo)}
+
+
+def descartar(nome: str | None = None, tenant_id: str | None = None) -> None:
+    """Remove entradas residentes e derivados (filtrando por nome e/ou tenant; sem filtro, todos)."""
+    with _lock:
+        for tabela in (_entradas, _derivados):
+            for k in list(tabela):
+                if (nome is None or k[0] == nome) and (tenant_id is None or k[1] == tenant_id):
+                    del tabela[k]
+
+
+def entradas_residentes() -> list[dict]:
+    """Resumo do que está em memória: datasets e derivados (nome, tenant, linhas, bytes, idade, último uso)."""
+    agora = time.monotonic()
+    with _lock:
+        datasets = list(_entradas.items())
+        derivados = list(_derivados.items())
+    return [
+        {
+            "tipo": "dataset",
+            "dataset": nome,
+            "tenant_id": tenant_id,
+            "linhas": len(e.df),
+            "bytes": e.bytes,
+            "idade_s": round(agora - e.criado_em, 1),
+            "ocioso_s": round(agora - e.acessado_em, 1),
+        }
+        for (nome, tenant_id), e in datasets
+    ] + [
+        {
+            "tipo": "derivado",
+            "dataset": nome,
+            "tenant_id": tenant_id,
+            "linhas": len(d.valor) if isinstance(d.valor, (pd.DataFrame, pd.Series)) else None,
+            "bytes": d.bytes,
+            "idade_s": round(agora - d.criado_em, 1),
+            "ocioso_s": round(agora - d.acessado_em, 1),
+        }
+        for (nome, tenant_id, _), d in derivados
+    ]
+
+
+def uso_memoria() -> dict:
+    """Bytes residentes (datasets + derivados) frente ao orçamento, e quantas entradas já foram despejadas."""
+    with _lock:
+        datasets = sum(e.bytes for e in _entradas.values())
+        derivados = sum(d.bytes for d in _derivados.values())
+        despejos = _contadores["despejos"]
+    return {
+        "bytes": datasets + derivados,
+        "datasets_bytes": datasets,
+        "derivados_bytes": derivados,
+        "orcamento_bytes": _orcamento_bytes(),
+        "despejos": despejos,
+    }
+
+
+# ============================================
+# ORÇAMENTO DE MEMÓRIA (LRU)
+# ============================================
+
+def _orcamento_bytes() -> int:
+    return max(0, CACHE_ORCAMENTO_MB) * 1024 * 1024
+
+
+def _aplicar_orcamento(protegida: tuple | None = None) -> None:
+    """Despeja as entradas menos usadas até caber no orçamento (chamar com _lock). `protegida` nunca sai."""
+    orcamento = _orcamento_bytes()
+    total = sum(e.bytes for e in _entradas.values()) + sum(d.bytes for d in _derivados.values())
+    if total <= orcamento:
+        return
+    candidatas = sorted(
+        [(e.acessado_em, e.bytes, _entradas, k) for k, e in _entradas.items() if k != protegida]
+        + [(d.acessado_em, d.bytes, _derivados, k) for k, d in _derivados.items() if k != protegida],
+        key=lambda c: c[0],
+    )
+    for _, tamanho, tabela, k in candidatas:
+        if total <= orcamento:
+            break
+        del tabela[k]
+        total -= tamanho
+        _contadores["despejos"] += 1
+
+
+# ============================================
+# RESULTADOS DERIVADOS (memo)
+# ============================================
+
+def _tamanho_valor(valor: Any) -> int:
+    """Tamanho aproximado (bytes) de um resultado derivado."""
+    if isinstance(valor, pd.DataFrame):
+        return _tamanho(valor)
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(index=True, deep=True))
+    if isinstance(valor, (list, tuple, set)):
+        if len(valor) > _AMOSTRA_TAMANHO:
+            # Listas longas (ex.: alertas de um tenant grande): estima por amostra
+            amostra = random.sample(list(valor), _AMOSTRA_TAMANHO)
+            media = sum(_tamanho_valor(v) for v in amostra) / _AMOSTRA_TAMANHO
+            return sys.getsizeof(valor) + int(media * len(valor))
+        return sys.getsizeof(valor) + sum(_tamanho_valor(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(_tamanho_valor(k) + _tamanho_valor(v) for k, v in valor.items())
+    return sys.getsizeof(valor)
+
+
+def _impressao(valor: Any) -> Hashable:
+    """Chave de cache de um argumento: DataFrame/Series pelo conteúdo (como o st.cache_data), o resto pelo valor."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        try:
+            h = hashlib.blake2b(pd.util.hash_pandas_object(valor, index=True).values.tobytes(), digest_size=16)
+        except TypeError:
+            return ("id", id(valor))  # células não hasheáveis (listas, dicts): só reaproveita o mesmo objeto
+        colunas = tuple(map(str, valor.columns)) if isinstance(valor, pd.DataFrame) else (str(valor.name),)
+        return (type(valor).__name__, valor.shape, colunas, h.hexdigest())
+    if isinstance(valor, (list, tuple)):
+        return tuple(_impressao(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _impressao(v)) for k, v in valor.items()))
+    try:
+        hash(valor)
+        return valor
+    except TypeError:
+        return repr(valor)
+
+
+def memo(nome: str, tenant_id: str | None, chave: Hashable, calcular: Callable[[], Any], ttl: float | None = None) -> Any:
+    """
+    Resultado de `calcular()` guardado por (nome, tenant, chave), dentro do orçamento de memória.
+
+    Cálculos simultâneos da mesma chave são coalescidos como em obter(): só o
+    primeiro roda, os demais esperam o mesmo resultado (ou a mesma exceção).
+    DataFrames são congelados e devolvidos como visão rasa (como os datasets);
+    outros valores são devolvidos como estão: não os altere.
+    """
+    k = (nome, tenant_id, chave)
+    voo = ("memo",) + k  # no mesmo _em_voo dos datasets, sem colidir com eles
+    agora = time.monotonic()
+    with _lock:
+        d = _derivados.get(k)
+        if d is not None and (d.ttl is None or agora - d.criado_em < d.ttl):
+            d.acessado_em = agora
+            _contadores["memo_hits"] += 1
+            valor = d.valor
+            return visao(valor) if isinstance(valor, pd.DataFrame) else valor
+
+        fut = _em_voo.get(voo)
+        lider = fut is None
+        if lider:
+            fut = _em_voo[voo] = Future()
+        else:
+            _contadores["memo_esperas"] += 1
+
+    if lider:
+        try:
+            valor = calcular()
+            tamanho = _tamanho_valor(valor)
+            if isinstance(valor, pd.DataFrame):
+                congelar(valor)
+        except BaseException as e:
+            with _lock:
+                _em_voo.pop(voo, None)
+            fut.set_exception(e)
+            raise
+        with _lock:
+            agora = time.monotonic()
+            _derivados[k] = _Derivado(valor=valor, criado_em=agora, bytes=tamanho, ttl=ttl, acessado_em=agora)
+            _em_voo.pop(voo, None)
+            _contadores["memo_calculos"] += 1
+            _aplicar_orcamento(protegida=k)
+        fut.set_result(valor)
+    else:
+        valor = fut.result()
+    return visao(valor) if isinstance(valor, pd.DataFrame) else valor
+
+
+def _tenant_da_sessao() -> str | None:
+    """tenant_id da sessão Streamlit que está rodando (None fora de uma sessão)."""
+    try:
+        import streamlit as st
+
+        return st.session_state.get("tenant_id")
+    except Exception:
+        return None
+
+
+def memoizar(ttl: float | None = None):
+    """
+    Decorador no lugar do @st.cache_data(ttl=...): a chave são os argumentos
+    (DataFrames pelo conteúdo), exceto os que começam com "_" (mesma convenção
+    do Streamlit, para clientes e carimbos), e o resultado vai para memo().
+
+    O tenant da entrada é o argumento tenant_id, se a função tem um; senão, o
+    da sessão que chamou. Assim um resultado nunca é servido a outra empresa,
+    e a tela de cache e descartar(tenant_id=...) alcançam só os do tenant.
+    """
+    def decorador(fn):
+        assinatura = inspect.signature(fn)
+        nome = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def envolvida(*args, **kwargs):
+            ligados = assinatura.bind(*args, **kwargs)
+            ligados.apply_defaults()
+            chave = tuple(
+                (p, _impressao(v)) for p, v in ligados.arguments.items() if not p.startswith("_")
+            )
+            if "tenant_id" in ligados.arguments:
+                tenant_id = ligados.arguments["tenant_id"]
+            else:
+                tenant_id = _tenant_da_sessao()
+            return memo(nome, tenant_id, chave, lambda: fn(*args, **kwargs), ttl=ttl)
+
+        return envolvida
+
+    return decorador
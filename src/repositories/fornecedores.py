@@ -2,26 +2,76 @@
 import pandas as pd
 import streamlit as st
 
-@st.cache_data(ttl=300)
-def carregar_fornecedores(_supabase, tenant_id: str | None = None, incluir_inativos: bool = True) -> pd.DataFrame:
+from src.core import store
+from src.core.cache import registrar_loader, versao_dados
+from src.core.config import (
+    FORNECEDORES_FORMATO,
+    FORNECEDORES_MAX_DEFASAGEM_SEGUNDOS,
+    FORNECEDORES_TTL_SEGUNDOS,
+)
+from src.core.resiliencia import transitoria
+from src.repositories.leitura_csv import executar_df, validar_formato
+
+registrar_loader("carregar_fornecedores", "fornecedores")
+
+# Leitura em CSV (formato="csv"): colunas não textuais
+_TIPOS_CSV = {
+    'cod_fornecedor': 'Int64',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'ativo': 'boolean',
+}
+_DATAS_CSV = ('criado_em', 'atualizado_em')
+
+
+def carregar_fornecedores(
+    _supabase, tenant_id: str | None = None, incluir_inativos: bool = True, formato: str = FORNECEDORES_FORMATO
+) -> pd.DataFrame:
     """
     Carrega lista de fornecedores.
 
     Para alertas e histórico, é importante incluir inativos, pois pedidos antigos
     podem referenciar fornecedores desativados.
+
+    Fica residente no armazém do processo (src.core.store) por tenant e versão;
+    o retorno é uma visão somente leitura. formato="csv" lê a tabela em
+    text/csv (ver src.repositories.leitura_csv). Com o banco indisponível
+    (src.core.resiliencia), serve a última lista em memória.
     """
     try:
-        q = _supabase.table("fornecedores").select("*")
-        if tenant_id:
-            q = q.eq("tenant_id", tenant_id)
-        if not incluir_inativos:
-            q = q.eq("ativo", True)
-
-        resultado = q.execute()
-        if resultado.data:
-            return pd.DataFrame(resultado.data)
-
-        return pd.DataFrame()
+        return obter_fornecedores(_supabase, tenant_id, incluir_inativos, formato)
     except Exception as e:
+        reserva = store.ultima(_nome(incluir_inativos), tenant_id) if transitoria(e) else None
+        if reserva is not None:
+            return reserva[0]
         st.error(f"Erro ao carregar fornecedores: {e}")
         return pd.DataFrame()
+
+
+def obter_fornecedores(
+    _supabase, tenant_id: str | None = None, incluir_inativos: bool = True, formato: str = FORNECEDORES_FORMATO
+) -> pd.DataFrame:
+    """Como carregar_fornecedores, mas propaga a exceção (uso dentro de outros loaders)."""
+    validar_formato(formato)
+    return store.obter(
+        _nome(incluir_inativos),
+        tenant_id,
+        versao_dados(tenant_id, "fornecedores"),  # formato não entra: o conteúdo é o mesmo
+        lambda: _buscar_fornecedores(_supabase, tenant_id, incluir_inativos, formato),
+        ttl=FORNECEDORES_TTL_SEGUNDOS,
+        max_defasagem=FORNECEDORES_MAX_DEFASAGEM_SEGUNDOS or None,
+    )
+
+
+def _nome(incluir_inativos: bool) -> str:
+    return "fornecedores" if incluir_inativos else "fornecedores_ativos"
+
+
+def _buscar_fornecedores(_supabase, tenant_id: str | None, incluir_inativos: bool, formato: str = 'json') -> pd.DataFrame:
+    q = _supabase.table("fornecedores").select("*")
+    if tenant_id:
+        q = q.eq("tenant_id", tenant_id)
+    if not incluir_inativos:
+        q = q.eq("ativo", True)
+
+    return executar_df(q, formato, _TIPOS_CSV, _DATAS_CSV)
@@ -0,0 +1,87 @@
+"""
+Leitura em massa pelo PostgREST em CSV (Accept: text/csv).
+
+Em JSON cada linha chega como um dict com os nomes das colunas repetidos, é
+decodificada em objetos Python e só então vira DataFrame. Em CSV o cabeçalho
+vem uma vez e o pandas lê o texto direto em arrays tipados (parser em C),
+com a resposta comprimida (gzip/deflate) negociada com o servidor.
+
+O postgrest-py instalado não tem .csv(): a consulta é montada normalmente com
+o builder e a requisição sai pela mesma sessão dele, só trocando o Accept.
+"""
+from __future__ import annotations
+
+import io
+from collections import defaultdict
+
+import pandas as pd
+from postgrest.exceptions import APIError, generate_default_error_message
+
+from src.core.resiliencia import chamar, executar
+
+FORMATOS = ('json', 'csv')
+
+# Booleanos no CSV do PostgREST saem na representação texto do Postgres.
+_VERDADEIROS = ['t', 'true']
+_FALSOS = ['f', 'false']
+
+
+def validar_formato(formato: str) -> None:
+    if formato not in FORMATOS:
+        raise ValueError(f"formato inválido: {formato!r} (esperado: {', '.join(FORMATOS)})")
+
+
+def executar_df(q, formato: str = 'json', tipos: dict | None = None, datas=()) -> pd.DataFrame:
+    """Executa a consulta `q` (builder do postgrest) e devolve um DataFrame."""
+    if formato == 'csv':
+        return executar_csv(q, tipos, datas)
+    dados = executar(q).data or []
+    return pd.DataFrame(dados) if dados else pd.DataFrame()
+
+
+def executar_csv(q, tipos: dict | None = None, datas=()) -> pd.DataFrame:
+    """Executa `q` pedindo text/csv e lê a resposta com ler_csv."""
+    headers = dict(q.headers)
+    headers['Accept'] = 'text/csv'
+    headers['Accept-Encoding'] = 'gzip, deflate'
+
+    def requisitar() -> bytes:
+        r = q.session.request(q.http_method, q.path, params=q.params, headers=headers)
+        if not 200 <= r.status_code <= 299:
+            try:
+                raise APIError(r.json())
+            except ValueError:
+                raise APIError(generate_default_error_message(r))
+        return r.content
+
+    return ler_csv(chamar(requisitar, rota=f"{q.http_method} {q.path} csv"), tipos, datas)
+
+
+def ler_csv(conteudo: bytes, tipos: dict | None = None, datas=()) -> pd.DataFrame:
+    """
+    CSV do PostgREST -> DataFrame tipado.
+
+    Colunas em `tipos` são lidas com o dtype informado (float64, Int64,
+    boolean...); as de `datas` já saem como datetime64; as demais ficam como
+    texto (nunca inferidas como número: nr_oc "000123" continua "000123").
+    Campo vazio vira nulo.
+    """
+    if not conteudo or not conteudo.strip():
+        return pd.DataFrame()
+    cabecalho = conteudo.split(b'\n', 1)[0].decode('utf-8').strip().split(',')
+    tipos = {c: t for c, t in (tipos or {}).items() if c in cabecalho}
+    df = pd.read_csv(
+        io.BytesIO(conteudo),
+        dtype=defaultdict(lambda: str, tipos),
+        true_values=_VERDADEIROS,
+        false_values=_FALSOS,
+        escapechar='\\',  # registros do Postgres: "" para aspas, \\ para barra
+        keep_default_na=False,
+        na_values=[''],
+    )
+    # Datas convertidas depois da leitura: o parse_dates do read_csv é bem
+    # mais lento que um to_datetime vetorizado por coluna.
+    for col in datas:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce')
+    return df
@@ -1,157 +1,1107 @@
 """Repositório de dados: pedidos e entregas (Supabase)."""
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import hashlib
+import html
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 
+import numpy as np
 import pandas as pd
 import streamlit as st
+from postgrest.exceptions import APIError
 
-@st.cache_data(ttl=60)
-def carregar_pedidos(_supabase, tenant_id: str | None = None):
+from src.core import disco, store
+from src.core.cache import invalidar, registrar_loader, versao_dados
+from src.core.config import (
+    PEDIDOS_FONTE,
+    PEDIDOS_FORMATO,
+    PEDIDOS_MAX_DEFASAGEM_SEGUNDOS,
+    PEDIDOS_MAX_WORKERS,
+    PEDIDOS_SNAPSHOT_DIR,
+    PEDIDOS_SYNC_COMPLETO_SEGUNDOS,
+    PEDIDOS_TAMANHO_PAGINA,
+    PEDIDOS_TEXTOS_LOTE,
+    PEDIDOS_TEXTOS_LRU,
+    PEDIDOS_TTL_SEGUNDOS,
+)
+from src.core.resiliencia import executar, resultado_incerto, transitoria
+from src.repositories.fornecedores import carregar_fornecedores as _carregar_fornecedores_tenant
+from src.repositories.fornecedores import obter_fornecedores
+from src.repositories.leitura_csv import executar_df, validar_formato
+
+# ============================================
+# LEITURA PAGINADA (keyset por id)
+# ============================================
+
+_UUID_MIN = "00000000-0000-0000-0000-000000000000"
+
+# Erros do Postgres quando o id não é UUID e a faixa "id >= <uuid>" não se
+# aplica: 22P02 (texto inválido para o tipo) e 42883 (operador inexistente)
+_CODIGOS_ID_NAO_UUID = {"22P02", "42883"}
+
+_VIEW = 'vw_pedidos_completo'
+
+# Leitura em CSV (formato="csv"): tipos das colunas não textuais. As datas já
+# saem como datetime64; atualizado_em fica em texto porque é o watermark do delta.
+_TIPOS_CSV = {
+    'qtde_solicitada': 'float64',
+    'qtde_entregue': 'float64',
+    'qtde_pendente': 'float64',
+    'valor_total': 'float64',
+    'valor_ultima_compra': 'float64',
+    'cod_fornecedor': 'float64',  # nulo no LEFT JOIN, como o JSON
+    'fornecedor_latitude': 'float64',
+    'fornecedor_longitude': 'float64',
+    'entregue': 'boolean',
+    'atrasado': 'boolean',
+}
+_DATAS_CSV = ('data_solicitacao', 'data_oc', 'previsao_entrega', 'data_entrega_real', 'criado_em')
+
+
+def _consulta_pedidos(
+    _supabase, tenant_id: str | None, colunas: str = '*', count: str | None = None, tabela: str = _VIEW
+):
+    q = _supabase.table(tabela).select(colunas, count=count)
+    if tenant_id:
+        q = q.eq('tenant_id', tenant_id)
+    return q
+
+
+def _contar_pedidos(
+    _supabase, tenant_id: str | None, tabela: str = _VIEW, antes_de: str | None = None
+) -> int | None:
+    """Total de linhas visíveis na view (count=exact), sem trazer os dados; com antes_de, só as de atualizado_em < antes_de."""
+    q = _consulta_pedidos(_supabase, tenant_id, 'id', count='exact', tabela=tabela)
+    if antes_de is not None:
+        q = q.lt('atualizado_em', antes_de)
+    resultado = executar(q.limit(1))
+    return resultado.count if resultado.count is not None else None
+
+
+def _limites_particoes(n: int) -> list[tuple[str, str | None]]:
+    """Divide o espaço de UUIDs em n faixas [inicio, fim) pelo prefixo hexadecimal."""
+    n = max(1, int(n))
+    passo = 16 ** 8 // n
+    inicios = [f"{i * passo:08x}-0000-0000-0000-000000000000" for i in range(n)]
+    inicios[0] = _UUID_MIN
+    return [(inicio, inicios[i + 1] if i + 1 < n else None) for i, inicio in enumerate(inicios)]
+
+
+def _id_nao_uuid(e: BaseException) -> bool:
+    """O banco recusou o filtro de faixa por id (ids fora do formato UUID)."""
+    return isinstance(e, APIError) and str(e.code or "") in _CODIGOS_ID_NAO_UUID
+
+
+def _buscar_faixa(
+    _supabase,
+    tenant_id: str | None,
+    inicio: str | None,
+    fim: str | None,
+    tamanho_pagina: int,
+    desde: str | None = None,
+    colunas: str = '*',
+    tabela: str = _VIEW,
+    formato: str = 'json',
+) -> pd.DataFrame:
+    """Percorre uma faixa de ids em páginas fixas (keyset: id > último id lido)."""
+    paginas = []
+    ultimo_id = None
+    while True:
+        q = _consulta_pedidos(_supabase, tenant_id, colunas, tabela=tabela)
+        if desde is not None:
+            q = q.gte('atualizado_em', desde)
+        if ultimo_id is not None:
+            q = q.gt('id', ultimo_id)
+        elif inicio is not None:
+            q = q.gte('id', inicio)
+        if fim is not None:
+            q = q.lt('id', fim)
+        pagina = executar_df(q.order('id').limit(tamanho_pagina), formato, _TIPOS_CSV, _DATAS_CSV)
+        # Só para na página vazia: se o servidor cortar a página (max-rows menor
+        # que tamanho_pagina) o keyset continua a partir do último id recebido.
+        if pagina.empty:
+            break
+        paginas.append(pagina)
+        ultimo_id = pagina['id'].iloc[-1]
+    if not paginas:
+        return pd.DataFrame()
+    return pd.concat(paginas, ignore_index=True)
+
+
+class CargaIncompleta(RuntimeError):
+    """A leitura paginada trouxe menos linhas que o count=exact, mesmo repetida."""
+
+
+def _buscar_pedidos_paginado(
+    _supabase,
+    tenant_id: str | None,
+    tamanho_pagina: int = PEDIDOS_TAMANHO_PAGINA,
+    max_workers: int = PEDIDOS_MAX_WORKERS,
+    colunas: str = '*',
+    tabela: str = _VIEW,
+    formato: str = 'json',
+) -> pd.DataFrame:
+    """
+    Busca a view completa em páginas de tamanho fixo, com faixas de id em paralelo.
+
+    Cada faixa do espaço de UUIDs é percorrida por keyset (ordem estável por id)
+    em uma thread do pool. Ao final o total é conferido com count=exact, para que
+    um corte do PostgREST nunca passe despercebido.
+
+    O count roda junto com o percurso, então uma exclusão entre os dois deixa
+    a leitura curta sem erro nenhum: nesse caso o percurso é refeito uma vez.
+    Se continua curta, levanta CargaIncompleta (carregar_pedidos serve o
+    último frame residente, como numa falha transitória).
+    """
+    tamanho_pagina = max(1, int(tamanho_pagina))
+    max_workers = max(1, int(max_workers))
+
+    for _ in range(2):
+        df, total_esperado = _percorrer_faixas(
+            _supabase, tenant_id, tamanho_pagina, max_workers, colunas, tabela, formato
+        )
+        if total_esperado is None or len(df) >= total_esperado:
+            return df
+    raise CargaIncompleta(
+        f"Carga incompleta de pedidos: {len(df)} de {total_esperado} linhas recebidas "
+        f"(verifique o max-rows do PostgREST e o tamanho de página {tamanho_pagina})."
+    )
+
+
+def _percorrer_faixas(
+    _supabase, tenant_id, tamanho_pagina, max_workers, colunas, tabela, formato
+) -> tuple[pd.DataFrame, int | None]:
+    """Um percurso completo (faixas em paralelo) e o count=exact tirado junto: (df, total)."""
+    with ThreadPoolExecutor(max_workers=max_workers + 1) as pool:
+        fut_total = pool.submit(_contar_pedidos, _supabase, tenant_id, tabela)
+        try:
+            futs = [
+                pool.submit(
+                    _buscar_faixa, _supabase, tenant_id, inicio, fim, tamanho_pagina, None, colunas, tabela, formato
+                )
+                for inicio, fim in _limites_particoes(max_workers)
+            ]
+            partes = [f.result() for f in futs]
+        except APIError as e:
+            # Só ids fora do formato UUID caem para um único percurso
+            # sequencial; timeouts, rede e disjuntor sobem (src.core.resiliencia
+            # já repetiu o que podia) em vez de dobrar a carga no banco.
+            if not _id_nao_uuid(e):
+                raise
+            partes = [
+                _buscar_faixa(
+                    _supabase, tenant_id, None, None, tamanho_pagina, colunas=colunas, tabela=tabela, formato=formato
+                )
+            ]
+        total_esperado = fut_total.result()
+
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(), total_esperado
+    df = pd.concat(partes, ignore_index=True)
+    return df.drop_duplicates(subset='id', keep='last').reset_index(drop=True), total_esperado
+
+
+def _limpar_html(texto):
+    """Remove HTML de um texto"""
+    if pd.isna(texto) or texto is None:
+        return texto
+
+    texto_str = str(texto)
+    # Decodificar entidades HTML
+    texto_str = html.unescape(texto_str)
+    # Remover tags HTML
+    texto_str = re.sub(r'<[^>]+>', '', texto_str)
+    # Limpar espaços extras
+    texto_str = re.sub(r'\s+', ' ', texto_str).strip()
+
+    return texto_str if texto_str else None
+
+
+# Valores aceitos para booleanos vindos como texto (comparados em minúsculas)
+_BOOLEANOS = {
+    'true': True,
+    'false': False,
+    't': True,
+    'f': False,
+    '1': True,
+    '0': False,
+    'yes': True,
+    'no': False,
+    'sim': True,
+    'não': False,
+    'nao': False,
+}
+
+_COLUNAS_DATA = ['data_solicitacao', 'data_oc', 'previsao_entrega', 'data_entrega_real', 'criado_em', 'atualizado_em']
+_COLUNAS_BOOL = ['entregue', 'atrasado']
+_COLUNAS_NUMERICAS = ['qtde_solicitada', 'qtde_entregue', 'valor_total', 'valor_ultima_compra']
+_COLUNAS_TEXTO = ['descricao', 'nr_oc', 'nr_solicitacao', 'departamento',
+                  'cod_equipamento', 'cod_material', 'fornecedor_nome',
+                  'fornecedor_cidade', 'status', 'observacoes']
+
+
+_TAG_HTML = re.compile(r'<[^>]+>')
+
+
+def _limpar_html_coluna(serie: pd.Series) -> pd.Series:
+    """
+    _limpar_html aplicado a uma coluna inteira, com o mesmo resultado.
+
+    A limpeza roda uma vez por valor distinto (status, departamento e
+    fornecedor se repetem em milhares de linhas); html.unescape e a remoção
+    de tags só rodam nos valores que contêm '<' ou '&'. Nulos passam intactos.
+    """
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos) == 0:
+        return serie
+    textos = [str(t) for t in unicos]
+    if any('<' in t or '&' in t for t in textos):
+        textos = [_TAG_HTML.sub('', html.unescape(t)) if '<' in t or '&' in t else t for t in textos]
+    # ' '.join(t.split()) == re.sub(r'\s+', ' ', t).strip(), sem regex
+    limpos = np.array([' '.join(t.split()) or None for t in textos], dtype=object)
+    valores = np.where(codigos >= 0, limpos.take(codigos), serie.to_numpy(dtype=object))
+    return pd.Series(valores, index=serie.index, name=serie.name, dtype=object)
+
+
+def _bool_coluna(serie: pd.Series) -> pd.Series:
+    """Texto/objeto -> bool pelos valores de _BOOLEANOS (desconhecidos e nulos viram False)."""
+    codigos, unicos = pd.factorize(serie)
+    mapa = pd.Series(unicos, dtype=object).astype(str).str.lower().map(_BOOLEANOS)
+    valores = mapa.fillna(False).to_numpy(dtype=bool)
+    resultado = np.zeros(len(serie), dtype=bool)
+    presentes = codigos >= 0
+    resultado[presentes] = valores[codigos[presentes]]
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+def _normalizar_pedidos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tipos (datas, booleanos, números) e limpeza de HTML das linhas vindas da view.
+
+    Tudo por coluna: texto e booleanos são resolvidos por valor distinto
+    (_limpar_html_coluna, _bool_coluna) e as datas tentam os formatos
+    alternativos só quando há algum valor e nenhum foi reconhecido.
+    """
+    for col in _COLUNAS_DATA:
+        if col not in df.columns:
+            continue
+        if df[col].dtype != 'object':
+            # Já é datetime ou timestamp
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+            continue
+        tem_valor = df[col].notna().any()
+        bruto = df[col]
+        # Método 1: conversão padrão; 2: ISO; 3: formato brasileiro
+        df[col] = pd.to_datetime(bruto, errors='coerce')
+        if tem_valor and df[col].isna().all():
+            df[col] = pd.to_datetime(bruto, format='ISO8601', errors='coerce')
+        if tem_valor and df[col].isna().all():
+            df[col] = pd.to_datetime(bruto, format='%d/%m/%Y', errors='coerce')
+
+    for col in _COLUNAS_BOOL:
+        if col in df.columns:
+            if df[col].dtype == 'object':
+                df[col] = _bool_coluna(df[col])
+            else:
+                df[col] = df[col].fillna(False).astype(bool)
+
+    for col in _COLUNAS_NUMERICAS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    # LIMPEZA DE HTML dos campos de texto
+    for col in _COLUNAS_TEXTO:
+        if col in df.columns:
+            df[col] = _limpar_html_coluna(df[col])
+
+    return df
+
+
+def _finalizar_pedidos(df: pd.DataFrame) -> pd.DataFrame:
+    """Etapas que dependem do frame inteiro ou da data de hoje (rodam a cada entrega)."""
+    # SOLUÇÃO TEMPORÁRIA: Calcular previsão se estiver tudo NULL
+    if 'previsao_entrega' in df.columns and df['previsao_entrega'].isna().all():
+        import calcular_previsao_temporario as cpt
+        df = cpt.calcular_previsao_entrega_temporario(df)
+
+    return enriquecer_followup(df)
+
+
+# ============================================
+# FOLLOW-UP (vencimento, pendência e atraso)
+# ============================================
+
+# Colunas derivadas presentes em todo frame servido por carregar_pedidos
+COLUNAS_FOLLOWUP = ('_due', '_pendente', '_atrasado')
+
+_VERDADEIROS = ['true', '1', 'yes', 'sim']
+
+
+def enriquecer_followup(df: pd.DataFrame, hoje: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    Acrescenta as colunas de follow-up pela regra única do sistema:
+
+      _due       previsao_entrega > prazo_entrega > data_oc + 30 dias
+      _pendente  não entregue, ou com qtde_pendente > 0
+      _atrasado  pendente com _due antes de hoje
+
+    Roda em _finalizar_pedidos, então sai uma vez por versão dos dados (e por
+    dia) e fica no armazém junto com o frame; alertas, ficha de material e
+    consulta só leem as colunas. 'atrasado' (a coluna da view) passa a ser o
+    mesmo _atrasado, recalculado aqui mesmo se o banco estiver desatualizado.
+
+    Devolve uma cópia rasa de `df` (as colunas são acrescentadas/substituídas).
+    """
+    if hoje is None:
+        hoje = pd.Timestamp.now().normalize()
+    out = df.copy(deep=False)
+
+    def _data(col: str) -> pd.Series:
+        if col not in out.columns:
+            return pd.Series(pd.NaT, index=out.index, dtype='datetime64[ns]')
+        return pd.to_datetime(out[col], errors='coerce', dayfirst=True)
+
+    due = _data('previsao_entrega').combine_first(_data('prazo_entrega'))
+    out['_due'] = due.combine_first(_data('data_oc') + pd.to_timedelta(30, unit='D'))
+
+    if 'entregue' not in out.columns:
+        entregue = pd.Series(False, index=out.index)
+    elif out['entregue'].dtype == bool:
+        entregue = out['entregue']
+    else:
+        entregue = out['entregue'].astype(str).str.lower().isin(_VERDADEIROS)
+    pendente = ~entregue
+    if 'qtde_pendente' in out.columns:
+        pendente = pendente | (pd.to_numeric(out['qtde_pendente'], errors='coerce').fillna(0) > 0)
+    out['_pendente'] = pendente.to_numpy(dtype=bool)
+
+    out['_atrasado'] = out['_pendente'] & out['_due'].notna() & (out['_due'] < hoje)
+    out['atrasado'] = out['_atrasado']
+    return out
+
+
+# ============================================
+# ESQUEMA EM MEMÓRIA (dtypes compactos do frame servido às páginas)
+# ============================================
+
+# Tipo de cada coluna no frame final (aplicado em _compactar, depois da junção
+# e do _finalizar_pedidos; o snapshot incremental continua em object):
+#   "categoria": poucos valores distintos -> Categorical (códigos + dicionário).
+#                A categoria "" sempre existe, para .fillna("") seguir valendo;
+#                == e isin funcionam como em object.
+#   "texto":     texto livre -> string Arrow (com NaN e bool numpy nas
+#                comparações); ausente vira "", como o `or ""` das telas.
+#   "inteiro":   quantidades -> int32 quando todas são inteiras e presentes
+#                (senão ficam em float64). Valores em R$ não são reduzidos.
+#   "float32":   coordenadas do fornecedor.
+ESQUEMA_PEDIDOS = {
+    'status': 'categoria',
+    'departamento': 'categoria',
+    'cod_equipamento': 'categoria',
+    'fornecedor_nome': 'categoria',
+    'fornecedor_cidade': 'categoria',
+    'fornecedor_uf': 'categoria',
+    'descricao': 'texto',
+    'observacoes': 'texto',
+    'qtde_solicitada': 'inteiro',
+    'qtde_entregue': 'inteiro',
+    'qtde_pendente': 'inteiro',
+    'fornecedor_latitude': 'float32',
+    'fornecedor_longitude': 'float32',
+}
+
+_TEXTO_ARROW = pd.StringDtype('pyarrow_numpy')
+_INT32 = np.iinfo(np.int32)
+
+
+def _categoria(serie: pd.Series) -> pd.Series:
+    cat = serie.astype('category')
+    if '' not in cat.cat.categories:
+        # "" é o menor texto: no início, as categorias continuam em ordem
+        cat = cat.cat.set_categories(pd.Index(['']).append(cat.cat.categories))
+    return cat
+
+
+def _inteiro(serie: pd.Series) -> pd.Series:
+    valores = pd.to_numeric(serie, errors='coerce')
+    if (
+        valores.notna().all()
+        and (valores % 1 == 0).all()
+        and (valores.empty or (valores.min() >= _INT32.min and valores.max() <= _INT32.max))
+    ):
+        return valores.astype('int32')
+    return valores
+
+
+def _compactar(df: pd.DataFrame) -> pd.DataFrame:
+    """Aplica ESQUEMA_PEDIDOS às colunas presentes (substitui colunas, não escreve nelas)."""
+    for col, tipo in ESQUEMA_PEDIDOS.items():
+        if col not in df.columns:
+            continue
+        if tipo == 'categoria':
+            df[col] = _categoria(df[col])
+        elif tipo == 'texto':
+            df[col] = df[col].astype(object).where(df[col].notna(), '').astype(_TEXTO_ARROW)
+        elif tipo == 'inteiro':
+            df[col] = _inteiro(df[col])
+        elif tipo == 'float32':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    return df
+
+
+# ============================================
+# SINCRONIZAÇÃO INCREMENTAL (watermark em atualizado_em)
+# ============================================
+
+_revisoes = itertools.count(1)
+
+
+@dataclass
+class _SnapshotPedidos:
+    df: pd.DataFrame          # já normalizado (antes de _finalizar_pedidos)
+    watermark: str | None     # maior atualizado_em visto (texto cru do PostgREST)
+    completo_em: float        # time.monotonic() da última carga completa
+    revisao: int = field(default_factory=lambda: next(_revisoes))  # nova a cada df novo (ver _reaproveitar)
+
+
+_snapshots: dict[tuple[str, str, str], _SnapshotPedidos] = {}  # (tenant_id, tabela, colunas)
+_snapshots_lock = threading.Lock()
+
+
+def _watermark(df_bruto: pd.DataFrame) -> str | None:
+    if df_bruto.empty or 'atualizado_em' not in df_bruto.columns:
+        return None
+    # CSV traz "2024-01-01 10:00:00", JSON "2024-01-01T10:00:00": compara na forma ISO
+    valores = df_bruto['atualizado_em'].dropna().astype(str).str.replace(' ', 'T', n=1)
+    return valores.max() if not valores.empty else None
+
+
+def _carga_completa(
+    _supabase, tenant_id, tamanho_pagina, max_workers, colunas='*', tabela=_VIEW, formato='json'
+) -> _SnapshotPedidos:
+    df_bruto = _buscar_pedidos_paginado(_supabase, tenant_id, tamanho_pagina, max_workers, colunas, tabela, formato)
+    watermark = _watermark(df_bruto)  # antes de normalizar: texto cru do servidor
+    return _SnapshotPedidos(
+        df=_normalizar_pedidos(df_bruto) if not df_bruto.empty else df_bruto,
+        watermark=watermark,
+        completo_em=time.monotonic(),
+    )
+
+
+def _sincronizar_delta(
+    _supabase,
+    tenant_id: str,
+    snap: _SnapshotPedidos,
+    tamanho_pagina: int,
+    colunas: str = '*',
+    tabela: str = _VIEW,
+    formato: str = 'json',
+) -> _SnapshotPedidos | None:
+    """
+    Busca só as linhas com atualizado_em >= watermark e as mescla no snapshot por id.
+
+    O filtro inclui o próprio watermark, então o delta sempre traz ao menos as
+    linhas desse instante: se todos os seus (id, atualizado_em) já estão no
+    snapshot e nada foi excluído, o próprio `snap` é devolvido, sem mesclar.
+
+    Exclusões: toda linha com atualizado_em >= watermark volta no delta, então
+    as do snapshot nessa faixa que não voltaram foram excluídas e saem aqui.
+    As anteriores ao watermark são conferidas pela contagem dessa faixa no
+    servidor (count com atualizado_em < watermark), o que pega uma exclusão
+    mesmo quando uma inclusão no mesmo intervalo mantém o total igual.
+    Só uma linha gravada com atualizado_em retroativo (abaixo do watermark)
+    escapa das duas conferências; a carga completa a cada
+    PEDIDOS_SYNC_COMPLETO_SEGUNDOS limita essa defasagem.
+
+    Retorna None quando o delta não basta (as contagens não fecham): o
+    chamador refaz a carga completa.
+    """
+    marca = _marca_watermark(snap.watermark)
+    if marca is None or 'atualizado_em' not in snap.df.columns:
+        return None
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        fut_total = pool.submit(_contar_pedidos, _supabase, tenant_id, tabela)
+        fut_anteriores = pool.submit(_contar_pedidos, _supabase, tenant_id, tabela, snap.watermark)
+        delta_bruto = _buscar_faixa(
+            _supabase, tenant_id, None, None, tamanho_pagina,
+            desde=snap.watermark, colunas=colunas, tabela=tabela, formato=formato,
+        )
+        total = fut_total.result()
+        anteriores = fut_anteriores.result()
+
+    df = snap.df
+    watermark = max(filter(None, [snap.watermark, _watermark(delta_bruto)]), default=None)
+    delta = _normalizar_pedidos(delta_bruto) if not delta_bruto.empty else delta_bruto
+    try:
+        recentes = (df['atualizado_em'] >= marca).to_numpy(dtype=bool)
+        antigas = (df['atualizado_em'] < marca).to_numpy(dtype=bool)  # sem as de atualizado_em nulo
+    except TypeError:
+        return None  # fuso do watermark diferente do da coluna: refaz completo
+    presentes = df['id'].isin(set(delta['id'])).to_numpy(dtype=bool) if not delta.empty else np.zeros(len(df), bool)
+    excluidas = recentes & ~presentes
+    novas = not delta.empty and not _pares(delta) <= _pares(df[presentes])
+    if novas or excluidas.any():
+        manter = df[~(presentes | excluidas)]
+        df = pd.concat([manter, delta], ignore_index=True) if not delta.empty else manter.reset_index(drop=True)
+
+    if total is not None and len(df) != total:
+        return None
+    if anteriores is not None and int((antigas & ~presentes).sum()) != anteriores:
+        return None
+
+    if df is snap.df:
+        return snap
+    return _SnapshotPedidos(df=df, watermark=watermark, completo_em=snap.completo_em)
+
+
+def _marca_watermark(watermark: str | None) -> pd.Timestamp | None:
+    """O watermark (texto do PostgREST) como Timestamp, para comparar com a coluna normalizada."""
+    if not watermark:
+        return None
+    try:
+        return pd.Timestamp(watermark)
+    except ValueError:
+        return None
+
+
+def _pares(df: pd.DataFrame) -> set[tuple[str, str]]:
+    """(id, atualizado_em) de cada linha, em texto (os dois lados já normalizados)."""
+    return set(zip(df['id'].astype(str), df['atualizado_em'].astype(str)))
+
+
+def _carregar_snapshot(
+    _supabase, tenant_id, tamanho_pagina, max_workers, incremental, colunas='*', tabela=_VIEW, formato='json'
+) -> _SnapshotPedidos:
+    snap = anterior = None
+    if incremental and tenant_id:
+        with _snapshots_lock:
+            snap = _snapshots.get((tenant_id, tabela, colunas))
+        if snap is None:
+            # Processo recém-iniciado: parte do snapshot em disco, se houver
+            snap = _ler_snapshot_disco(tenant_id, tabela, colunas)
+        anterior = snap
+        if snap is not None and snap.watermark and time.monotonic() - snap.completo_em < PEDIDOS_SYNC_COMPLETO_SEGUNDOS:
+            snap = _sincronizar_delta(_supabase, tenant_id, snap, tamanho_pagina, colunas, tabela, formato)
+        else:
+            snap = None
+
+    if snap is None:
+        snap = _carga_completa(_supabase, tenant_id, tamanho_pagina, max_workers, colunas, tabela, formato)
+
+    if incremental and tenant_id and not (snap.df.empty and store.preservando()):
+        with _snapshots_lock:
+            _snapshots[(tenant_id, tabela, colunas)] = snap
+        if snap is not anterior:  # delta sem novidade: o arquivo em disco já é este
+            threading.Thread(
+                target=_gravar_snapshot_disco, args=(tenant_id, tabela, colunas, snap),
+                name="snapshot-disco", daemon=True,
+            ).start()
+    return snap
+
+
+def descartar_snapshot_pedidos(tenant_id: str | None = None) -> None:
+    """Força a próxima carga a ser completa (um tenant ou todos), inclusive após reinício."""
+    with _snapshots_lock:
+        for chave in list(_snapshots):
+            if tenant_id is None or chave[0] == tenant_id:
+                del _snapshots[chave]
+    _remover_snapshots_disco(tenant_id)
+
+
+# --------------------------------------------
+# Snapshot em disco (reinício a quente)
+# --------------------------------------------
+
+# Incrementar quando o frame do snapshot mudar de forma (normalização, tipos):
+# arquivos gravados por outra versão são descartados na leitura.
+_VERSAO_SNAPSHOT_DISCO = 1
+
+
+def _prefixo_snapshot(tenant_id: str) -> str:
+    return "pedidos-" + re.sub(r'[^A-Za-z0-9_-]', '_', str(tenant_id)) + "-"
+
+
+def _caminho_snapshot(tenant_id: str, tabela: str, colunas: str) -> str | None:
+    if not PEDIDOS_SNAPSHOT_DIR:
+        return None
+    assinatura = hashlib.sha1(f"{tabela}|{colunas}".encode()).hexdigest()[:12]
+    return os.path.join(PEDIDOS_SNAPSHOT_DIR, f"{_prefixo_snapshot(tenant_id)}{assinatura}.parquet")
+
+
+def _ler_snapshot_disco(tenant_id: str, tabela: str, colunas: str) -> _SnapshotPedidos | None:
+    caminho = _caminho_snapshot(tenant_id, tabela, colunas)
+    lido = disco.ler(caminho, _VERSAO_SNAPSHOT_DISCO) if caminho else None
+    if lido is None:
+        return None
+    df, meta = lido
+    if (meta.get('tenant_id'), meta.get('tabela'), meta.get('colunas')) != (tenant_id, tabela, colunas):
+        return None
+    # A última carga completa é guardada em hora de parede; aqui volta para
+    # time.monotonic(), para o PEDIDOS_SYNC_COMPLETO_SEGUNDOS valer entre reinícios.
+    idade = max(0.0, time.time() - float(meta.get('completo_em_epoch', 0)))
+    return _SnapshotPedidos(df=df, watermark=meta.get('watermark'), completo_em=time.monotonic() - idade)
+
+
+def _gravar_snapshot_disco(tenant_id: str, tabela: str, colunas: str, snap: _SnapshotPedidos) -> None:
+    caminho = _caminho_snapshot(tenant_id, tabela, colunas)
+    if caminho is None:
+        return
+    with _snapshots_lock:
+        if _snapshots.get((tenant_id, tabela, colunas)) is not snap:
+            return  # já substituído (ou descartado) por uma carga mais nova
+    meta = {
+        'tenant_id': tenant_id,
+        'tabela': tabela,
+        'colunas': colunas,
+        'watermark': snap.watermark,
+        'completo_em_epoch': time.time() - (time.monotonic() - snap.completo_em),
+    }
+    try:
+        disco.gravar(caminho, snap.df, _VERSAO_SNAPSHOT_DISCO, meta)
+    except OSError:
+        pass  # disco cheio / sem permissão: segue só com o snapshot em memória
+
+
+def _remover_snapshots_disco(tenant_id: str | None) -> None:
+    if not PEDIDOS_SNAPSHOT_DIR or not os.path.isdir(PEDIDOS_SNAPSHOT_DIR):
+        return
+    prefixo = _prefixo_snapshot(tenant_id) if tenant_id is not None else "pedidos-"
+    for nome in os.listdir(PEDIDOS_SNAPSHOT_DIR):
+        if nome.startswith(prefixo) and nome.endswith(".parquet"):
+            disco.remover(os.path.join(PEDIDOS_SNAPSHOT_DIR, nome))
+
+
+registrar_loader("carregar_pedidos", "pedidos", "fornecedores")
+registrar_loader("carregar_estatisticas_departamento", "pedidos")
+
+
+def _descartar_snapshot_se_fornecedores(tenant_id: str | None) -> None:
+    # Alterações de fornecedor não mudam pedidos.atualizado_em: o delta não as veria.
+    descartar_snapshot_pedidos(tenant_id)
+
+
+registrar_loader("snapshot_pedidos", "fornecedores", ao_invalidar=_descartar_snapshot_se_fornecedores)
+
+
+# ============================================
+# PROJEÇÕES (subconjuntos de colunas por página)
+# ============================================
+
+# Sempre buscadas: chave do merge/keyset, watermark do delta, o 'atrasado' e
+# as entradas do follow-up (ver enriquecer_followup).
+_COLUNAS_OBRIGATORIAS = (
+    'id', 'atualizado_em', 'entregue', 'previsao_entrega', 'atrasado',
+    'prazo_entrega', 'data_oc', 'qtde_pendente',
+)
+
+_projecoes: set[tuple[str, ...]] = set()
+_projecoes_lock = threading.Lock()
+
+
+def registrar_projecao(*colunas: str) -> tuple[str, ...]:
+    """
+    Declara um conjunto de colunas usado por uma página e devolve a forma
+    canônica (ordenada, com as colunas obrigatórias) para passar em
+    carregar_pedidos(colunas=...).
+
+    Todas as projeções declaradas são buscadas juntas numa única consulta
+    (o superconjunto), e cada uma é recortada dele sem copiar dados.
+    """
+    projecao = tuple(sorted(set(colunas) | set(_COLUNAS_OBRIGATORIAS)))
+    with _projecoes_lock:
+        _projecoes.add(projecao)
+    return projecao
+
+
+def projecoes_registradas() -> list[tuple[str, ...]]:
+    """Projeções declaradas até agora (uma por tela, ver registrar_projecao)."""
+    with _projecoes_lock:
+        return sorted(_projecoes)
+
+
+def _superconjunto(projecao: tuple[str, ...]) -> tuple[str, ...]:
+    # Só se juntam projeções com os mesmos textos pesados: uma tela que pede
+    # 'descricao' não pode fazer as projeções enxutas passarem a trazê-la.
+    pesadas = set(projecao) & set(COLUNAS_TEXTO_PESADO)
+    with _projecoes_lock:
+        _projecoes.add(projecao)
+        grupo = [p for p in _projecoes if set(p) & set(COLUNAS_TEXTO_PESADO) == pesadas]
+        return tuple(sorted(set().union(*grupo)))
+
+
+# Colunas de texto longo: ficam fora do frame enxuto e são buscadas só para as
+# linhas exibidas (hidratar_textos / com_textos).
+COLUNAS_TEXTO_PESADO = ('descricao', 'observacoes')
+
+# Frame enxuto: chaves, datas, números, status e identificação do fornecedor.
+COLUNAS_NUCLEO = registrar_projecao(
+    'tenant_id', 'nr_solicitacao', 'nr_oc', 'departamento', 'cod_equipamento', 'cod_material',
+    'qtde_solicitada', 'qtde_entregue', 'qtde_pendente',
+    'data_solicitacao', 'data_oc', 'prazo_entrega', 'data_entrega_real', 'criado_em',
+    'status', 'valor_ultima_compra', 'valor_total',
+    'fornecedor_id', 'cod_fornecedor', 'fornecedor_nome', 'fornecedor_cidade', 'fornecedor_uf',
+)
+
+
+def _projetar(df: pd.DataFrame, projecao: tuple[str, ...]) -> pd.DataFrame:
+    """Recorte de colunas (mais as de follow-up) que reaproveita os arrays de `df` (sem cópia)."""
+    return pd.DataFrame({c: df[c] for c in projecao + COLUNAS_FOLLOWUP if c in df.columns}, copy=False)
+
+
+def carregar_pedidos(
+    _supabase,
+    tenant_id: str | None = None,
+    tamanho_pagina: int = PEDIDOS_TAMANHO_PAGINA,
+    max_workers: int = PEDIDOS_MAX_WORKERS,
+    incremental: bool = True,
+    colunas: tuple[str, ...] | None = None,
+    fonte: str = PEDIDOS_FONTE,
+    formato: str = PEDIDOS_FORMATO,
+):
     """
     Carrega todos os pedidos com informações do fornecedor
     VERSÃO CORRIGIDA com diagnóstico automático de datas
+
+    A leitura é paginada (tamanho_pagina linhas por requisição, max_workers em
+    paralelo) e conferida contra o total do servidor.
+
+    Com incremental=True (e tenant_id informado), mantém o último snapshot do
+    tenant e, quando o cache expira, busca apenas as linhas alteradas desde o
+    último atualizado_em visto. Uma carga completa é refeita periodicamente
+    (PEDIDOS_SYNC_COMPLETO_SEGUNDOS) e sempre que as contagens do servidor não
+    fecham (ver _sincronizar_delta). Se o delta não traz novidade, o frame
+    residente continua o mesmo (mesma geração no armazém).
+
+    O resultado fica no armazém do processo (src.core.store), uma cópia por
+    tenant e versão de pedidos/fornecedores (src.core.cache): as páginas recebem
+    uma visão somente leitura, sem cópia por acesso, e uma escrita invalida só o
+    tenant afetado. Depois do TTL, o frame vencido ainda é servido por até
+    PEDIDOS_MAX_DEFASAGEM_SEGUNDOS enquanto é recarregado em segundo plano
+    (ver pedidos_atualizados_em).
+
+    colunas (ver registrar_projecao) limita o retorno a essas colunas, com
+    entrada de cache própria. Se o frame completo do tenant já está em memória,
+    a projeção é recortada dele; senão é buscado só o superconjunto das
+    projeções declaradas, compartilhado entre as páginas.
+
+    fonte="view" lê vw_pedidos_completo; fonte="tabelas" lê a tabela pedidos
+    e junta os fornecedores do tenant em memória (ver _juntar_fornecedores),
+    com as mesmas colunas de saída.
+
+    formato="csv" pede as páginas em text/csv (comprimidas) e as lê direto em
+    colunas tipadas (ver src.repositories.leitura_csv); formato="json" é o
+    caminho padrão do cliente supabase.
+
+    As colunas seguem ESQUEMA_PEDIDOS (categorias, string Arrow, int32): nos
+    groupby por essas colunas use observed=True.
+
+    As consultas passam por src.core.resiliencia (timeout, retentativas,
+    disjuntor). Se o banco continua indisponível, ou a leitura não fecha com o
+    total nem repetida (CargaIncompleta), serve o último frame do tenant ainda
+    em memória, com um aviso, em vez do erro.
     """
+    if fonte not in _FONTES:
+        raise ValueError(f"fonte inválida: {fonte!r} (esperado: {', '.join(_FONTES)})")
+    validar_formato(formato)
+    params = (tamanho_pagina, max_workers, incremental, fonte, formato)
+    chave = (
+        versao_dados(tenant_id, "pedidos", "fornecedores"),
+        params,
+        date.today(),  # 'atrasado' depende da data de hoje
+    )
+    politica = dict(ttl=PEDIDOS_TTL_SEGUNDOS, max_defasagem=PEDIDOS_MAX_DEFASAGEM_SEGUNDOS or None)
     try:
-        q = _supabase.table('vw_pedidos_completo').select('*')
-        if tenant_id:
-            q = q.eq('tenant_id', tenant_id)
-        resultado = q.execute()
-        if resultado.data:
-            df = pd.DataFrame(resultado.data)
-            
-            # Converter datas com MÚLTIPLAS TENTATIVAS
-            date_columns = ['data_solicitacao', 'data_oc', 'previsao_entrega', 'data_entrega_real', 'criado_em', 'atualizado_em']
-            
-            for col in date_columns:
-                if col in df.columns:
-                    # Tentar múltiplos formatos
-                    if df[col].dtype == 'object':
-                        # Método 1: Conversão padrão
-                        df[col] = pd.to_datetime(df[col], errors='coerce')
-                        
-                        # Se não funcionou, tentar formato específico
-                        if df[col].isna().all():
-                            # Método 2: Formato ISO
-                            df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce')
-                        
-                        # Se ainda não funcionou, tentar formato brasileiro
-                        if df[col].isna().all():
-                            # Método 3: Formato brasileiro
-                            df[col] = pd.to_datetime(df[col], format='%d/%m/%Y', errors='coerce')
-                    else:
-                        # Já é datetime ou timestamp
-                        df[col] = pd.to_datetime(df[col], errors='coerce')
-            
-            # Garantir tipos booleanos corretos
-            bool_columns = ['entregue', 'atrasado']
-            for col in bool_columns:
-                if col in df.columns:
-                    # Converter para booleano tratando diversos formatos
-                    if df[col].dtype == 'object':
-                        # Mapear strings possíveis
-                        df[col] = df[col].astype(str).str.lower().map({
-                            'true': True, 
-                            'false': False, 
-                            't': True, 
-                            'f': False,
-                            '1': True,
-                            '0': False,
-                            'yes': True,
-                            'no': False,
-                            'sim': True,
-                            'não': False,
-                            'nao': False
-                        })
-                    
-                    # Garantir tipo booleano
-                    df[col] = df[col].fillna(False).astype(bool)
-            
-            # RECALCULAR coluna 'atrasado' (CRÍTICO!)
-            # Isso garante que mesmo se o Supabase estiver errado, o cálculo será correto
-            if 'previsao_entrega' in df.columns and 'entregue' in df.columns:
-                hoje = pd.Timestamp.now().normalize()
-                
-                # Criar coluna temporária para não perder a original
-                df['previsao_dt_calc'] = pd.to_datetime(df['previsao_entrega'], errors='coerce')
-                
-                # Calcular atrasado
-                df['atrasado'] = (
-                    (df['entregue'] == False) & 
-                    (df['previsao_dt_calc'] < hoje) &
-                    (df['previsao_dt_calc'].notna())
-                )
-                
-                # Remover coluna temporária
-                df = df.drop('previsao_dt_calc', axis=1)
-            
-            # Garantir que valores numéricos estão corretos
-            numeric_columns = ['qtde_solicitada', 'qtde_entregue', 'valor_total', 'valor_ultima_compra']
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            
-            # LIMPEZA DE HTML - Remover qualquer HTML dos campos de texto
-            import html
-            import re
-            
-            def limpar_html(texto):
-                """Remove HTML de um texto"""
-                if pd.isna(texto) or texto is None:
-                    return texto
-                
-                texto_str = str(texto)
-                # Decodificar entidades HTML
-                texto_str = html.unescape(texto_str)
-                # Remover tags HTML
-                texto_str = re.sub(r'<[^>]+>', '', texto_str)
-                # Limpar espaços extras
-                texto_str = re.sub(r'\s+', ' ', texto_str).strip()
-                
-                return texto_str if texto_str else None
-            
-            # Aplicar limpeza em campos de texto
-            text_columns = ['descricao', 'nr_oc', 'nr_solicitacao', 'departamento', 
-                          'cod_equipamento', 'cod_material', 'fornecedor_nome', 
-                          'fornecedor_cidade', 'status', 'observacoes']
-            
-            for col in text_columns:
-                if col in df.columns:
-                    df[col] = df[col].apply(limpar_html)
-            
-            # SOLUÇÃO TEMPORÁRIA: Calcular previsão se estiver tudo NULL
-            if 'previsao_entrega' in df.columns and df['previsao_entrega'].isna().all():
-                import calcular_previsao_temporario as cpt
-                df = cpt.calcular_previsao_entrega_temporario(df)
-            
-            return df
-            
-        return pd.DataFrame()
-        
+        if colunas is None:
+            return store.obter(
+                "pedidos",
+                tenant_id,
+                chave,
+                lambda: _montar_pedidos(
+                    _supabase, tenant_id, *params, residente=lambda: store.residente("pedidos", tenant_id, chave)
+                ),
+                **politica,
+            )
+
+        projecao = tuple(sorted(set(colunas) | set(_COLUNAS_OBRIGATORIAS)))
+        nome = "pedidos:" + ",".join(projecao)
+
+        def _montar_projecao():
+            fonte_df = _fonte_projecao(_supabase, tenant_id, chave, params, projecao, politica)
+            return _reaproveitar(
+                lambda: store.residente(nome, tenant_id, chave),
+                (store.geracao(fonte_df),),
+                lambda: _projetar(fonte_df, projecao),
+            )
+
+        return store.obter(nome, tenant_id, chave, _montar_projecao, **politica)
+
     except Exception as e:
+        if transitoria(e) or isinstance(e, CargaIncompleta):
+            reserva = _ultimo_residente(tenant_id, colunas)
+            if reserva is not None:
+                df, gerado_em = reserva
+                st.warning(f"⚠️ Banco de dados indisponível no momento: exibindo os pedidos de {gerado_em:%H:%M:%S}.")
+                return df
+            st.error(f"❌ Banco de dados indisponível no momento, tente novamente em instantes ({e}).")
+            return pd.DataFrame()
         st.error(f"❌ Erro ao carregar pedidos: {e}")
         import traceback
         st.error("Detalhes do erro:")
         st.code(traceback.format_exc())
         return pd.DataFrame()
 
-@st.cache_data(ttl=300)
-def carregar_fornecedores(_supabase):
-    """Carrega lista de fornecedores"""
-    try:
-        resultado = _supabase.table('fornecedores').select('*').eq('ativo', True).execute()
-        if resultado.data:
-            return pd.DataFrame(resultado.data)
-        return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Erro ao carregar fornecedores: {e}")
-        return pd.DataFrame()
 
-@st.cache_data(ttl=60)
-def carregar_estatisticas_departamento(_supabase):
+def _ultimo_residente(tenant_id: str | None, colunas: tuple[str, ...] | None):
+    """Último frame do tenant em memória (de qualquer versão), para quando o banco falha."""
+    if colunas is None:
+        return store.ultima("pedidos", tenant_id)
+    projecao = tuple(sorted(set(colunas) | set(_COLUNAS_OBRIGATORIAS)))
+    reserva = store.ultima("pedidos:" + ",".join(projecao), tenant_id) or store.ultima("pedidos", tenant_id)
+    if reserva is None:
+        return None
+    df, gerado_em = reserva
+    return _projetar(df, projecao), gerado_em
+
+
+def _fonte_projecao(_supabase, tenant_id, chave, params, projecao, politica) -> pd.DataFrame:
+    """Frame completo já residente (mesma chave) ou o superconjunto das projeções."""
+    completo = store.residente("pedidos", tenant_id, chave, politica["ttl"])
+    if completo is not None:
+        return completo
+
+    sup = _superconjunto(projecao)
+    nome = "pedidos[" + ",".join(sup) + "]"
+    return store.obter(
+        nome,
+        tenant_id,
+        chave,
+        lambda: _montar_pedidos(
+            _supabase, tenant_id, *params, colunas=",".join(sup),
+            residente=lambda: store.residente(nome, tenant_id, chave),
+        ),
+        **politica,
+    )
+
+
+def pedidos_atualizados_em(tenant_id: str | None) -> datetime | None:
+    """Hora em que os pedidos servidos para o tenant foram lidos do banco."""
+    return store.atualizado_em("pedidos", tenant_id)
+
+
+def _montar_pedidos(
+    _supabase, tenant_id, tamanho_pagina, max_workers, incremental, fonte='view', formato='json', colunas='*',
+    residente=None,
+) -> pd.DataFrame:
+    if fonte == 'tabelas':
+        snap = _carregar_snapshot(
+            _supabase, tenant_id, tamanho_pagina, max_workers, incremental, _colunas_base(colunas), 'pedidos', formato
+        )
+        if snap.df.empty:
+            return pd.DataFrame()
+        # A junção roda a cada montagem (não no snapshot): edições de fornecedor
+        # não mudam pedidos.atualizado_em e o delta não as veria.
+        fornecedores = obter_fornecedores(_supabase, tenant_id, incluir_inativos=True, formato=formato)
+        origem = (snap.revisao, store.geracao(fornecedores))
+    else:
+        snap = _carregar_snapshot(_supabase, tenant_id, tamanho_pagina, max_workers, incremental, colunas, _VIEW, formato)
+        if snap.df.empty:
+            return pd.DataFrame()
+        fornecedores = None
+        origem = (snap.revisao,)
+
+    def montar():
+        df = snap.df if fornecedores is None else _juntar_fornecedores(snap.df, fornecedores, colunas)
+        # Cópia rasa: _finalizar_pedidos e _compactar só criam/substituem colunas,
+        # então os arrays do snapshot são compartilhados em vez de duplicados.
+        return _compactar(_finalizar_pedidos(df.copy(deep=False)))
+
+    return _reaproveitar(residente, origem, montar)
+
+
+_ATTR_ORIGEM = "fu_origem"
+
+
+def _reaproveitar(residente, origem: tuple, montar) -> pd.DataFrame:
+    """
+    O frame de `residente()` se ele foi montado da mesma `origem` (revisão do
+    snapshot, geração dos fornecedores ou do frame recortado); senão o de
+    `montar()`, marcado com ela.
+
+    Devolvido o residente, o armazém só renova o TTL: a geração não muda e
+    alertas, enriquecimento e projeções derivados dela continuam valendo
+    (ver store._carregar_e_publicar). A chave do armazém já inclui a data e a
+    versão dos dados, então virada do dia e escritas sempre remontam.
+    """
+    if residente is not None and None not in origem:
+        anterior = residente()
+        if anterior is not None and anterior.attrs.get(_ATTR_ORIGEM) == origem:
+            return anterior
+    df = montar()
+    df.attrs[_ATTR_ORIGEM] = origem
+    return df
+
+# ============================================
+# JUNÇÃO LOCAL COM FORNECEDORES (fonte="tabelas")
+# ============================================
+
+_FONTES = ('view', 'tabelas')
+
+# Coluna da view -> coluna da tabela fornecedores (mesma ordem da view)
+_COLUNAS_FORNECEDOR = {
+    'cod_fornecedor': 'cod_fornecedor',
+    'fornecedor_nome': 'nome',
+    'fornecedor_nome_fantasia': 'nome_fantasia',
+    'fornecedor_cidade': 'cidade',
+    'fornecedor_uf': 'uf',
+    'fornecedor_endereco': 'endereco',
+    'fornecedor_latitude': 'latitude',
+    'fornecedor_longitude': 'longitude',
+}
+# Limpas de HTML como na carga pela view (ver _normalizar_pedidos)
+_COLUNAS_FORNECEDOR_TEXTO = ('fornecedor_nome', 'fornecedor_cidade')
+
+
+def _colunas_base(colunas: str) -> str:
+    """Colunas da tabela pedidos para uma projeção da view ('*' continua '*')."""
+    if colunas == '*':
+        return colunas
+    pedidas = colunas.split(',')
+    base = [c for c in pedidas if c not in _COLUNAS_FORNECEDOR and c != 'atrasado']
+    if any(c in _COLUNAS_FORNECEDOR for c in pedidas) and 'fornecedor_id' not in base:
+        base.append('fornecedor_id')
+    return ','.join(base)
+
+
+def _juntar_fornecedores(df: pd.DataFrame, fornecedores: pd.DataFrame, colunas: str = '*') -> pd.DataFrame:
+    """
+    Acrescenta as colunas de fornecedor da view a partir da tabela fornecedores.
+
+    fornecedor_id vira um código categórico (posição do fornecedor na tabela) e
+    cada coluna é montada com um único take sobre os valores por fornecedor;
+    pedidos sem fornecedor (código -1) ficam nulos, como no LEFT JOIN da view.
+    """
+    alvo = [c for c in _COLUNAS_FORNECEDOR if colunas == '*' or c in colunas.split(',')]
+    if not alvo:
+        return df
+
+    out = df.copy(deep=False)
+    if fornecedores is None or fornecedores.empty or 'id' not in fornecedores.columns or 'fornecedor_id' not in df.columns:
+        for c in alvo:
+            out[c] = None
+        return out
+
+    codigos = pd.Categorical(df['fornecedor_id'], categories=pd.Index(fornecedores['id'])).codes
+    for c in alvo:
+        origem = _COLUNAS_FORNECEDOR[c]
+        if origem not in fornecedores.columns:
+            out[c] = None
+            continue
+        valores = fornecedores[origem]
+        if c in _COLUNAS_FORNECEDOR_TEXTO:
+            valores = _limpar_html_coluna(valores)  # por fornecedor, não por pedido
+        valores = valores.to_numpy()
+        if valores.dtype == object:
+            # código -1 cai no None acrescentado ao final (take trocaria por NaN)
+            out[c] = np.append(valores, None)[codigos]
+        else:
+            out[c] = pd.api.extensions.take(valores, codigos, allow_fill=True)
+    return out
+
+
+# ============================================
+# HIDRATAÇÃO DE TEXTOS (descricao/observacoes sob demanda)
+# ============================================
+
+_textos: OrderedDict[tuple[str | None, str], dict] = OrderedDict()  # (tenant_id, id) -> {coluna: texto}
+_textos_lock = threading.Lock()
+
+
+def _descartar_textos(tenant_id: str | None) -> None:
+    with _textos_lock:
+        for chave in list(_textos):
+            if tenant_id is None or chave[0] in (tenant_id, None):
+                del _textos[chave]
+
+
+registrar_loader("textos_pedidos", "pedidos", ao_invalidar=_descartar_textos)
+
+
+def hidratar_textos(_supabase, ids, tenant_id: str | None = None) -> dict[str, dict]:
+    """
+    Textos longos (COLUNAS_TEXTO_PESADO) dos pedidos informados, por id.
+
+    Os ids ausentes do cache LRU são buscados em lotes (in_ com até
+    PEDIDOS_TEXTOS_LOTE ids por requisição) e passam pela mesma limpeza de HTML
+    da carga principal. Uma escrita em pedidos descarta os textos do tenant.
+    """
+    ids = [str(i) for i in dict.fromkeys(ids) if i is not None and not pd.isna(i)]
+    encontrados: dict[str, dict] = {}
+    faltando = []
+    with _textos_lock:
+        for pid in ids:
+            textos = _textos.get((tenant_id, pid))
+            if textos is None:
+                faltando.append(pid)
+            else:
+                _textos.move_to_end((tenant_id, pid))
+                encontrados[pid] = textos
+
+    colunas = 'id,' + ','.join(COLUNAS_TEXTO_PESADO)
+    for i in range(0, len(faltando), PEDIDOS_TEXTOS_LOTE):
+        lote = faltando[i:i + PEDIDOS_TEXTOS_LOTE]
+        dados = executar(_consulta_pedidos(_supabase, tenant_id, colunas).in_('id', lote)).data or []
+        novos = {
+            str(r['id']): {c: _limpar_html(r.get(c)) for c in COLUNAS_TEXTO_PESADO}
+            for r in dados
+        }
+        encontrados.update(novos)
+        with _textos_lock:
+            for pid, textos in novos.items():
+                _textos[(tenant_id, pid)] = textos
+                _textos.move_to_end((tenant_id, pid))
+            while len(_textos) > PEDIDOS_TEXTOS_LRU:
+                _textos.popitem(last=False)
+
+    return encontrados
+
+
+def com_textos(_supabase, df: pd.DataFrame, colunas=COLUNAS_TEXTO_PESADO, tenant_id: str | None = None) -> pd.DataFrame:
+    """Devolve `df` (visão rasa) com as colunas de texto preenchidas para as suas linhas."""
+    if df is None or df.empty or 'id' not in df.columns:
+        return df
+    textos = hidratar_textos(_supabase, df['id'].tolist(), tenant_id)
+    out = df.copy(deep=False)
+    ids = out['id'].astype(str)
+    for c in colunas:
+        out[c] = ids.map(lambda pid: textos.get(pid, {}).get(c))
+    return out
+
+
+def carregar_fornecedores(_supabase, tenant_id: str | None = None):
+    """Carrega lista de fornecedores ativos do tenant (armazém por tenant e versão, ver src.repositories.fornecedores)."""
+    return _carregar_fornecedores_tenant(_supabase, tenant_id, incluir_inativos=False)
+
+def carregar_estatisticas_departamento(_supabase, tenant_id: str | None = None):
     """Carrega estatísticas por departamento"""
+    return _carregar_estatisticas_departamento_versao(_supabase, tenant_id, versao_dados(tenant_id, "pedidos"))
+
+
+@store.memoizar(ttl=60)
+def _carregar_estatisticas_departamento_versao(_supabase, tenant_id: str | None, versao: tuple):
+    # A view não tem tenant_id (a RLS do usuário recorta as linhas): o tenant
+    # entra só na chave, para um tenant não receber o resultado de outro.
     try:
-        resultado = _supabase.table('vw_stats_departamento').select('*').execute()
+        resultado = executar(_supabase.table('vw_stats_departamento').select('*'))
         if resultado.data:
             return pd.DataFrame(resultado.data)
         return pd.DataFrame()
@@ -165,15 +1115,18 @@ def salvar_pedido(pedido_data, _supabase):
         
         if 'id' in pedido_data and pedido_data['id']:
             # Atualizar
-            resultado = _supabase.table('pedidos').update(pedido_data).eq('id', pedido_data['id']).execute()
+            resultado = executar(_supabase.table('pedidos').update(pedido_data).eq('id', pedido_data['id']))
         else:
             # Inserir novo
             pedido_data['criado_por'] = st.session_state.usuario['id']
-            resultado = _supabase.table('pedidos').insert(pedido_data).execute()
+            resultado = executar(_supabase.table('pedidos').insert(pedido_data))
         
-        st.cache_data.clear()
+        invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
         return True, "Pedido salvo com sucesso!"
     except Exception as e:
+        if resultado_incerto(e):
+            invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
+            return False, f"Sem resposta do banco ao salvar ({e}): o pedido pode ter sido gravado. Confira na consulta antes de tentar de novo."
         return False, f"Erro ao salvar pedido: {e}"
 
 def registrar_entrega(pedido_id, qtde_entregue, data_entrega, observacoes="", _supabase=None):
@@ -182,7 +1135,7 @@ def registrar_entrega(pedido_id, qtde_entregue, data_entrega, observacoes="", _s
     """Registra uma entrega parcial ou total"""
     try:
         # Buscar pedido atual
-        pedido = _supabase.table('pedidos').select('*').eq('id', pedido_id).execute()
+        pedido = executar(_supabase.table('pedidos').select('*').eq('id', pedido_id))
         
         if not pedido.data:
             return False, "Pedido não encontrado"
@@ -191,24 +1144,27 @@ def registrar_entrega(pedido_id, qtde_entregue, data_entrega, observacoes="", _s
         nova_qtde_entregue = pedido_atual['qtde_entregue'] + qtde_entregue
         
         # Atualizar pedido
-        _supabase.table('pedidos').update({
+        executar(_supabase.table('pedidos').update({
             'qtde_entregue': nova_qtde_entregue,
             'data_entrega_real': data_entrega if nova_qtde_entregue >= pedido_atual['qtde_solicitada'] else None,
             'atualizado_por': st.session_state.usuario['id']
-        }).eq('id', pedido_id).execute()
+        }).eq('id', pedido_id))
         
         # Registrar no histórico
-        _supabase.table('historico_entregas').insert({
+        executar(_supabase.table('historico_entregas').insert({
             'pedido_id': pedido_id,
             'qtde_entregue': qtde_entregue,
             'data_entrega': data_entrega,
             'observacoes': observacoes,
             'usuario_id': st.session_state.usuario['id']
-        }).execute()
+        }))
         
-        st.cache_data.clear()
+        invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
         return True, "Entrega registrada com sucesso!"
     except Exception as e:
+        if resultado_incerto(e):
+            invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
+            return False, f"Sem resposta do banco ao registrar a entrega ({e}): ela pode ter sido gravada. Confira o pedido antes de tentar de novo."
         return False, f"Erro ao registrar entrega: {e}"
 
 # ============================================
@@ -0,0 +1,175 @@
+"""
+Aquecimento do cache dos tenants ativos.
+
+Depois de um reinício (ou de manhã, quando o TTL já venceu para todos), o
+primeiro usuário de cada empresa pagaria a carga completa de pedidos,
+fornecedores e alertas. Uma thread do processo faz essas cargas antes: na
+partida e nos horários de AQUECIMENTO_HORARIOS (por exemplo, antes do
+expediente), para os tenants com atividade recente em logs_auditoria.
+
+As cargas usam o cliente admin (a RLS não se aplica, mas toda consulta já
+filtra por tenant_id) e os mesmos loaders e chaves das páginas: o que é
+aquecido aqui é exatamente o que as sessões vão encontrar no armazém. Por
+isso o aquecedor só sobe com SUPABASE_SERVICE_ROLE_KEY configurada (com a
+chave anon a RLS devolveria frames vazios), e as cargas rodam em
+store.preservando_residentes(): um resultado vazio nunca é publicado.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from src.core import store
+from src.core.config import (
+    AQUECIMENTO_CONCORRENCIA,
+    AQUECIMENTO_DIAS,
+    AQUECIMENTO_HORARIOS,
+    AQUECIMENTO_MAX_TENANTS,
+    AQUECIMENTO_NA_PARTIDA,
+)
+from src.core.db import service_role_configurada
+from src.core.resiliencia import executar
+from src.repositories.pedidos import projecoes_registradas
+from src.services.contexto import ContextoDados
+
+_LIMITE_LOGS = 5000
+_LOTE_USUARIOS = 150
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_estado = {"execucoes": 0, "tenants_aquecidos": 0, "falhas": 0, "ultima_execucao": None, "proxima_execucao": None}
+
+
+def tenants_ativos(_supabase, dias: int = AQUECIMENTO_DIAS, limite: int = AQUECIMENTO_MAX_TENANTS) -> list[str]:
+    """Tenants dos usuários com ação registrada nos últimos `dias` dias, do mais recente ao mais antigo."""
+    desde = (datetime.now() - timedelta(days=dias)).isoformat()
+    try:
+        logs = executar(
+            _supabase.table("logs_auditoria")
+            .select("usuario_id")
+            .gte("timestamp", desde)
+            .order("timestamp", desc=True)
+            .limit(_LIMITE_LOGS)
+        ).data or []
+    except Exception:
+        logs = None
+
+    if logs is None:
+        # sem logs_auditoria: todos os tenants com usuário vinculado
+        vinculos = executar(_supabase.table("tenant_users").select("tenant_id").limit(_LIMITE_LOGS)).data or []
+        return list(dict.fromkeys(v["tenant_id"] for v in vinculos if v.get("tenant_id")))[:limite]
+
+    usuarios = list(dict.fromkeys(r["usuario_id"] for r in logs if r.get("usuario_id")))
+    tenants_por_usuario: dict[str, list[str]] = {}
+    for i in range(0, len(usuarios), _LOTE_USUARIOS):
+        lote = usuarios[i:i + _LOTE_USUARIOS]
+        vinculos = executar(_supabase.table("tenant_users").select("tenant_id,user_id").in_("user_id", lote)).data or []
+        for v in vinculos:
+            tenants_por_usuario.setdefault(v.get("user_id"), []).append(v.get("tenant_id"))
+
+    tenants = [t for u in usuarios for t in tenants_por_usuario.get(u, []) if t]
+    return list(dict.fromkeys(tenants))[:limite]
+
+
+def aquecer_tenant(_supabase, tenant_id: str) -> None:
+    """Carrega no armazém os dados que as páginas do tenant vão pedir (frame completo, projeções, alertas e a contagem)."""
+    ctx = ContextoDados(_supabase, tenant_id)
+    with store.preservando_residentes():
+        ctx.pedidos()
+        for projecao in projecoes_registradas():
+            ctx.pedidos(projecao)  # recortadas do frame completo, sem nova consulta
+        ctx.fornecedores()
+        ctx.contagem_alertas
+        ctx.alertas
+
+
+def aquecer(_supabase, concorrencia: int = AQUECIMENTO_CONCORRENCIA) -> int:
+    """Uma passada: aquece os tenants ativos, no máximo `concorrencia` ao mesmo tempo. Devolve quantos deram certo."""
+    tenants = tenants_ativos(_supabase)
+
+    def um(tenant_id: str) -> bool:
+        try:
+            aquecer_tenant(_supabase, tenant_id)
+            return True
+        except Exception:
+            return False
+
+    with ThreadPoolExecutor(max_workers=max(1, concorrencia), thread_name_prefix="fu-aquecimento") as pool:
+        resultados = list(pool.map(um, tenants))
+
+    ok = sum(resultados)
+    with _lock:
+        _estado["execucoes"] += 1
+        _estado["tenants_aquecidos"] += ok
+        _estado["falhas"] += len(resultados) - ok
+        _estado["ultima_execucao"] = datetime.now()
+    return ok
+
+
+def _horarios(texto: str) -> list[tuple[int, int]]:
+    horarios = []
+    for parte in (texto or "").split(","):
+        try:
+            h, m = (int(x) for x in parte.strip().split(":"))
+        except ValueError:
+            continue
+        if 0 <= h < 24 and 0 <= m < 60:
+            horarios.append((h, m))
+    return horarios
+
+
+def proxima_execucao(agora: datetime, horarios: list[tuple[int, int]]) -> datetime | None:
+    """Próximo horário agendado depois de `agora` (None se não há agenda)."""
+    candidatos = []
+    for h, m in horarios:
+        quando = agora.replace(hour=h, minute=m, second=0, microsecond=0)
+        candidatos.append(quando if quando > agora else quando + timedelta(days=1))
+    return min(candidatos, default=None)
+
+
+def _laco(_supabase, horarios: list[tuple[int, int]], na_partida: bool) -> None:
+    if na_partida:
+        try:
+            aquecer(_supabase)
+        except Exception:
+            pass
+    while True:
+        proxima = proxima_execucao(datetime.now(), horarios)
+        with _lock:
+            _estado["proxima_execucao"] = proxima
+        if proxima is None:
+            return
+        time.sleep(max(1.0, (proxima - datetime.now()).total_seconds()))
+        try:
+            aquecer(_supabase)
+        except Exception:
+            # falha da passada (ex.: banco fora): tenta de novo no próximo horário
+            pass
+
+
+def iniciar_aquecedor(_supabase) -> bool:
+    """
+    Sobe a thread de aquecimento do processo (uma só, chamadas seguintes não
+    fazem nada). Sem SUPABASE_SERVICE_ROLE_KEY não sobe: devolve False.
+    """
+    global _thread
+    if not service_role_configurada():
+        return False
+    horarios = _horarios(AQUECIMENTO_HORARIOS)
+    na_partida = bool(AQUECIMENTO_NA_PARTIDA)
+    with _lock:
+        if _thread is not None or not (horarios or na_partida):
+            return False
+        _thread = threading.Thread(
+            target=_laco, args=(_supabase, horarios, na_partida), name="fu-aquecedor", daemon=True
+        )
+        _thread.start()
+    return True
+
+
+def estatisticas() -> dict:
+    """Passadas feitas, tenants aquecidos/falhas e horários da última e da próxima passada."""
+    with _lock:
+        return dict(_estado)
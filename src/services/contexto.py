@@ -0,0 +1,166 @@
+"""
+Contexto de dados de uma execução (rerun) do app.
+
+main() monta um ContextoDados por rerun, já com o tenant resolvido, e o passa
+para a página exibida. As páginas pedem pedidos, fornecedores e alertas a ele
+em vez de chamar os loaders por conta própria: cada carga sai uma vez por
+rerun e sempre com o tenant_id na chave do armazém (sem tenant, usuários de
+empresas diferentes dividiam a mesma entrada).
+
+O que o contexto guarda são visões dos frames residentes no armazém
+(src.core.store); cada acesso devolve uma visão rasa nova, então uma página
+pode acrescentar colunas sem afetar o que outra parte do rerun recebeu. Uma
+escrita durante o rerun (invalidar) muda a versão dos dados e o próximo
+acesso recarrega.
+
+iniciar() antecipa as cargas do bootstrap em threads: cada dado vira um
+Future no contexto, e quem o pedir depois (a sidebar, a página) espera só o
+que ainda falta, sem disparar a mesma carga de novo.
+
+Os alertas só mudam quando os dados mudam ou o dia vira: ficam no armazém
+(store.memo) por tenant, versão dos dados, dia e geração dos frames (uma
+recarga pelo TTL também conta). A sidebar usa só as quantidades
+(contagem_alertas); as listas completas saem apenas na página de alertas,
+a partir do estado incremental do tenant (sistema_alertas.alertas_incrementais).
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable
+
+import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import src.services.sistema_alertas as sa
+from src.core import store
+from src.core.cache import versao_dados
+from src.repositories.fornecedores import carregar_fornecedores
+from src.repositories.pedidos import (
+    COLUNAS_NUCLEO,
+    COLUNAS_TEXTO_PESADO,
+    carregar_pedidos,
+    com_textos,
+    hidratar_textos,
+)
+
+
+@dataclass
+class ContextoDados:
+    """Dados do tenant atual, carregados sob demanda e no máximo uma vez por rerun."""
+
+    supabase: Any
+    tenant_id: str
+    _dados: dict[tuple, Future] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _completo: bool = field(default=False, repr=False)
+
+    def _versao(self) -> tuple:
+        return versao_dados(self.tenant_id, "pedidos", "fornecedores")
+
+    def _memo(self, chave: tuple, carregar: Callable[[], Any]) -> Any:
+        """Resultado de `carregar` para (chave, versão dos dados); a primeira chamada carrega, as demais esperam."""
+        chave = (chave, self._versao())
+        with self._lock:
+            futuro = self._dados.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._dados[chave] = Future()
+        if dono:
+            try:
+                futuro.set_result(carregar())
+            except BaseException as e:
+                futuro.set_exception(e)
+        return futuro.result()
+
+    def iniciar(self, completo: bool = False, alertas: bool = False) -> None:
+        """
+        Dispara, sem bloquear, as cargas do bootstrap: pedidos enxutos e
+        fornecedores em paralelo, e a contagem de alertas assim que os dois
+        chegam (ou os alertas completos, com alertas=True: página de alertas).
+
+        completo=True (página que usa o frame completo) busca o frame completo
+        no lugar do enxuto; a projeção enxuta é então recortada dele, sem
+        segunda consulta (ver carregar_pedidos).
+        """
+        self._completo = completo
+        contexto_st = get_script_run_ctx(suppress_warning=True)
+        resumo = (lambda: self.alertas) if alertas else (lambda: self.contagem_alertas)
+        tarefas = (self._pedidos_nucleo, self.fornecedores, resumo)
+        # Uma thread por tarefa: os alertas esperam as outras duas dentro do pool.
+        executor = ThreadPoolExecutor(
+            max_workers=len(tarefas),
+            thread_name_prefix="fu-bootstrap",
+            initializer=add_script_run_ctx,  # st.error dos loaders aparece na página
+            initargs=(None, contexto_st),
+        )
+        for tarefa in tarefas:
+            executor.submit(tarefa)
+        executor.shutdown(wait=False)
+
+    def _pedidos_nucleo(self) -> pd.DataFrame:
+        if self._completo:
+            self.pedidos()  # a projeção enxuta sai do frame completo já residente
+        return self.pedidos(COLUNAS_NUCLEO)
+
+    def pedidos(self, colunas: tuple[str, ...] | None = None) -> pd.DataFrame:
+        """Pedidos do tenant (frame completo, ou a projeção `colunas`; ver registrar_projecao)."""
+        return store.visao(self._memo(
+            ("pedidos", colunas),
+            lambda: carregar_pedidos(self.supabase, self.tenant_id, colunas=colunas),
+        ))
+
+    def fornecedores(self, incluir_inativos: bool = True) -> pd.DataFrame:
+        """Fornecedores do tenant (com inativos por padrão, como nos alertas)."""
+        return store.visao(self._memo(
+            ("fornecedores", incluir_inativos),
+            lambda: carregar_fornecedores(self.supabase, self.tenant_id, incluir_inativos=incluir_inativos),
+        ))
+
+    def _alertas_memo(self, nome: str, calcular: Callable[[pd.DataFrame, pd.DataFrame], dict]) -> dict:
+        pedidos, fornecedores = self._pedidos_nucleo(), self.fornecedores()
+        geracoes = (store.geracao(pedidos), store.geracao(fornecedores))
+        if None in geracoes:
+            # frame de fora do armazém (ex.: vazio depois de um erro): não guarda
+            return calcular(pedidos, fornecedores)
+        return store.memo(
+            nome,
+            self.tenant_id,
+            (self._versao(), date.today(), geracoes),
+            lambda: calcular(pedidos, fornecedores),
+        )
+
+    @property
+    def alertas(self) -> dict:
+        """
+        Alertas do tenant, calculados sobre o frame enxuto (COLUNAS_NUCLEO). Não
+        altere as listas. Depois de uma recarga, só os pedidos alterados são
+        recalculados (ver alertas_incrementais).
+        """
+        def calcular(pedidos, fornecedores):
+            return sa.alertas_incrementais(self.tenant_id, pedidos, fornecedores)
+
+        return self._memo(("alertas",), lambda: self._alertas_memo("alertas", calcular))
+
+    @property
+    def contagem_alertas(self) -> dict:
+        """Só as quantidades de cada tipo de alerta e o total (ver contar_alertas)."""
+        def calcular(pedidos, fornecedores):
+            return sa.contar_alertas(pedidos, fornecedores, self.limiares_alertas)
+
+        return self._memo(("contagem_alertas",), lambda: self._alertas_memo("alertas:contagem", calcular))
+
+    @property
+    def limiares_alertas(self) -> sa.Limiares:
+        """Limiares das regras de alerta deste tenant (ver limiares_tenant)."""
+        return sa.limiares_tenant(self.tenant_id)
+
+    def hidratar(self, ids) -> dict[str, dict]:
+        """Textos longos dos pedidos informados (ver hidratar_textos)."""
+        return hidratar_textos(self.supabase, ids, self.tenant_id)
+
+    def com_textos(self, df: pd.DataFrame, colunas=COLUNAS_TEXTO_PESADO) -> pd.DataFrame:
+        """`df` com as colunas de texto longo preenchidas (ver com_textos)."""
+        return com_textos(self.supabase, df, colunas, tenant_id=self.tenant_id)
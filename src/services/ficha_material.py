@@ -59,11 +59,11 @@ def criar_ranking_fornecedores_visual(df: pd.DataFrame, col_fornecedor: str = "f
     d = df.copy()
     if col_preco in d.columns:
         d[col_preco] = pd.to_numeric(d[col_preco], errors="coerce").fillna(0)
-        top = d.groupby(col_fornecedor)[col_preco].sum().sort_values(ascending=False).head(10).reset_index()
+        top = d.groupby(col_fornecedor, observed=True)[col_preco].sum().sort_values(ascending=False).head(10).reset_index()
         fig = px.bar(top, x=col_preco, y=col_fornecedor, orientation="h", title="Top fornecedores (valor)")
         st.plotly_chart(fig, use_container_width=True)
     else:
-        top = d[col_fornecedor].value_counts().head(10)
+        top = d[col_fornecedor].value_counts().loc[lambda s: s > 0].head(10)
         fig = px.bar(x=top.values, y=top.index, orientation="h", title="Top fornecedores (qtde)")
         st.plotly_chart(fig, use_container_width=True)
 
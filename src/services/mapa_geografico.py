@@ -150,7 +150,7 @@ def formatar_moeda_br(valor):
 def criar_mapa_coropletico_estados(df_pedidos):
     """Cria mapa coroplético dos estados brasileiros com métricas"""
     
-    df_estados = df_pedidos.groupby('fornecedor_uf').agg({
+    df_estados = df_pedidos.groupby('fornecedor_uf', observed=True).agg({
         'id': 'count',
         'valor_total': 'sum',
         'fornecedor_nome': 'nunique',
@@ -267,7 +267,7 @@ def criar_mapa_fornecedores(df_pedidos):
         st.warning("⚠️ Nenhum pedido com fornecedor cadastrado")
         return None, None
     
-    df_fornecedores = df_map.groupby(['fornecedor_nome', 'fornecedor_cidade', 'fornecedor_uf']).agg({
+    df_fornecedores = df_map.groupby(['fornecedor_nome', 'fornecedor_cidade', 'fornecedor_uf'], observed=True).agg({
         'id': 'count',
         'valor_total': 'sum',
         'entregue': lambda x: (x == True).sum()
@@ -1,67 +1,93 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import re
 import html
+import bisect
+import json
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
+from functools import cached_property
+from typing import Callable
 
+from src.core import store
+from src.core.config import (
+    ALERTAS_JANELA_DIAS,
+    ALERTAS_LIMIARES_TENANT,
+    ALERTAS_PEDIDOS_MINIMOS_FORNECEDOR,
+    ALERTAS_PERCENTIL_CRITICO,
+    ALERTAS_TAXA_SUCESSO_MINIMA,
+)
+from src.repositories.pedidos import COLUNAS_FOLLOWUP, enriquecer_followup
 
-def calcular_alertas(df_pedidos: pd.DataFrame, df_fornecedores: pd.DataFrame | None = None):
-    """Calcula todos os tipos de alertas do sistema.
 
-    Compatível com chamadas antigas (apenas df_pedidos) e novas (df_pedidos, df_fornecedores).
-    Regra de vencimento/atraso: previsao_entrega > prazo_entrega > data_oc + 30 dias.
-    """
-    hoje = pd.Timestamp.now().normalize()
+def _campo(df: pd.DataFrame, col: str, padrao=None) -> pd.Series:
+    """Coluna `col` de `df`, ou `padrao` em todas as linhas se ela não existe (como pedido.get(col, padrao))."""
+    if col in df.columns:
+        return df[col]
+    return pd.Series([padrao] * len(df), index=df.index, dtype=object)
 
-    alertas = {
-        "pedidos_atrasados": [],
-        "pedidos_vencendo": [],
-        "fornecedores_baixa_performance": [],
-        "pedidos_criticos": [],
-        "total": 0,
-    }
 
-    if df_pedidos is None or df_pedidos.empty:
-        return alertas
+def _id_pedido(df: pd.DataFrame) -> pd.Series:
+    return _campo(df, "id")
 
-    df = df_pedidos.copy()
+
+def _previsao(df: pd.DataFrame) -> np.ndarray:
+    """previsao_entrega or prazo_entrega, linha a linha com a verdade do Python (NaT conta como valor)."""
+    prev = _campo(df, "previsao_entrega").astype(object).to_numpy()
+    prazo = _campo(df, "prazo_entrega").astype(object).to_numpy()
+    return np.where(prev.astype(bool), prev, prazo)
+
+
+def _lista(serie: pd.Series) -> list:
+    """serie.tolist(), com None nos ausentes das colunas categóricas (ESQUEMA_PEDIDOS)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Categorical devolve NaN onde o frame em object tinha None: os cards
+        # mostrariam "nan" no lugar do texto vazio.
+        return serie.astype(object).where(serie.notna(), None).tolist()
+    return serie.tolist()
+
+
+def _registros(df: pd.DataFrame, colunas: dict) -> list[dict]:
+    """
+    Lista de dicts (um por linha de `df`) montada por coluna: tolist() converte
+    cada coluna de uma vez para os tipos do Python (Timestamp nas datas), os
+    mesmos que o iterrows entregava.
+    """
+    if df.empty:
+        return []
+    valores = [_lista(v) for v in colunas.values()]
+    return [dict(zip(colunas, linha)) for linha in zip(*valores)]
+
+
+def _preparar(df_pedidos: pd.DataFrame, df_fornecedores: pd.DataFrame | None, hoje: pd.Timestamp) -> pd.DataFrame:
+    """Frame dos alertas: follow-up, entregue/valor normalizados e nome do fornecedor resolvido."""
+    # Vencimento, pendência e atraso: já vêm no frame de carregar_pedidos
+    # (enriquecer_followup, uma vez por versão dos dados); outros frames passam
+    # pela mesma etapa aqui. Cópia rasa: as colunas abaixo são atribuídas
+    # (novos arrays), nunca escritas no lugar.
+    if set(COLUNAS_FOLLOWUP) <= set(df_pedidos.columns):
+        df = df_pedidos.copy(deep=False)
+    else:
+        df = enriquecer_followup(df_pedidos, hoje)
 
     # ============================
     # Normalizações e tipos
     # ============================
-    if "entregue" in df.columns:
-        df["entregue"] = df["entregue"].astype(str).str.lower().isin(["true", "1", "yes", "sim"])
-    else:
+    if "entregue" not in df.columns:
         df["entregue"] = False
-
-    if "qtde_pendente" in df.columns:
-        df["_qtd_pendente"] = pd.to_numeric(df["qtde_pendente"], errors="coerce").fillna(0)
-    else:
-        df["_qtd_pendente"] = 0
-
-    df["_pendente"] = (~df["entregue"]) | (df["_qtd_pendente"] > 0)
+    elif df["entregue"].dtype != bool:
+        df["entregue"] = df["entregue"].astype(str).str.lower().isin(["true", "1", "yes", "sim"])
 
     if "valor_total" in df.columns:
         df["_valor_total"] = pd.to_numeric(df["valor_total"], errors="coerce").fillna(0.0)
     else:
         df["_valor_total"] = 0.0
 
-    def _dt(col: str) -> pd.Series:
-        if col not in df.columns:
-            return pd.Series([pd.NaT] * len(df), index=df.index)
-        return pd.to_datetime(df[col], errors="coerce", dayfirst=True)
-
-    data_oc = _dt("data_oc")
-    prev = _dt("previsao_entrega")
-    prazo = _dt("prazo_entrega")
-
-    due = prev.combine_first(prazo)
-    fallback_due = data_oc + pd.to_timedelta(30, unit="D")
-    df["_due"] = due.combine_first(fallback_due)
-
-    df["_atrasado"] = df["_pendente"] & df["_due"].notna() & (df["_due"] < hoje)
-
-        # ============================
+    # ============================
     # Fornecedor: tentar manter nome já vindo da view (vw_pedidos_completo),
     # e usar df_fornecedores apenas como complemento.
     # ============================
@@ -70,36 +96,23 @@ def calcular_alertas(df_pedidos: pd.DataFrame, df_fornecedores: pd.DataFrame | N
     else:
         df["fornecedor_id"] = ""
 
-    # Nome base (quando já vem da view)
-    if "fornecedor_nome" in df.columns:
-        df["_fornecedor_nome_base"] = (
-            df["fornecedor_nome"]
-            .fillna("")
-            .astype(str)
-            .str.strip()
-            .replace({"nan": "", "None": "", "null": ""})
-        )
-    elif "fornecedor" in df.columns:
-        # fallback: algumas fontes usam 'fornecedor' como nome
-        df["_fornecedor_nome_base"] = (
-            df["fornecedor"]
-            .fillna("")
-            .astype(str)
-            .str.strip()
-            .replace({"nan": "", "None": "", "null": ""})
-        )
+    # Nome base (quando já vem da view; algumas fontes usam 'fornecedor' como nome)
+    col_base = next((c for c in ("fornecedor_nome", "fornecedor") if c in df.columns), None)
+    if col_base:
+        nome_base = df[col_base].fillna("").astype(str).str.strip().replace({"nan": "", "None": "", "null": ""})
     else:
-        df["_fornecedor_nome_base"] = ""
+        nome_base = pd.Series("", index=df.index, dtype=object)
 
     df_f = None
     if df_fornecedores is not None and not df_fornecedores.empty:
-        df_f = df_fornecedores.copy()
+        df_f = df_fornecedores.copy(deep=False)
         df_f.columns = [c.strip().lower() for c in df_f.columns]
         if "id" in df_f.columns:
             df_f["id"] = df_f["id"].astype(str).str.strip()
         else:
             df_f = None
 
+    nome = nome_base
     if df_f is not None:
         # Procurar a coluna de nome (com múltiplas tentativas)
         nome_col = None
@@ -108,158 +121,612 @@ def calcular_alertas(df_pedidos: pd.DataFrame, df_fornecedores: pd.DataFrame | N
                 nome_col = possivel_nome
                 break
 
-        cols_keep = ["id"]
+        # Colunas do fornecedor com nomes próprios: o "id" do frame continua
+        # sendo o do pedido (os cards hidratam a descrição por ele)
+        renomear = {"id": "_forn_id"}
         if nome_col:
-            cols_keep.append(nome_col)
+            renomear[nome_col] = "_forn_nome"
 
+        df["_fornecedor_nome_base"] = nome_base
         df = df.merge(
-            df_f[cols_keep],
+            df_f[list(renomear)].rename(columns=renomear),
             left_on="fornecedor_id",
-            right_on="id",
+            right_on="_forn_id",
             how="left",
-            suffixes=("", "_forn"),
         )
+        nome = df.pop("_fornecedor_nome_base")
 
-        # Nome vindo da tabela de fornecedores
-        if nome_col and nome_col in df.columns:
-            df["_fornecedor_nome_merge"] = df[nome_col].fillna("").astype(str).str.strip()
-        else:
-            df["_fornecedor_nome_merge"] = ""
-
-        # Prioridade:
-        # 1) nome da tabela fornecedores (merge)
-        # 2) nome já vindo da view (base)
-        # 3) fallback "Fornecedor <id>"
-        df["fornecedor_nome"] = df.apply(
-            lambda row: (
-                row["_fornecedor_nome_merge"]
-                if row["_fornecedor_nome_merge"]
-                else (
-                    row["_fornecedor_nome_base"]
-                    if row["_fornecedor_nome_base"]
-                    else (
-                        f"Fornecedor {row['fornecedor_id']}"
-                        if row.get("fornecedor_id") and str(row.get("fornecedor_id")).strip()
-                        else "N/A"
-                    )
-                )
-            ),
-            axis=1,
-        )
+        # Prioridade: 1) nome da tabela fornecedores (merge), 2) nome já vindo da view (base)
+        if "_forn_nome" in df.columns:
+            nome_merge = df.pop("_forn_nome").fillna("").astype(str).str.strip()
+            nome = nome_merge.where(nome_merge != "", nome)
 
         # Limpeza
-        df.drop(columns=["id", "_fornecedor_nome_merge"], inplace=True, errors="ignore")
-    else:
-        # Sem tabela de fornecedores: usar o nome base da view, e por último o id
-        df["fornecedor_nome"] = df.apply(
-            lambda row: (
-                row["_fornecedor_nome_base"]
-                if row["_fornecedor_nome_base"]
-                else (
-                    f"Fornecedor {row['fornecedor_id']}"
-                    if row.get("fornecedor_id") and str(row.get("fornecedor_id")).strip()
-                    else "N/A"
-                )
-            ),
-            axis=1,
-        )
+        df.drop(columns=["_forn_id"], inplace=True)
+
+    # 3) fallback "Fornecedor <id>" (ou N/A sem id)
+    por_id = ("Fornecedor " + df["fornecedor_id"]).where(df["fornecedor_id"] != "", "N/A")
+    df["fornecedor_nome"] = nome.where(nome != "", por_id).astype(object)
+
+    return df
+
+
+# ============================
+# REGRAS DE ALERTA
+# ============================
+#
+# Cada tipo de alerta é uma regra declarada em REGRAS_ALERTA: um predicado
+# sobre o frame já preparado (pedidos) ou sobre o desempenho agregado
+# (fornecedores) e a projeção que monta o card a partir das linhas
+# selecionadas. Os termos que os predicados usam (pendência, vencimento,
+# janela, corte de valor, desempenho por fornecedor) são calculados uma vez
+# por avaliação e compartilhados: uma regra nova custa algumas operações
+# booleanas vetorizadas, sem outra cópia do frame nem outro laço.
+
+
+@dataclass(frozen=True)
+class Limiares:
+    """Parâmetros das regras (padrões em src.core.config; por tenant, ver limiares_tenant)."""
+
+    janela_dias: int = ALERTAS_JANELA_DIAS
+    taxa_sucesso_minima: float = ALERTAS_TAXA_SUCESSO_MINIMA
+    pedidos_minimos_fornecedor: int = ALERTAS_PEDIDOS_MINIMOS_FORNECEDOR
+    percentil_critico: float = ALERTAS_PERCENTIL_CRITICO
+
+
+def _ler_limiares_tenant(texto: str) -> dict[str, Limiares]:
+    try:
+        por_tenant = json.loads(texto) if texto else {}
+    except ValueError:
+        return {}
+    campos = {f.name for f in fields(Limiares)}
+    limiares = {}
+    for tenant_id, valores in (por_tenant.items() if isinstance(por_tenant, dict) else ()):
+        if isinstance(valores, dict):
+            limiares[str(tenant_id)] = Limiares(**{k: v for k, v in valores.items() if k in campos})
+    return limiares
+
+
+_LIMIARES_TENANT = _ler_limiares_tenant(ALERTAS_LIMIARES_TENANT)
+
+
+def limiares_tenant(tenant_id: str | None) -> Limiares:
+    """Limiares das regras de alerta do tenant (os padrões, se ele não tem configuração própria)."""
+    return _LIMIARES_TENANT.get(str(tenant_id), Limiares())
+
+
+class _Termos:
+    """Termos compartilhados pelos predicados, calculados sob demanda e no máximo uma vez."""
+
+    def __init__(self, df: pd.DataFrame, hoje: pd.Timestamp, limiares: Limiares):
+        self.df = df
+        self.hoje = hoje
+        self.limiares = limiares
+
+    @cached_property
+    def pendente(self) -> np.ndarray:
+        return self.df["_pendente"].to_numpy(dtype=bool)
+
+    @cached_property
+    def atrasado(self) -> np.ndarray:
+        return self.df["_atrasado"].to_numpy(dtype=bool)
+
+    @cached_property
+    def vencimento(self) -> pd.Series:
+        return self.df["_due"]
+
+    @cached_property
+    def vence_de_hoje_em_diante(self) -> np.ndarray:
+        return (self.vencimento.notna() & (self.vencimento >= self.hoje)).to_numpy()
+
+    @cached_property
+    def vence_ate_a_janela(self) -> np.ndarray:
+        fim = self.hoje + timedelta(days=self.limiares.janela_dias)
+        return (self.vencimento.notna() & (self.vencimento <= fim)).to_numpy()
+
+    @cached_property
+    def valor(self) -> np.ndarray:
+        return self.df["_valor_total"].to_numpy(dtype=float)
+
+    @cached_property
+    def corte_valor(self) -> float:
+        """Percentil `percentil_critico` do valor de todos os pedidos (o máximo, com menos de 4)."""
+        valores = self.df["_valor_total"]
+        corte = valores.quantile(self.limiares.percentil_critico / 100) if len(valores) >= 4 else valores.max()
+        return float(corte)
+
+    @cached_property
+    def desempenho(self) -> pd.DataFrame | None:
+        """Pedidos, entregues, atrasados e taxa de sucesso por fornecedor (None sem fornecedor_nome)."""
+        df = self.df
+        if "fornecedor_nome" not in df.columns or not df["fornecedor_nome"].notna().any():
+            return None
+        grp = df.groupby("fornecedor_nome", dropna=False, observed=True).agg(
+            total_pedidos=(_coluna_contagem(df), "count"),
+            entregues=("entregue", "sum"),
+            atrasados=("_atrasado", "sum"),
+        ).reset_index()
+        return _com_taxa_sucesso(grp)
 
-    df.drop(columns=["_fornecedor_nome_base"], inplace=True, errors="ignore")
 
-    df_atrasados = df[df["_atrasado"]].copy()
-    if not df_atrasados.empty:
-        for _, pedido in df_atrasados.iterrows():
-            due_dt = pedido.get("_due")
-            dias_atraso = int((hoje - due_dt).days) if pd.notna(due_dt) else 0
+def _coluna_contagem(df: pd.DataFrame) -> str:
+    """Coluna contada em total_pedidos (o id do pedido; sem ele, a primeira)."""
+    return "id" if "id" in df.columns else df.columns[0]
 
-            alertas["pedidos_atrasados"].append({
-                "id": pedido.get("id", pedido.get("id_x")),
-                "nr_oc": pedido.get("nr_oc"),
-                "descricao": pedido.get("descricao", ""),
-                "fornecedor": pedido.get("fornecedor_nome", "N/A"),
-                "dias_atraso": dias_atraso,
-                "valor": float(pedido.get("_valor_total", 0.0)),
-                "departamento": pedido.get("departamento", "N/A"),
-            })
 
-    
-    data_limite = hoje + timedelta(days=3)
-    df_vencendo = df[
-        df["_pendente"] &
-        df["_due"].notna() &
-        (df["_due"] >= hoje) &
-        (df["_due"] <= data_limite)
-    ].copy()
-
-    if not df_vencendo.empty:
-        for _, pedido in df_vencendo.iterrows():
-            dias_restantes = int((pedido.get("_due") - hoje).days) if pd.notna(pedido.get("_due")) else 0
-            alertas["pedidos_vencendo"].append({
-                "id": pedido.get("id", pedido.get("id_x")),
-                "nr_oc": pedido.get("nr_oc"),
-                "descricao": pedido.get("descricao", ""),
-                "fornecedor": pedido.get("fornecedor_nome", "N/A"),
-                "dias_restantes": dias_restantes,
-                "valor": float(pedido.get("_valor_total", 0.0)),
-                "previsao": pedido.get("previsao_entrega") or pedido.get("prazo_entrega"),
-            })
+def _com_taxa_sucesso(grp: pd.DataFrame) -> pd.DataFrame:
+    grp["taxa_sucesso"] = ((grp["entregues"] - grp["atrasados"]) / grp["total_pedidos"] * 100).fillna(0)
+    return grp
 
-    # ============================
-    # 3) Fornecedores com Baixa Performance
-    # ============================
-    if "fornecedor_nome" in df.columns and df["fornecedor_nome"].notna().any():
-        id_col = "id" if "id" in df.columns else ("id_x" if "id_x" in df.columns else df.columns[0])
 
-        grp = df.groupby("fornecedor_nome", dropna=False).agg(
-            total_pedidos=(id_col, "count"),
-            entregues=("entregue", "sum"),
-            atrasados=("_atrasado", "sum"),
-        ).reset_index()
+@dataclass(frozen=True)
+class RegraPedido:
+    """
+    Alerta por pedido: `predicado(termos)` dá a máscara das linhas e
+    `projecao(linhas, hoje)` as colunas do card. Com corte_valor, entram só
+    os pedidos com valor >= termos.corte_valor (um agregado de todos os
+    pedidos, aplicado depois do predicado).
+    """
 
-        grp["taxa_sucesso"] = ((grp["entregues"] - grp["atrasados"]) / grp["total_pedidos"] * 100).fillna(0)
+    chave: str
+    predicado: Callable[[_Termos], np.ndarray]
+    projecao: Callable[[pd.DataFrame, pd.Timestamp], dict]
+    corte_valor: bool = False
 
-        baixa = grp[(grp["taxa_sucesso"] < 70) & (grp["total_pedidos"] >= 5)]
-        for _, f in baixa.iterrows():
-            alertas["fornecedores_baixa_performance"].append({
-                "fornecedor": f["fornecedor_nome"],
-                "taxa_sucesso": float(f["taxa_sucesso"]),
-                "total_pedidos": int(f["total_pedidos"]),
-                "atrasados": int(f["atrasados"]),
-            })
 
-    # ============================
-    # 4) Pedidos Críticos (Alto valor + urgente)
-    # ============================
-    valor_critico = df["_valor_total"].quantile(0.75) if len(df) >= 4 else df["_valor_total"].max()
-    df_criticos = df[
-        df["_pendente"] &
-        (df["_valor_total"] >= float(valor_critico)) &
-        df["_due"].notna() &
-        (df["_due"] <= data_limite)
-    ].copy()
-
-    if not df_criticos.empty:
-        for _, pedido in df_criticos.iterrows():
-            alertas["pedidos_criticos"].append({
-                "id": pedido.get("id", pedido.get("id_x")),
-                "nr_oc": pedido.get("nr_oc"),
-                "descricao": pedido.get("descricao", ""),
-                "valor": float(pedido.get("_valor_total", 0.0)),
-                "fornecedor": pedido.get("fornecedor_nome", "N/A"),
-                "previsao": pedido.get("previsao_entrega") or pedido.get("prazo_entrega"),
-                "departamento": pedido.get("departamento", "N/A"),
-            })
-
-    # Total
-    alertas["total"] = (
-        len(alertas["pedidos_atrasados"])
-        + len(alertas["pedidos_vencendo"])
-        + len(alertas["pedidos_criticos"])
-        + len(alertas["fornecedores_baixa_performance"])
-    )
+@dataclass(frozen=True)
+class RegraFornecedor:
+    """Alerta por fornecedor: `predicado(desempenho, limiares)` sobre _Termos.desempenho e a projeção do card."""
+
+    chave: str
+    predicado: Callable[[pd.DataFrame, Limiares], pd.Series]
+    projecao: Callable[[pd.DataFrame], dict]
+
+
+def _projecao_atrasados(df: pd.DataFrame, hoje: pd.Timestamp) -> dict:
+    return {
+        "id": _id_pedido(df),
+        "nr_oc": _campo(df, "nr_oc"),
+        "descricao": _campo(df, "descricao", ""),
+        "fornecedor": df["fornecedor_nome"],
+        "dias_atraso": (hoje.to_datetime64() - df["_due"].to_numpy()) // np.timedelta64(1, "D"),
+        "valor": df["_valor_total"].astype(float),
+        "departamento": _campo(df, "departamento", "N/A"),
+    }
+
+
+def _projecao_vencendo(df: pd.DataFrame, hoje: pd.Timestamp) -> dict:
+    return {
+        "id": _id_pedido(df),
+        "nr_oc": _campo(df, "nr_oc"),
+        "descricao": _campo(df, "descricao", ""),
+        "fornecedor": df["fornecedor_nome"],
+        "dias_restantes": (df["_due"].to_numpy() - hoje.to_datetime64()) // np.timedelta64(1, "D"),
+        "valor": df["_valor_total"].astype(float),
+        "previsao": _previsao(df),
+    }
+
+
+def _projecao_criticos(df: pd.DataFrame, hoje: pd.Timestamp) -> dict:
+    return {
+        "id": _id_pedido(df),
+        "nr_oc": _campo(df, "nr_oc"),
+        "descricao": _campo(df, "descricao", ""),
+        "valor": df["_valor_total"].astype(float),
+        "fornecedor": df["fornecedor_nome"],
+        "previsao": _previsao(df),
+        "departamento": _campo(df, "departamento", "N/A"),
+    }
+
+
+def _projecao_fornecedores(grp: pd.DataFrame) -> dict:
+    return {
+        "fornecedor": grp["fornecedor_nome"],
+        "taxa_sucesso": grp["taxa_sucesso"].astype(float),
+        "total_pedidos": grp["total_pedidos"].astype(np.int64),
+        "atrasados": grp["atrasados"].astype(np.int64),
+    }
+
+
+# Na ordem das chaves do resultado de calcular_alertas.
+REGRAS_ALERTA = (
+    RegraPedido("pedidos_atrasados", lambda t: t.atrasado, _projecao_atrasados),
+    RegraPedido(
+        "pedidos_vencendo",
+        lambda t: t.pendente & t.vence_de_hoje_em_diante & t.vence_ate_a_janela,
+        _projecao_vencendo,
+    ),
+    RegraFornecedor(
+        "fornecedores_baixa_performance",
+        lambda d, lim: (d["taxa_sucesso"] < lim.taxa_sucesso_minima) & (d["total_pedidos"] >= lim.pedidos_minimos_fornecedor),
+        _projecao_fornecedores,
+    ),
+    RegraPedido("pedidos_criticos", lambda t: t.pendente & t.vence_ate_a_janela, _projecao_criticos, corte_valor=True),
+)
+
+
+def _avaliar(termos: _Termos, regras=REGRAS_ALERTA) -> dict:
+    """
+    Seleção de cada regra, numa passada: máscara booleana (regras de pedido)
+    ou frame de desempenho filtrado (regras de fornecedor; None sem fornecedores).
+    """
+    selecoes = {}
+    for regra in regras:
+        if isinstance(regra, RegraFornecedor):
+            desempenho = termos.desempenho
+            selecoes[regra.chave] = (
+                desempenho[regra.predicado(desempenho, termos.limiares)] if desempenho is not None else None
+            )
+        else:
+            mascara = np.asarray(regra.predicado(termos), dtype=bool)
+            if regra.corte_valor:
+                mascara = mascara & (termos.valor >= termos.corte_valor)
+            selecoes[regra.chave] = mascara
+    return selecoes
+
+
+def _cards(regra, df: pd.DataFrame, selecao, hoje: pd.Timestamp) -> list[dict]:
+    if selecao is None:
+        return []
+    if isinstance(regra, RegraFornecedor):
+        return _registros(selecao, regra.projecao(selecao))
+    linhas = df[selecao]
+    return _registros(linhas, regra.projecao(linhas, hoje))
+
+
+def _somar_total(alertas: dict) -> dict:
+    alertas["total"] = sum(len(alertas[regra.chave]) for regra in REGRAS_ALERTA)
+    return alertas
+
+
+def _alertas_vazios() -> dict:
+    return {**{regra.chave: [] for regra in REGRAS_ALERTA}, "total": 0}
+
+
+def calcular_alertas(
+    df_pedidos: pd.DataFrame,
+    df_fornecedores: pd.DataFrame | None = None,
+    limiares: Limiares | None = None,
+):
+    """Calcula todos os tipos de alertas do sistema (uma entrada por regra de REGRAS_ALERTA).
+
+    Compatível com chamadas antigas (apenas df_pedidos) e novas (df_pedidos, df_fornecedores).
+    Regra de vencimento/atraso: previsao_entrega > prazo_entrega > data_oc + 30 dias.
+    limiares: os do tenant (limiares_tenant); sem eles, os padrões.
+    """
+    hoje = pd.Timestamp.now().normalize()
+
+    alertas = _alertas_vazios()
+
+    if df_pedidos is None or df_pedidos.empty:
+        return alertas
+
+    df = _preparar(df_pedidos, df_fornecedores, hoje)
+    selecoes = _avaliar(_Termos(df, hoje, limiares or Limiares()))
+    for regra in REGRAS_ALERTA:
+        alertas[regra.chave] = _cards(regra, df, selecoes[regra.chave], hoje)
+
+    return _somar_total(alertas)
+
+
+def contar_alertas(
+    df_pedidos: pd.DataFrame,
+    df_fornecedores: pd.DataFrame | None = None,
+    limiares: Limiares | None = None,
+) -> dict:
+    """
+    Só as quantidades de calcular_alertas (mesmas chaves, com int no lugar das
+    listas), para o cartão da sidebar: as mesmas máscaras, sem montar os cards.
+    """
+    contagem = {chave: 0 for chave in _alertas_vazios()}
+    if df_pedidos is None or df_pedidos.empty:
+        return contagem
+
+    hoje = pd.Timestamp.now().normalize()
+    selecoes = _avaliar(_Termos(_preparar(df_pedidos, df_fornecedores, hoje), hoje, limiares or Limiares()))
+    for regra in REGRAS_ALERTA:
+        selecao = selecoes[regra.chave]
+        if selecao is not None:
+            contagem[regra.chave] = len(selecao) if isinstance(regra, RegraFornecedor) else int(selecao.sum())
+    contagem["total"] = sum(v for k, v in contagem.items() if k != "total")
+    return contagem
+
+
+# ============================
+# ALERTAS INCREMENTAIS
+# ============================
+#
+# Uma alteração em um pedido não muda os alertas dos demais, a não ser por
+# dois agregados: os contadores do fornecedor dele e o percentil do valor
+# (corte dos críticos). AlertasIncrementais guarda, por pedido, os cards em
+# que ele entra e a sua contribuição para esses agregados: aplicar() recalcula
+# só as linhas alteradas/removidas. O percentil sai de uma lista ordenada em
+# baldes (k-ésimo valor sem reordenar tudo). O resultado é o mesmo de
+# calcular_alertas sobre o frame novo, inclusive na ordem dos cards: as
+# linhas alteradas vão para o fim, como no delta de carregar_pedidos.
+
+_BALDE = 512
+_MAX_ESTADOS = 16
+
+
+class _ListaOrdenada:
+    """Multiconjunto ordenado em baldes (listas ordenadas de até 2*_BALDE itens), com acesso ao k-ésimo valor."""
+
+    def __init__(self, valores=()):
+        ordenados = sorted(valores)
+        self._baldes = [ordenados[i:i + _BALDE] for i in range(0, len(ordenados), _BALDE)]
+        self._maximos = [b[-1] for b in self._baldes]
+        self._n = len(ordenados)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def adicionar(self, valor) -> None:
+        self._n += 1
+        if not self._baldes:
+            self._baldes.append([valor])
+            self._maximos.append(valor)
+            return
+        i = min(bisect.bisect_left(self._maximos, valor), len(self._baldes) - 1)
+        balde = self._baldes[i]
+        bisect.insort(balde, valor)
+        self._maximos[i] = balde[-1]
+        if len(balde) > 2 * _BALDE:
+            self._baldes[i:i + 1] = [balde[:_BALDE], balde[_BALDE:]]
+            self._maximos[i:i + 1] = [balde[_BALDE - 1], balde[-1]]
+
+    def remover(self, valor) -> None:
+        i = bisect.bisect_left(self._maximos, valor)
+        balde = self._baldes[i] if i < len(self._baldes) else []
+        j = bisect.bisect_left(balde, valor)
+        if j == len(balde) or balde[j] != valor:
+            raise ValueError(f"{valor!r} não está na lista")
+        del balde[j]
+        self._n -= 1
+        if balde:
+            self._maximos[i] = balde[-1]
+        else:
+            del self._baldes[i], self._maximos[i]
+
+    def __getitem__(self, k: int):
+        if k < 0:
+            k += self._n
+        if not 0 <= k < self._n:
+            raise IndexError(k)
+        for balde in self._baldes:
+            if k < len(balde):
+                return balde[k]
+            k -= len(balde)
+
+    def quantil(self, q: float) -> float:
+        """Igual, bit a bit, a Series.quantile(q) sobre os mesmos valores."""
+        n = self._n
+        # Series.quantile chama np.percentile(valores, q * 100), que divide por
+        # 100 de novo, e q * 100 / 100 nem sempre é q (0.007 vira
+        # 0.007000000000000001): o arredondamento é repetido aqui de propósito,
+        # para o crítico incremental sair igual ao do cálculo completo.
+        q = q * 100 / 100
+        # Método "linear" do numpy: índice virtual (n - 1) * q e a interpolação
+        # do _lerp (pela ponta de cima quando t >= 0.5).
+        posicao = (n - 1) * q
+        k = int(np.floor(posicao))
+        t = posicao - k
+        a, b = self[k], self[min(k + 1, n - 1)]
+        diferenca = b - a
+        return b - diferenca * (1 - t) if t >= 0.5 else a + diferenca * t
+
+
+class AlertasIncrementais:
+    """
+    Alertas de um tenant mantidos por pedido: aplicar() atualiza só as linhas
+    alteradas; atualizar() descobre quais são comparando id/atualizado_em com o
+    frame anterior. Vale para um dia, um frame de fornecedores e um conjunto de
+    limiares: quando um deles muda, monte um novo.
+    """
+
+    def __init__(
+        self,
+        df_pedidos: pd.DataFrame,
+        df_fornecedores: pd.DataFrame | None = None,
+        hoje=None,
+        limiares: Limiares | None = None,
+    ):
+        self.hoje = pd.Timestamp(hoje).normalize() if hoje is not None else pd.Timestamp.now().normalize()
+        self.limiares = limiares or Limiares()
+        self._fornecedores = df_fornecedores
+        self._linhas: dict = {}        # id -> (valor, fornecedor, conta, entregue, atrasado)
+        # por regra de pedido: id -> card (na ordem do frame); com corte_valor, id -> (valor, card)
+        self._membros: dict[str, dict] = {r.chave: {} for r in REGRAS_ALERTA if isinstance(r, RegraPedido)}
+        self._por_fornecedor: dict = {}  # nome -> [linhas, total_pedidos, entregues, atrasados]
+        self._valores = _ListaOrdenada()
+        self._chaves = pd.Series(dtype=object)  # atualizado_em por id, na ordem do frame
+        self._inserir(df_pedidos)
+        self._valores = _ListaOrdenada(v[0] for v in self._linhas.values())
+        self._chaves = self._versoes(df_pedidos)
+
+    @staticmethod
+    def suporta(df_pedidos: pd.DataFrame) -> bool:
+        """O frame tem id único e atualizado_em (o que o estado usa para casar as linhas)."""
+        return {"id", "atualizado_em"} <= set(df_pedidos.columns) and df_pedidos["id"].is_unique
+
+    @staticmethod
+    def _versoes(df: pd.DataFrame) -> pd.Series:
+        return pd.Series(df["atualizado_em"].array, index=pd.Index(df["id"].astype(object)))
+
+    def _inserir(self, df_pedidos: pd.DataFrame) -> None:
+        if df_pedidos.empty:
+            return
+        ids = df_pedidos["id"].tolist()
+        df = _preparar(df_pedidos, self._fornecedores, self.hoje)
+        df.index = ids  # o merge com fornecedores devolve as linhas na mesma ordem
+        termos = _Termos(df, self.hoje, self.limiares)
+
+        contribuicoes = pd.DataFrame({
+            "valor": termos.valor,
+            "fornecedor": df["fornecedor_nome"].to_numpy(),
+            "conta": df[_coluna_contagem(df)].notna().to_numpy(),
+            "entregue": df["entregue"].astype(bool).to_numpy(),
+            "atrasado": termos.atrasado,
+        })
+        self._linhas.update(zip(ids, zip(*(contribuicoes[c].tolist() for c in contribuicoes.columns))))
+        grp = contribuicoes.groupby("fornecedor", sort=False)[["conta", "entregue", "atrasado"]].agg(["size", "sum"])
+        for nome, linhas, conta, entregues, atrasados in zip(
+            grp.index, grp[("conta", "size")], grp[("conta", "sum")],
+            grp[("entregue", "sum")], grp[("atrasado", "sum")],
+        ):
+            contadores = self._por_fornecedor.setdefault(nome, [0, 0, 0, 0])
+            contadores[0] += int(linhas)
+            contadores[1] += int(conta)
+            contadores[2] += int(entregues)
+            contadores[3] += int(atrasados)
+
+        # Regras de pedido sem o corte de valor (que depende de todos os pedidos e
+        # é aplicado em alertas()); as de fornecedor saem dos contadores.
+        for regra in REGRAS_ALERTA:
+            if isinstance(regra, RegraFornecedor):
+                continue
+            linhas = df[np.asarray(regra.predicado(termos), dtype=bool)]
+            cards = _registros(linhas, regra.projecao(linhas, self.hoje))
+            if regra.corte_valor:
+                cards = zip(linhas["_valor_total"].astype(float).tolist(), cards)
+            self._membros[regra.chave].update(zip(linhas.index, cards))
+
+    def _remover(self, id_pedido) -> None:
+        linha = self._linhas.pop(id_pedido, None)
+        if linha is None:
+            return
+        self._valores.remover(linha[0])
+        contadores = self._por_fornecedor[linha[1]]
+        contadores[0] -= 1
+        contadores[1] -= linha[2]
+        contadores[2] -= linha[3]
+        contadores[3] -= linha[4]
+        if not contadores[0]:
+            del self._por_fornecedor[linha[1]]
+        for membros in self._membros.values():
+            membros.pop(id_pedido, None)
+
+    def _substituir(self, alterados: pd.DataFrame, removidos) -> None:
+        ids = alterados["id"].tolist() if not alterados.empty else []
+        for id_pedido in [*removidos, *ids]:
+            self._remover(id_pedido)
+        self._inserir(alterados)
+        for id_pedido in ids:
+            self._valores.adicionar(self._linhas[id_pedido][0])
+
+    def aplicar(self, alterados: pd.DataFrame, removidos=()) -> None:
+        """
+        Tira os pedidos `removidos` (ids) e substitui/acrescenta as linhas de
+        `alterados` (mesmas colunas do frame inicial), que vão para o fim.
+        """
+        removidos = list(removidos)
+        self._substituir(alterados, removidos)
+        saem = self._chaves.index.isin(removidos + (alterados["id"].tolist() if not alterados.empty else []))
+        self._chaves = pd.concat([self._chaves[~saem], self._versoes(alterados)]) if not alterados.empty else self._chaves[~saem]
+
+    def atualizar(self, df_pedidos: pd.DataFrame) -> bool:
+        """
+        Leva o estado ao frame `df_pedidos` (o do carregamento seguinte).
+        False se não deu para casar as linhas (ordem diferente, mudança grande
+        demais): aí o estado não foi alterado e deve ser montado de novo.
+        """
+        if not self.suporta(df_pedidos):
+            return False
+        novas = self._versoes(df_pedidos)
+        if novas.dtype != self._chaves.dtype and len(self._chaves):
+            return False
+        posicoes = self._chaves.index.get_indexer(novas.index)
+        existia = posicoes >= 0
+        anteriores = self._chaves.array.take(posicoes, allow_fill=True)
+        mudou = ~existia | np.asarray(anteriores != novas.array, dtype=bool)
+
+        # Só as linhas do fim podem ter mudado (delta) e as demais precisam
+        # estar na mesma ordem relativa de antes.
+        mantidas = int((~mudou).sum())
+        if mudou.sum() > len(novas) // 2 or mudou[:mantidas].any() or (np.diff(posicoes[:mantidas]) <= 0).any():
+            return False
+
+        presentes = np.zeros(len(self._chaves), dtype=bool)
+        presentes[posicoes[existia]] = True
+        self._substituir(df_pedidos.iloc[mantidas:], self._chaves.index[~presentes].tolist())
+        self._chaves = novas
+        return True
+
+    def _desempenho(self) -> pd.DataFrame:
+        nomes = sorted(self._por_fornecedor)  # a ordem do groupby
+        contadores = np.array([self._por_fornecedor[n][1:] for n in nomes], dtype=np.int64).reshape(-1, 3)
+        return _com_taxa_sucesso(pd.DataFrame({
+            "fornecedor_nome": pd.Series(nomes, dtype=object),
+            "total_pedidos": contadores[:, 0],
+            "entregues": contadores[:, 1],
+            "atrasados": contadores[:, 2],
+        }))
+
+    def alertas(self) -> dict:
+        """Os alertas atuais, no formato de calcular_alertas (não altere os cards)."""
+        alertas = _alertas_vazios()
+        if not self._linhas:
+            return alertas
+
+        n = len(self._valores)
+        corte = self._valores.quantil(self.limiares.percentil_critico / 100) if n >= 4 else self._valores[n - 1]
+        desempenho = None
+        for regra in REGRAS_ALERTA:
+            if isinstance(regra, RegraFornecedor):
+                if desempenho is None:
+                    desempenho = self._desempenho()
+                selecao = desempenho[regra.predicado(desempenho, self.limiares)]
+                alertas[regra.chave] = _registros(selecao, regra.projecao(selecao))
+            elif regra.corte_valor:
+                alertas[regra.chave] = [card for valor, card in self._membros[regra.chave].values() if valor >= corte]
+            else:
+                alertas[regra.chave] = list(self._membros[regra.chave].values())
 
+        return _somar_total(alertas)
+
+
+_estados: OrderedDict[str, tuple[tuple, AlertasIncrementais]] = OrderedDict()
+_estados_lock = threading.Lock()
+_contadores_incrementais = {"incrementais": 0, "completos": 0}
+
+
+def alertas_incrementais(tenant_id: str, df_pedidos: pd.DataFrame, df_fornecedores: pd.DataFrame | None = None) -> dict:
+    """
+    calcular_alertas para os frames do armazém, com os limiares do tenant,
+    reaproveitando o estado dele: depois de uma recarga, só os pedidos
+    alterados são recalculados.
+    Frames de fora do armazém (sem geração) caem no cálculo completo.
+    """
+    limiares = limiares_tenant(tenant_id)
+    fornecedores = store.geracao(df_fornecedores) if df_fornecedores is not None else 0
+    if (
+        df_pedidos is None or df_pedidos.empty
+        or store.geracao(df_pedidos) is None or fornecedores is None
+        or not AlertasIncrementais.suporta(df_pedidos)
+    ):
+        return calcular_alertas(df_pedidos, df_fornecedores, limiares)
+
+    chave = (pd.Timestamp.now().normalize(), fornecedores, limiares)
+    with _estados_lock:
+        item = _estados.pop(tenant_id, None)  # em uso: sai do LRU até terminar
+    incremental = item is not None and item[0] == chave and item[1].atualizar(df_pedidos)
+    estado = item[1] if incremental else AlertasIncrementais(df_pedidos, df_fornecedores, chave[0], limiares)
+    alertas = estado.alertas()
+
+    with _estados_lock:
+        _contadores_incrementais["incrementais" if incremental else "completos"] += 1
+        _estados[tenant_id] = (chave, estado)
+        while len(_estados) > _MAX_ESTADOS:
+            _estados.popitem(last=False)
     return alertas
 
+
+def estatisticas_incrementais() -> dict:
+    """Quantas vezes os alertas saíram do estado incremental e quantas foram montados do zero."""
+    with _estados_lock:
+        return dict(_contadores_incrementais, tenants=len(_estados))
+
+
 def exibir_badge_alertas(alertas: dict):
     total = alertas.get("total", 0)
 
@@ -284,128 +751,182 @@ def exibir_badge_alertas(alertas: dict):
         unsafe_allow_html=True,
     )
 
-def exibir_painel_alertas(alertas: dict, formatar_moeda_br):
+def exibir_painel_alertas(alertas: dict, formatar_moeda_br, hidratar=None, limiares: Limiares | None = None):
     """Alias para compatibilidade com o app.py."""
-    return exibir_alertas_completo(alertas, formatar_moeda_br)
+    return exibir_alertas_completo(alertas, formatar_moeda_br, hidratar, limiares)
 
-def criar_card_pedido(pedido: dict, tipo: str, formatar_moeda_br):
-    """Renderiza um card de pedido (atrasado, vencendo ou crítico)."""
-    
-    def safe_text(txt):
-        """Previne problemas com HTML."""
-        if not txt:
-            return ""
-        return html.escape(str(txt))
-    
-    nr_oc_txt = safe_text(pedido.get("nr_oc", "N/A"))
-    desc_txt = safe_text(pedido.get("descricao", ""))
-    fornecedor_txt = safe_text(pedido.get("fornecedor", "N/A"))
+
+def _com_descricao(pedidos: list[dict], hidratar) -> list[dict]:
+    """Preenche 'descricao' dos cards que vão ser exibidos (alertas vindos do frame enxuto)."""
+    if hidratar is None:
+        return pedidos
+    faltando = [p.get("id") for p in pedidos if not p.get("descricao") and p.get("id")]
+    if not faltando:
+        return pedidos
+    textos = hidratar(faltando)
+    return [
+        {**p, "descricao": (textos.get(str(p.get("id"))) or {}).get("descricao") or ""}
+        if not p.get("descricao") else p
+        for p in pedidos
+    ]
+
+
+# Cards por página nas tabs de alertas: cada página sai num único bloco HTML
+_CARDS_POR_PAGINA = 50
+
+
+def _texto_card(txt) -> str:
+    """Previne problemas com HTML."""
+    if not txt:
+        return ""
+    return html.escape(str(txt))
+
+
+def _html_card_pedido(pedido: dict, tipo: str, formatar_moeda_br) -> str:
+    """HTML de um card de pedido (atrasado, vencendo ou crítico)."""
+    nr_oc_txt = _texto_card(pedido.get("nr_oc", "N/A"))
+    desc_txt = _texto_card(pedido.get("descricao", ""))
+    fornecedor_txt = _texto_card(pedido.get("fornecedor", "N/A"))
     valor = pedido.get("valor", 0.0)
-    
+
     # Card de acordo com o tipo
     if tipo == "atrasado":
         dias = pedido.get("dias_atraso", 0)
-        dept = safe_text(pedido.get("departamento", "N/A"))
-        
-        with st.container():
-            st.markdown(
-                f"""
-                <div style='border-left: 4px solid #dc2626; padding: 12px; margin-bottom: 10px; background-color: rgba(220, 38, 38, 0.10); border-radius: 10px;'>
-                    <p style='margin: 0; font-size: 14px; color: #dc2626; font-weight: 600;'>🔴 OC: {nr_oc_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Descrição:</strong> {desc_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Fornecedor:</strong> {fornecedor_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Departamento:</strong> {dept}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Valor:</strong> {formatar_moeda_br(valor)}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: #dc2626; font-weight: 600;'><strong>⏰ Atrasado há {dias} dia(s)</strong></p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-    
-    elif tipo == "vencendo":
+        dept = _texto_card(pedido.get("departamento", "N/A"))
+        return f"""
+<div style='border-left: 4px solid #dc2626; padding: 12px; margin-bottom: 10px; background-color: rgba(220, 38, 38, 0.10); border-radius: 10px;'>
+    <p style='margin: 0; font-size: 14px; color: #dc2626; font-weight: 600;'>🔴 OC: {nr_oc_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Descrição:</strong> {desc_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Fornecedor:</strong> {fornecedor_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Departamento:</strong> {dept}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Valor:</strong> {formatar_moeda_br(valor)}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: #dc2626; font-weight: 600;'><strong>⏰ Atrasado há {dias} dia(s)</strong></p>
+</div>""".strip()
+
+    if tipo == "vencendo":
         dias = pedido.get("dias_restantes", 0)
-        prev = safe_text(pedido.get("previsao", "N/A"))
-        
-        with st.container():
-            st.markdown(
-                f"""
-                <div style='border-left: 4px solid #f59e0b; padding: 12px; margin-bottom: 10px; background-color: rgba(245, 158, 11, 0.10); border-radius: 10px;'>
-                    <p style='margin: 0; font-size: 14px; color: #f59e0b; font-weight: 600;'>⏰ OC: {nr_oc_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Descrição:</strong> {desc_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Fornecedor:</strong> {fornecedor_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Valor:</strong> {formatar_moeda_br(valor)}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Previsão:</strong> {prev}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: #f59e0b; font-weight: 600;'><strong>⏳ Vence em {dias} dia(s)</strong></p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-    
-    elif tipo == "critico":
-        prev = safe_text(pedido.get("previsao", "N/A"))
-        dept = safe_text(pedido.get("departamento", "N/A"))
-        
-        with st.container():
-            st.markdown(
-                f"""
-                <div style='border-left: 4px solid #7c3aed; padding: 12px; margin-bottom: 10px; background-color: rgba(124, 58, 237, 0.10); border-radius: 10px;'>
-                    <p style='margin: 0; font-size: 14px; color: #7c3aed; font-weight: 600;'>🚨 OC: {nr_oc_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Descrição:</strong> {desc_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Fornecedor:</strong> {fornecedor_txt}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Departamento:</strong> {dept}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Previsão:</strong> {prev}</p>
-                    <p style='margin: 4px 0; font-size: 13px; color: #7c3aed; font-weight: 600;'><strong>💰 Valor: {formatar_moeda_br(valor)}</strong></p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+        prev = _texto_card(pedido.get("previsao", "N/A"))
+        return f"""
+<div style='border-left: 4px solid #f59e0b; padding: 12px; margin-bottom: 10px; background-color: rgba(245, 158, 11, 0.10); border-radius: 10px;'>
+    <p style='margin: 0; font-size: 14px; color: #f59e0b; font-weight: 600;'>⏰ OC: {nr_oc_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Descrição:</strong> {desc_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Fornecedor:</strong> {fornecedor_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Valor:</strong> {formatar_moeda_br(valor)}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Previsão:</strong> {prev}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: #f59e0b; font-weight: 600;'><strong>⏳ Vence em {dias} dia(s)</strong></p>
+</div>""".strip()
+
+    if tipo == "critico":
+        prev = _texto_card(pedido.get("previsao", "N/A"))
+        dept = _texto_card(pedido.get("departamento", "N/A"))
+        return f"""
+<div style='border-left: 4px solid #7c3aed; padding: 12px; margin-bottom: 10px; background-color: rgba(124, 58, 237, 0.10); border-radius: 10px;'>
+    <p style='margin: 0; font-size: 14px; color: #7c3aed; font-weight: 600;'>🚨 OC: {nr_oc_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Descrição:</strong> {desc_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Fornecedor:</strong> {fornecedor_txt}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Departamento:</strong> {dept}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Previsão:</strong> {prev}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: #7c3aed; font-weight: 600;'><strong>💰 Valor: {formatar_moeda_br(valor)}</strong></p>
+</div>""".strip()
+
+    return ""
+
+
+def _nivel_fornecedor(taxa: float) -> tuple[str, str, str]:
+    """(cor, nível, fundo) do card de acordo com a taxa de sucesso."""
+    if taxa < 40:
+        return "#dc2626", "CRÍTICO", "rgba(220, 38, 38, 0.10)"
+    if taxa < 55:
+        return "#f59e0b", "GRAVE", "rgba(245, 158, 11, 0.10)"
+    return "#eab308", "ATENÇÃO", "rgba(234, 179, 8, 0.10)"
 
 
-def criar_card_fornecedor(fornecedor: dict, formatar_moeda_br):
-    """Renderiza um card de fornecedor com baixa performance."""
-    
-    def safe_text(txt):
-        """Previne problemas com HTML."""
-        if not txt:
-            return ""
-        return html.escape(str(txt))
-    
-    nome = safe_text(fornecedor.get("fornecedor", "N/A"))
+def _html_card_fornecedor(fornecedor: dict) -> str:
+    """HTML de um card de fornecedor com baixa performance."""
+    nome = _texto_card(fornecedor.get("fornecedor", "N/A"))
     taxa = max(0, min(100, fornecedor.get("taxa_sucesso", 0)))
     total = fornecedor.get("total_pedidos", 0)
     atrasados = fornecedor.get("atrasados", 0)
-    
-    # Determinar cor e nível de acordo com a taxa
-    if taxa < 40:
-        cor = "#dc2626"
-        nivel = "CRÍTICO"
-        bg_color = "rgba(220, 38, 38, 0.10)"
-    elif taxa < 55:
-        cor = "#f59e0b"
-        nivel = "GRAVE"
-        bg_color = "rgba(245, 158, 11, 0.10)"
-    else:
-        cor = "#eab308"
-        nivel = "ATENÇÃO"
-        bg_color = "rgba(234, 179, 8, 0.10)"
-    
-    with st.container():
-        st.markdown(
-            f"""
-            <div style='border-left: 4px solid {cor}; padding: 12px; margin-bottom: 10px; background-color: {bg_color}; border-radius: 10px;'>
-                <p style='margin: 0; font-size: 14px; color: {cor}; font-weight: 600;'>📉 {nome}</p>
-                <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Nível de Risco:</strong> <span style='color: {cor}; font-weight: 600;'>{nivel}</span></p>
-                <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Taxa de Sucesso:</strong> {taxa:.1f}%</p>
-                <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Total de Pedidos:</strong> {total}</p>
-                <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Pedidos Atrasados:</strong> {atrasados}</p>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    cor, nivel, bg_color = _nivel_fornecedor(taxa)
+    return f"""
+<div style='border-left: 4px solid {cor}; padding: 12px; margin-bottom: 10px; background-color: {bg_color}; border-radius: 10px;'>
+    <p style='margin: 0; font-size: 14px; color: {cor}; font-weight: 600;'>📉 {nome}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Nível de Risco:</strong> <span style='color: {cor}; font-weight: 600;'>{nivel}</span></p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Taxa de Sucesso:</strong> {taxa:.1f}%</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Total de Pedidos:</strong> {total}</p>
+    <p style='margin: 4px 0; font-size: 13px; color: rgba(229,231,235,0.92);'><strong>Pedidos Atrasados:</strong> {atrasados}</p>
+</div>""".strip()
+
+
+def criar_card_pedido(pedido: dict, tipo: str, formatar_moeda_br):
+    """Renderiza um card de pedido (atrasado, vencendo ou crítico)."""
+    st.markdown(_html_card_pedido(pedido, tipo, formatar_moeda_br), unsafe_allow_html=True)
+
+
+def criar_card_fornecedor(fornecedor: dict, formatar_moeda_br):
+    """Renderiza um card de fornecedor com baixa performance."""
+    st.markdown(_html_card_fornecedor(fornecedor), unsafe_allow_html=True)
+
+
+def _paginar(itens: list, chave: str, filtros=None) -> list:
+    """
+    Controles de página (como na Consulta de Pedidos) e a fatia da página
+    atual de `itens`, já filtrados e ordenados. Volta à primeira página
+    quando `filtros` (os valores dos filtros/ordem da tab) mudam.
+    """
+    total = len(itens)
+    total_paginas = max(1, math.ceil(total / _CARDS_POR_PAGINA))
+    chave_pagina, chave_filtros = f"{chave}_pagina", f"{chave}_filtros"
+    if st.session_state.get(chave_filtros) != filtros:
+        st.session_state[chave_filtros] = filtros
+        st.session_state[chave_pagina] = 1
+    pag_atual = min(int(st.session_state.get(chave_pagina, 1)), total_paginas)
+    st.session_state[chave_pagina] = pag_atual
+
+    if total_paginas > 1:
+        nav1, nav2, nav3, nav4, nav5 = st.columns([1, 1, 2, 1, 1])
+        with nav1:
+            if st.button("⏮️", key=f"{chave}_primeira", use_container_width=True, disabled=(pag_atual <= 1)):
+                st.session_state[chave_pagina] = 1
+                st.rerun()
+        with nav2:
+            if st.button("⬅️", key=f"{chave}_anterior", use_container_width=True, disabled=(pag_atual <= 1)):
+                st.session_state[chave_pagina] = max(1, pag_atual - 1)
+                st.rerun()
+        with nav3:
+            st.markdown(
+                f"<div style='text-align:center; padding-top: 8px;'><b>Página {pag_atual} de {total_paginas}</b></div>",
+                unsafe_allow_html=True,
+            )
+        with nav4:
+            if st.button("➡️", key=f"{chave}_proxima", use_container_width=True, disabled=(pag_atual >= total_paginas)):
+                st.session_state[chave_pagina] = min(total_paginas, pag_atual + 1)
+                st.rerun()
+        with nav5:
+            if st.button("⏭️", key=f"{chave}_ultima", use_container_width=True, disabled=(pag_atual >= total_paginas)):
+                st.session_state[chave_pagina] = total_paginas
+                st.rerun()
+
+    i0 = (pag_atual - 1) * _CARDS_POR_PAGINA
+    i1 = i0 + _CARDS_POR_PAGINA
+    if total_paginas > 1:
+        st.caption(f"Cards {i0 + 1}–{min(i1, total)} de {total}.")
+    return itens[i0:i1]
+
 
+def _exibir_cards(html_cards) -> None:
+    """Os cards da página num único st.markdown (um elemento no navegador, não um por card)."""
+    st.markdown("\n".join(html_cards), unsafe_allow_html=True)
 
-def exibir_alertas_completo(alertas: dict, formatar_moeda_br):
-    """Exibe a página completa de alertas com filtros e tabs."""
+
+def exibir_alertas_completo(alertas: dict, formatar_moeda_br, hidratar=None, limiares: Limiares | None = None):
+    """Exibe a página completa de alertas com filtros e tabs.
+
+    hidratar (opcional): função ids -> {id: {"descricao": ...}} usada para buscar
+    a descrição só dos cards exibidos.
+    limiares (opcional): os usados no cálculo, para os textos da página.
+    """
+    limiares = limiares or Limiares()
 
     def safe_text(txt):
         """Previne problemas com HTML e valores None/NaN."""
@@ -475,7 +996,7 @@ def exibir_alertas_completo(alertas: dict, formatar_moeda_br):
         st.markdown(
             f"""
             <div class="fu-kpi">
-              <p class="fu-kpi-title">⏰ Vencendo em 3 dias</p>
+              <p class="fu-kpi-title">⏰ Vencendo em {limiares.janela_dias} dias</p>
               <p class="fu-kpi-value">{v}</p>
               <p class="fu-kpi-sub">{'⚡ Atenção' if v else '✅ Sem urgências'}</p>
             </div>
@@ -561,28 +1082,30 @@ def exibir_alertas_completo(alertas: dict, formatar_moeda_br):
                     key="filtro_atrasados_fornecedor",
                 )
 
-            if "Dias de Atraso (maior primeiro)" in ordem:
-                pedidos_filtrados = sorted(alertas["pedidos_atrasados"], key=lambda x: x.get("dias_atraso", 0), reverse=True)
-            elif "Dias de Atraso (menor primeiro)" in ordem:
-                pedidos_filtrados = sorted(alertas["pedidos_atrasados"], key=lambda x: x.get("dias_atraso", 0))
-            elif "Valor (maior primeiro)" in ordem:
-                pedidos_filtrados = sorted(alertas["pedidos_atrasados"], key=lambda x: x.get("valor", 0), reverse=True)
-            elif "Valor (menor primeiro)" in ordem:
-                pedidos_filtrados = sorted(alertas["pedidos_atrasados"], key=lambda x: x.get("valor", 0))
-            else:
-                pedidos_filtrados = alertas["pedidos_atrasados"]
-
+            # Filtra antes de ordenar: a ordenação e a página só veem o que sobrou
+            pedidos_filtrados = alertas["pedidos_atrasados"]
             if dept_filtro:
                 pedidos_filtrados = [p for p in pedidos_filtrados if safe_text(p.get("departamento", "N/A")) in dept_filtro]
 
             if fornecedor_filtro:
                 pedidos_filtrados = [p for p in pedidos_filtrados if safe_text(p.get("fornecedor", "N/A")) in fornecedor_filtro]
 
+            if "Dias de Atraso (maior primeiro)" in ordem:
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get("dias_atraso", 0), reverse=True)
+            elif "Dias de Atraso (menor primeiro)" in ordem:
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get("dias_atraso", 0))
+            elif "Valor (maior primeiro)" in ordem:
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get("valor", 0), reverse=True)
+            elif "Valor (menor primeiro)" in ordem:
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get("valor", 0))
+
             st.caption(f"📊 Mostrando {len(pedidos_filtrados)} de {len(alertas['pedidos_atrasados'])} pedidos atrasados")
 
             if pedidos_filtrados:
-                for pedido in pedidos_filtrados:
-                    criar_card_pedido(pedido, "atrasado", formatar_moeda_br)
+                pagina = _paginar(pedidos_filtrados, "alertas_atrasados", (ordem, dept_filtro, fornecedor_filtro))
+                _exibir_cards(
+                    _html_card_pedido(pedido, "atrasado", formatar_moeda_br) for pedido in _com_descricao(pagina, hidratar)
+                )
             else:
                 st.info("📭 Nenhum pedido atrasado corresponde aos filtros selecionados")
         else:
@@ -590,7 +1113,7 @@ def exibir_alertas_completo(alertas: dict, formatar_moeda_br):
 
     # TAB 2: Pedidos Vencendo
     with tab2:
-        st.subheader("⏰ Pedidos Vencendo nos Próximos 3 Dias")
+        st.subheader(f"⏰ Pedidos Vencendo nos Próximos {limiares.janela_dias} Dias")
 
         if alertas["pedidos_vencendo"]:
             fornecedores_venc = sorted(
@@ -619,29 +1142,30 @@ def exibir_alertas_completo(alertas: dict, formatar_moeda_br):
                     key="filtro_vencendo_fornecedor",
                 )
 
+            pedidos_filtrados = alertas["pedidos_vencendo"]
+            if fornecedor_venc_filtro:
+                pedidos_filtrados = [p for p in pedidos_filtrados if safe_text(p.get("fornecedor", "N/A")) in fornecedor_venc_filtro]
+
             if "Dias Restantes (menor primeiro)" in ordem_venc:
-                pedidos_filtrados = sorted(alertas["pedidos_vencendo"], key=lambda x: x.get("dias_restantes", 0))
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get("dias_restantes", 0))
             elif "Dias Restantes (maior primeiro)" in ordem_venc:
-                pedidos_filtrados = sorted(alertas["pedidos_vencendo"], key=lambda x: x.get("dias_restantes", 0), reverse=True)
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get("dias_restantes", 0), reverse=True)
             elif "Valor (maior primeiro)" in ordem_venc:
-                pedidos_filtrados = sorted(alertas["pedidos_vencendo"], key=lambda x: x.get("valor", 0), reverse=True)
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get("valor", 0), reverse=True)
             elif "Valor (menor primeiro)" in ordem_venc:
-                pedidos_filtrados = sorted(alertas["pedidos_vencendo"], key=lambda x: x.get("valor", 0))
-            else:
-                pedidos_filtrados = alertas["pedidos_vencendo"]
-
-            if fornecedor_venc_filtro:
-                pedidos_filtrados = [p for p in pedidos_filtrados if safe_text(p.get("fornecedor", "N/A")) in fornecedor_venc_filtro]
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get("valor", 0))
 
             st.caption(f"📊 Mostrando {len(pedidos_filtrados)} de {len(alertas['pedidos_vencendo'])} pedidos vencendo")
 
             if pedidos_filtrados:
-                for pedido in pedidos_filtrados:
-                    criar_card_pedido(pedido, "vencendo", formatar_moeda_br)
+                pagina = _paginar(pedidos_filtrados, "alertas_vencendo", (ordem_venc, fornecedor_venc_filtro))
+                _exibir_cards(
+                    _html_card_pedido(pedido, "vencendo", formatar_moeda_br) for pedido in _com_descricao(pagina, hidratar)
+                )
             else:
                 st.info("📭 Nenhum pedido vencendo corresponde aos filtros selecionados")
         else:
-            st.info("📭 Nenhum pedido vencendo nos próximos 3 dias")
+            st.info(f"📭 Nenhum pedido vencendo nos próximos {limiares.janela_dias} dias")
     
     with tab3:
         st.subheader("🚨 Pedidos Críticos (Alto Valor + Urgente)")
@@ -683,17 +1207,8 @@ def exibir_alertas_completo(alertas: dict, formatar_moeda_br):
                     key="filtro_criticos_fornecedor"
                 )
             
-            # Aplicar ordenação
-            if "Valor (maior primeiro)" in ordem_crit:
-                pedidos_filtrados = sorted(alertas['pedidos_criticos'], key=lambda x: x.get('valor', 0), reverse=True)
-            elif "Valor (menor primeiro)" in ordem_crit:
-                pedidos_filtrados = sorted(alertas['pedidos_criticos'], key=lambda x: x.get('valor', 0))
-            elif "Previsão (próxima primeiro)" in ordem_crit:
-                pedidos_filtrados = sorted(alertas['pedidos_criticos'], 
-                                          key=lambda x: pd.to_datetime(x.get('previsao', '')) if x.get('previsao') else pd.Timestamp.max)
-            else:
-                pedidos_filtrados = alertas['pedidos_criticos']
-            
+            pedidos_filtrados = alertas['pedidos_criticos']
+
             # Aplicar filtros de departamento
             if dept_crit_filtro:
                 pedidos_filtrados = [p for p in pedidos_filtrados if safe_text(p.get('departamento', 'N/A')) in dept_crit_filtro]
@@ -702,14 +1217,27 @@ def exibir_alertas_completo(alertas: dict, formatar_moeda_br):
             if fornecedor_crit_filtro:
                 pedidos_filtrados = [p for p in pedidos_filtrados if safe_text(p.get('fornecedor', 'N/A')) in fornecedor_crit_filtro]
             
+            # Aplicar ordenação (depois dos filtros)
+            if "Valor (maior primeiro)" in ordem_crit:
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get('valor', 0), reverse=True)
+            elif "Valor (menor primeiro)" in ordem_crit:
+                pedidos_filtrados = sorted(pedidos_filtrados, key=lambda x: x.get('valor', 0))
+            elif "Previsão (próxima primeiro)" in ordem_crit:
+                pedidos_filtrados = sorted(pedidos_filtrados, 
+                                          key=lambda x: pd.to_datetime(x.get('previsao', '')) if x.get('previsao') else pd.Timestamp.max)
+            
             # Mostrar contador
             st.caption(f"📊 Mostrando {len(pedidos_filtrados)} de {len(alertas['pedidos_criticos'])} pedidos críticos")
             
             if pedidos_filtrados:
                 st.warning("⚠️ Pedidos de alto valor com previsão de entrega próxima")
                 
-                for pedido in pedidos_filtrados:
-                    criar_card_pedido(pedido, "critico", formatar_moeda_br)
+                pagina = _paginar(
+                    pedidos_filtrados, "alertas_criticos", (ordem_crit, dept_crit_filtro, fornecedor_crit_filtro)
+                )
+                _exibir_cards(
+                    _html_card_pedido(pedido, "critico", formatar_moeda_br) for pedido in _com_descricao(pagina, hidratar)
+                )
             else:
                 st.info("📭 Nenhum pedido crítico corresponde aos filtros selecionados")
         else:
@@ -787,10 +1315,12 @@ def exibir_alertas_completo(alertas: dict, formatar_moeda_br):
             st.caption(f"📊 Mostrando {len(fornecedores_filtrados)} de {len(alertas['fornecedores_baixa_performance'])} fornecedores")
             
             if fornecedores_filtrados:
-                st.warning("⚠️ Fornecedores com taxa de sucesso abaixo de 70%")
+                st.warning(f"⚠️ Fornecedores com taxa de sucesso abaixo de {limiares.taxa_sucesso_minima:g}%")
                 
-                for fornecedor in fornecedores_filtrados:
-                    criar_card_fornecedor(fornecedor, formatar_moeda_br)
+                pagina = _paginar(
+                    fornecedores_filtrados, "alertas_fornecedores", (ordem_forn, nivel_filtro, fornecedor_nome_filtro)
+                )
+                _exibir_cards(_html_card_fornecedor(fornecedor) for fornecedor in pagina)
             else:
                 st.info("📭 Nenhum fornecedor corresponde aos filtros selecionados")
         else:
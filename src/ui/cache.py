@@ -0,0 +1,71 @@
+"""Tela: Cache e memória (admin)."""
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+from src.core import resiliencia, store
+from src.core.db import estatisticas_clientes
+from src.services import aquecimento
+from src.services.sistema_alertas import estatisticas_incrementais
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1024 / 1024:,.1f} MB".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def exibir_cache(ctx):
+    """O que está residente no armazém do processo, frente ao orçamento de memória - Apenas Admin"""
+
+    if st.session_state.usuario["perfil"] != "admin":
+        st.error("⛔ Acesso negado. Apenas administradores podem ver o cache.")
+        return
+
+    st.title("🧠 Cache e Memória")
+
+    uso = store.uso_memoria()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Em memória", _mb(uso["bytes"]))
+    with col2:
+        st.metric("Orçamento", _mb(uso["orcamento_bytes"]))
+    with col3:
+        st.metric("Derivados", _mb(uso["derivados_bytes"]))
+    with col4:
+        st.metric("Despejos (LRU)", uso["despejos"])
+    if uso["orcamento_bytes"]:
+        st.progress(min(1.0, uso["bytes"] / uso["orcamento_bytes"]))
+
+    # Detalhe só das entradas desta empresa (datasets e derivados); as dos
+    # demais tenants (e as calculadas fora de uma sessão) aparecem somadas.
+    entradas = pd.DataFrame(store.entradas_residentes())
+    if entradas.empty:
+        st.info("📭 Nada residente no momento.")
+    else:
+        visiveis = entradas["tenant_id"] == ctx.tenant_id
+        outras = entradas[~visiveis]
+        tabela = entradas[visiveis].sort_values("bytes", ascending=False).drop(columns=["tenant_id"])
+        tabela["bytes"] = tabela["bytes"].map(_mb)
+        st.dataframe(tabela, use_container_width=True, hide_index=True)
+        if not outras.empty:
+            st.caption(f"Outras empresas: {len(outras)} entradas, {_mb(int(outras['bytes'].sum()))}.")
+
+    if st.button("🗑️ Descartar o cache desta empresa"):
+        store.descartar(tenant_id=ctx.tenant_id)
+        st.rerun()
+
+    st.markdown("---")
+    st.subheader("📈 Contadores")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("Armazém")
+        st.json(store.estatisticas())
+        st.caption("Aquecimento")
+        st.json({k: str(v) if v is not None else None for k, v in aquecimento.estatisticas().items()})
+        st.caption("Alertas incrementais")
+        st.json(estatisticas_incrementais())
+    with col2:
+        st.caption("Clientes Supabase")
+        st.json(estatisticas_clientes())
+        st.caption("Consultas (timeouts, retentativas, disjuntor)")
+        st.json(resiliencia.estatisticas())
@@ -5,7 +5,8 @@ import io
 import pandas as pd
 import streamlit as st
 
-from src.repositories.pedidos import carregar_pedidos
+from src.core import store
+from src.repositories.pedidos import COLUNAS_NUCLEO, registrar_projecao
 
 STATUS_VALIDOS = ["Sem OC", "Tem OC", "Em Transporte", "Entregue"]
 DEPARTAMENTOS_VALIDOS = [
@@ -14,6 +15,9 @@ DEPARTAMENTOS_VALIDOS = [
     "Irrigação", "Reboques", "Carregadeiras"
 ]
 
+# 'descricao' entra na busca; 'observacoes' só é buscada para as linhas exibidas/exportadas
+_COLUNAS_CONSULTA = registrar_projecao(*COLUNAS_NUCLEO, "descricao")
+
 def _make_stamp(df: pd.DataFrame, col: str = "atualizado_em") -> tuple:
     if df is None or df.empty:
         return (0, "empty")
@@ -22,7 +26,7 @@ def _make_stamp(df: pd.DataFrame, col: str = "atualizado_em") -> tuple:
         mx = pd.to_datetime(df[col], errors="coerce").max()
     return (len(df), str(mx) if mx is not None else "none")
 
-@st.cache_data(ttl=120)
+@store.memoizar(ttl=120)
 def _prepare_search(stamp: tuple, df: pd.DataFrame) -> pd.DataFrame:
     """Normaliza tipos e cria coluna de busca (cacheada)."""
     if df is None or df.empty:
@@ -54,17 +58,11 @@ def _prepare_search(stamp: tuple, df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 def _is_atrasado(df: pd.DataFrame) -> pd.Series:
+    """Atraso pela regra única de follow-up (coluna _atrasado, ver enriquecer_followup)."""
     if df is None or df.empty:
         return pd.Series([], dtype=bool)
-    if "dias_atraso" in df.columns:
-        return pd.to_numeric(df["dias_atraso"], errors="coerce").fillna(0) > 0
-    if "previsao_entrega" in df.columns:
-        hoje = pd.Timestamp.now().normalize()
-        if "status" in df.columns:
-            status_ok = df["status"].fillna("").astype(str) != "Entregue"
-        else:
-            status_ok = True
-        return df["previsao_entrega"].notna() & (df["previsao_entrega"] < hoje) & status_ok
+    if "_atrasado" in df.columns:
+        return df["_atrasado"].astype(bool)
     return pd.Series([False] * len(df), index=df.index)
 
 def _apply_filters(df: pd.DataFrame, q: str, depto: str, status: str, somente_atrasados: bool) -> pd.DataFrame:
@@ -146,10 +144,10 @@ def _find_pid_by_key(df: pd.DataFrame, key: str) -> str | None:
 
     return None
 
-def exibir_consulta_pedidos(_supabase):
+def exibir_consulta_pedidos(ctx):
     st.title("🔎 Consultar Pedidos")
 
-    df_raw = carregar_pedidos(_supabase)
+    df_raw = ctx.pedidos(_COLUNAS_CONSULTA)
     if df_raw is None or df_raw.empty:
         st.info("📭 Nenhum pedido cadastrado.")
         return
@@ -340,7 +338,7 @@ def exibir_consulta_pedidos(_supabase):
     with st.expander("⚙️ Colunas exibidas", expanded=False):
         cols_sel = st.multiselect(
             "Selecione colunas",
-            options=[c for c in df_f.columns if not c.startswith("__")],
+            options=[c for c in df_f.columns if not c.startswith("__")] + ["observacoes"],
             default=cols_default,
         )
         if not cols_sel:
@@ -379,11 +377,14 @@ def exibir_consulta_pedidos(_supabase):
     i1 = i0 + por_pagina
 
     st.caption(f"Mostrando {i0 + 1}–{min(i1, total_f)} de {total_f} resultados.")
-    st.dataframe(df_f.iloc[i0:i1][cols_sel], use_container_width=True, height=520)
+    hidratar = ["observacoes"] if "observacoes" in cols_sel else []
+    df_pagina = ctx.com_textos(df_f.iloc[i0:i1], hidratar) if hidratar else df_f.iloc[i0:i1]
+    st.dataframe(df_pagina[cols_sel], use_container_width=True, height=520)
 
     st.subheader("Exportar")
+    df_export = ctx.com_textos(df_f, hidratar) if hidratar else df_f
     ce1, ce2 = st.columns(2)
     with ce1:
-        _download_csv(df_f[cols_sel].copy(), "consulta_pedidos.csv")
+        _download_csv(df_export[cols_sel].copy(), "consulta_pedidos.csv")
     with ce2:
-        _download_xlsx(df_f[cols_sel].copy(), "consulta_pedidos.xlsx")
+        _download_xlsx(df_export[cols_sel].copy(), "consulta_pedidos.xlsx")
@@ -13,17 +13,15 @@ import exportacao_relatorios as er
 import filtros_avancados as fa
 import backup_auditoria as ba
 
-from src.repositories.pedidos import carregar_pedidos, carregar_estatisticas_departamento
-from src.repositories.fornecedores import carregar_fornecedores
 from src.utils.formatting import formatar_moeda_br, formatar_numero_br
 
-def exibir_dashboard(_supabase):
+def exibir_dashboard(ctx):
     """Exibe dashboard principal com KPIs e gráficos"""
     
     st.title("📊 Dashboard de Follow-up")
     
     # Carregar dados
-    df_pedidos = carregar_pedidos(_supabase)
+    df_pedidos = ctx.pedidos()
     
     if df_pedidos.empty:
         st.info("📭 Nenhum pedido cadastrado ainda")
@@ -74,7 +72,7 @@ def exibir_dashboard(_supabase):
         with col1:
             # Gráfico de status
             st.subheader("📈 Pedidos por Status")
-            status_counts = df_pedidos['status'].value_counts()
+            status_counts = df_pedidos['status'].value_counts().loc[lambda s: s > 0]  # categórica: sem categorias vazias
             fig_status = px.pie(
                 values=status_counts.values,
                 names=status_counts.index,
@@ -6,7 +6,7 @@ from datetime import datetime
 import pandas as pd
 import streamlit as st
 from src.services import ficha_material as fm
-from src.repositories.pedidos import carregar_pedidos
+from src.repositories.pedidos import COLUNAS_NUCLEO, registrar_projecao
 from src.utils.formatting import formatar_moeda_br
 
 import inspect
@@ -52,10 +52,8 @@ def _call_insights_automaticos(historico: pd.DataFrame, material_atual: dict) ->
 
 
 
-@st.cache_data(ttl=300)
-def _carregar_pedidos_cache(_supabase):
-    # Cache simples para deixar a página mais rápida e reduzir chamadas ao banco
-    return carregar_pedidos(_supabase)
+# Busca/agrupamento usam 'descricao'; 'observacoes' só aparece no histórico do material
+_COLUNAS_FICHA = registrar_projecao(*COLUNAS_NUCLEO, "descricao")
 
 
 def _pick_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
@@ -70,7 +68,7 @@ def _safe_datetime_series(s: pd.Series) -> pd.Series:
     return pd.to_datetime(s, errors="coerce", dayfirst=True)
 
 
-def exibir_ficha_material(_supabase):
+def exibir_ficha_material(ctx):
     """Exibe ficha técnica completa e moderna do material"""
 
     st.title("📋 Ficha Técnica de Material")
@@ -95,7 +93,7 @@ def exibir_ficha_material(_supabase):
     modo_ficha = bool(st.session_state.get("modo_ficha_material", False))
 
 
-    df_pedidos = _carregar_pedidos_cache(_supabase)
+    df_pedidos = ctx.pedidos(_COLUNAS_FICHA)
 
     if df_pedidos.empty:
         st.info("📭 Nenhum pedido cadastrado ainda")
@@ -398,31 +396,7 @@ def exibir_ficha_material(_supabase):
                         # ------------------------------
                         # Follow-up: pendência, vencimento, atraso
                         # ------------------------------
-                        hoje = pd.Timestamp.now().normalize()
-
-                        # Data OC
-                        if col_data and col_data in df_eq_filtrado.columns:
-                            df_eq_filtrado["_data_oc"] = _safe_datetime_series(df_eq_filtrado[col_data])
-                        else:
-                            df_eq_filtrado["_data_oc"] = pd.NaT
-
-                        # Due: previsão > prazo > data_oc + 30d
-                        df_eq_filtrado["_prev"] = _safe_datetime_series(df_eq_filtrado[col_prev]) if col_prev and col_prev in df_eq_filtrado.columns else pd.NaT
-                        df_eq_filtrado["_prazo"] = _safe_datetime_series(df_eq_filtrado[col_prazo]) if col_prazo and col_prazo in df_eq_filtrado.columns else pd.NaT
-                        df_eq_filtrado["_due"] = df_eq_filtrado["_prev"]
-                        df_eq_filtrado.loc[df_eq_filtrado["_due"].isna(), "_due"] = df_eq_filtrado.loc[df_eq_filtrado["_due"].isna(), "_prazo"]
-                        df_eq_filtrado.loc[df_eq_filtrado["_due"].isna(), "_due"] = df_eq_filtrado.loc[df_eq_filtrado["_due"].isna(), "_data_oc"] + pd.Timedelta(days=30)
-
-                        # Pendente: entregue False OU qtde_pendente > 0
-                        pendente_flag = pd.Series([True] * len(df_eq_filtrado), index=df_eq_filtrado.index)
-                        if col_entregue and col_entregue in df_eq_filtrado.columns:
-                            pendente_flag = df_eq_filtrado[col_entregue] != True
-                        if col_qtd_pend and col_qtd_pend in df_eq_filtrado.columns:
-                            qtd_pend = pd.to_numeric(df_eq_filtrado[col_qtd_pend], errors="coerce").fillna(0)
-                            pendente_flag = pendente_flag | (qtd_pend > 0)
-
-                        df_eq_filtrado["_pendente"] = pendente_flag
-                        df_eq_filtrado["_atrasado"] = df_eq_filtrado["_pendente"] & df_eq_filtrado["_due"].notna() & (df_eq_filtrado["_due"] < hoje)
+                        # _due, _pendente e _atrasado já vêm no frame (enriquecer_followup)
 
                         # Valor total numérico (corrige "R$ 0,00" quando vem como texto)
                         if col_total and col_total in df_eq_filtrado.columns:
@@ -656,28 +630,7 @@ def exibir_ficha_material(_supabase):
                         # ------------------------------
                         # Follow-up: pendência, vencimento, atraso
                         # ------------------------------
-                        hoje = pd.Timestamp.now().normalize()
-
-                        if col_data and col_data in df_dep_filtrado.columns:
-                            df_dep_filtrado["_data_oc"] = _safe_datetime_series(df_dep_filtrado[col_data])
-                        else:
-                            df_dep_filtrado["_data_oc"] = pd.NaT
-
-                        df_dep_filtrado["_prev"] = _safe_datetime_series(df_dep_filtrado[col_prev]) if col_prev and col_prev in df_dep_filtrado.columns else pd.NaT
-                        df_dep_filtrado["_prazo"] = _safe_datetime_series(df_dep_filtrado[col_prazo]) if col_prazo and col_prazo in df_dep_filtrado.columns else pd.NaT
-                        df_dep_filtrado["_due"] = df_dep_filtrado["_prev"]
-                        df_dep_filtrado.loc[df_dep_filtrado["_due"].isna(), "_due"] = df_dep_filtrado.loc[df_dep_filtrado["_due"].isna(), "_prazo"]
-                        df_dep_filtrado.loc[df_dep_filtrado["_due"].isna(), "_due"] = df_dep_filtrado.loc[df_dep_filtrado["_due"].isna(), "_data_oc"] + pd.Timedelta(days=30)
-
-                        pendente_flag = pd.Series([True] * len(df_dep_filtrado), index=df_dep_filtrado.index)
-                        if col_entregue and col_entregue in df_dep_filtrado.columns:
-                            pendente_flag = df_dep_filtrado[col_entregue] != True
-                        if col_qtd_pend and col_qtd_pend in df_dep_filtrado.columns:
-                            qtd_pend = pd.to_numeric(df_dep_filtrado[col_qtd_pend], errors="coerce").fillna(0)
-                            pendente_flag = pendente_flag | (qtd_pend > 0)
-
-                        df_dep_filtrado["_pendente"] = pendente_flag
-                        df_dep_filtrado["_atrasado"] = df_dep_filtrado["_pendente"] & df_dep_filtrado["_due"].notna() & (df_dep_filtrado["_due"] < hoje)
+                        # _due, _pendente e _atrasado já vêm no frame (enriquecer_followup)
 
                         if col_total and col_total in df_dep_filtrado.columns:
                             df_dep_filtrado["_valor_total"] = pd.to_numeric(df_dep_filtrado[col_total], errors="coerce").fillna(0.0)
@@ -824,6 +777,9 @@ def exibir_ficha_material(_supabase):
     elif material_selecionado_desc and "descricao" in df_pedidos.columns:
         historico_material = df_pedidos[df_pedidos["descricao"] == str(material_selecionado_desc)].copy()
 
+    if not historico_material.empty:
+        historico_material = ctx.com_textos(historico_material, ["observacoes"])
+
     if not historico_material.empty and (material_selecionado_desc or material_selecionado_cod):
         # Pedido mais recente para "material atual"
         if col_data and col_data in historico_material.columns:
@@ -894,31 +850,11 @@ def exibir_ficha_material(_supabase):
         else:
             df_mat["_data_oc"] = pd.NaT
 
-        # Previsões/prazo e entrega real
-        df_mat["_prev"] = _safe_datetime_series(df_mat[col_prev]) if col_prev and col_prev in df_mat.columns else pd.NaT
-        df_mat["_prazo"] = _safe_datetime_series(df_mat[col_prazo]) if col_prazo and col_prazo in df_mat.columns else pd.NaT
+        # Entrega real (_due, _pendente e _atrasado já vêm no frame, ver enriquecer_followup)
         df_mat["_entrega_real"] = _safe_datetime_series(df_mat[col_entrega_real]) if col_entrega_real and col_entrega_real in df_mat.columns else pd.NaT
 
         hoje = pd.Timestamp.now().normalize()
 
-        # Due date: previsao > prazo > data_oc + 30d
-        df_mat["_due"] = df_mat["_prev"]
-        df_mat.loc[df_mat["_due"].isna(), "_due"] = df_mat.loc[df_mat["_due"].isna(), "_prazo"]
-        df_mat.loc[df_mat["_due"].isna(), "_due"] = df_mat.loc[df_mat["_due"].isna(), "_data_oc"] + pd.Timedelta(days=30)
-
-        # Pendente: entregue False OU qtde_pendente > 0
-        if col_entregue and col_entregue in df_mat.columns:
-            pendente_flag = df_mat[col_entregue] != True
-        else:
-            pendente_flag = pd.Series([True] * len(df_mat), index=df_mat.index)
-
-        if col_qtd_pend and col_qtd_pend in df_mat.columns:
-            qtd_pend = pd.to_numeric(df_mat[col_qtd_pend], errors="coerce").fillna(0)
-            pendente_flag = pendente_flag | (qtd_pend > 0)
-
-        df_mat["_pendente"] = pendente_flag
-        df_mat["_atrasado"] = df_mat["_pendente"] & df_mat["_due"].notna() & (df_mat["_due"] < hoje)
-
         # Dias em aberto
         df_mat["_dias_aberto"] = (hoje - df_mat["_data_oc"]).dt.days
 
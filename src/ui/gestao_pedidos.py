@@ -10,8 +10,10 @@ import backup_auditoria as ba
 import exportacao_relatorios as er  # noqa: F401  (pode estar sendo usado em outras partes)
 import filtros_avancados as fa  # noqa: F401
 
-from src.repositories.fornecedores import carregar_fornecedores
-from src.repositories.pedidos import carregar_pedidos, registrar_entrega, salvar_pedido
+from src.core import store
+from src.core.cache import invalidar
+from src.core.resiliencia import executar, resultado_incerto, transitoria
+from src.repositories.pedidos import registrar_entrega, salvar_pedido
 from src.utils.formatting import formatar_moeda_br, formatar_numero_br  # noqa: F401
 
 
@@ -31,7 +33,7 @@ def _make_df_stamp(df: pd.DataFrame, col: str = "atualizado_em") -> tuple:
     return (int(len(df)), mx or "none")
 
 
-@st.cache_data(ttl=120)
+@store.memoizar(ttl=120)
 def _build_pedido_labels(stamp: tuple, df: pd.DataFrame) -> tuple[list[str], list[str]]:
     """Gera listas paralelas: labels (para UI) e ids (valor real)."""
     if df is None or df.empty:
@@ -53,7 +55,7 @@ def _build_pedido_labels(stamp: tuple, df: pd.DataFrame) -> tuple[list[str], lis
     return labels, ids
 
 
-@st.cache_data(ttl=300)
+@store.memoizar(ttl=300)
 def _build_fornecedor_options(stamp: tuple, df_fornecedores: pd.DataFrame) -> tuple[list[str], dict[int, str]]:
     """Opções de fornecedor e mapa cod->id."""
     if df_fornecedores is None or df_fornecedores.empty:
@@ -206,7 +208,7 @@ def _resolve_import_plan(_supabase, df: pd.DataFrame, modo_importacao: str) -> t
 
     # busca existentes
     try:
-        res = _supabase.table("pedidos").select("nr_oc").in_("nr_oc", ocs).execute()
+        res = executar(_supabase.table("pedidos").select("nr_oc").in_("nr_oc", ocs))
         existentes = set([r["nr_oc"] for r in (res.data or []) if r.get("nr_oc")])
     except Exception:
         # fallback simples (sem quebrar)
@@ -236,23 +238,26 @@ def _bulk_update(_supabase, ids: list[str], payload: dict) -> tuple[int, list[st
 
     # tenta batch com in_
     try:
-        _supabase.table("pedidos").update(payload).in_("id", ids).execute()
+        executar(_supabase.table("pedidos").update(payload).in_("id", ids))
         return len(ids), []
-    except Exception:
-        pass
+    except Exception as e:
+        if transitoria(e):
+            # banco fora do ar / disjuntor aberto: o loop só multiplicaria as falhas
+            return 0, [f"lote ({len(ids)} pedidos): {e}"]
 
     # fallback: update um a um
     for pid in ids:
         try:
-            _supabase.table("pedidos").update(payload).eq("id", pid).execute()
+            executar(_supabase.table("pedidos").update(payload).eq("id", pid))
             ok += 1
         except Exception as e:
             erros.append(f"{pid}: {e}")
     return ok, erros
 
 
-def exibir_gestao_pedidos(_supabase):
+def exibir_gestao_pedidos(ctx):
     """Exibe página de gestão (criar/editar) pedidos - Apenas Admin"""
+    _supabase = ctx.supabase
 
     if st.session_state.usuario["perfil"] != "admin":
         st.error("⛔ Acesso negado. Apenas administradores podem gerenciar pedidos.")
@@ -268,7 +273,7 @@ def exibir_gestao_pedidos(_supabase):
     with tab1:
         st.subheader("Cadastrar Novo Pedido")
 
-        df_fornecedores = carregar_fornecedores(_supabase)
+        df_fornecedores = ctx.fornecedores()
 
         with st.form("form_novo_pedido"):
             col1, col2 = st.columns(2)
@@ -463,7 +468,7 @@ def exibir_gestao_pedidos(_supabase):
                                 with st.spinner("🗑️ Limpando banco de dados..."):
                                     # Contar registros antes
                                     try:
-                                        count_antes = _supabase.table("pedidos").select("id", count="exact").execute()
+                                        count_antes = executar(_supabase.table("pedidos").select("id", count="exact"))
                                         total_antes = count_antes.count if hasattr(count_antes, 'count') else 0
                                     except:
                                         total_antes = 0
@@ -471,10 +476,10 @@ def exibir_gestao_pedidos(_supabase):
                                     # Executar limpeza
                                     tenant_id = st.session_state.get("tenant_id")
                                     
-                                    _supabase.table("pedidos").delete().eq("tenant_id", tenant_id).execute()
+                                    executar(_supabase.table("pedidos").delete().eq("tenant_id", tenant_id))
                                     
                                     # Limpar cache
-                                    st.cache_data.clear()
+                                    invalidar("pedidos", tenant_id=tenant_id)
                                     
                                     # Registrar auditoria
                                     try:
@@ -500,6 +505,8 @@ def exibir_gestao_pedidos(_supabase):
                                     st.rerun()
                                     
                             except Exception as e_limpeza:
+                                if resultado_incerto(e_limpeza):
+                                    invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
                                 st.error(f"❌ Erro ao limpar banco: {e_limpeza}")
                                 st.error("Por favor, tente novamente ou contate o administrador.")
                         
@@ -616,7 +623,7 @@ def exibir_gestao_pedidos(_supabase):
                     ocs = [x for x in ocs.tolist() if x]
                     if ocs:
                         try:
-                            res = _supabase.table("pedidos").select("nr_oc").in_("nr_oc", ocs).execute()
+                            res = executar(_supabase.table("pedidos").select("nr_oc").in_("nr_oc", ocs))
                             existentes = set([r["nr_oc"] for r in (res.data or []) if r.get("nr_oc")])
                             duplicados_oc = sum(1 for oc in ocs if oc in existentes)
                         except Exception:
@@ -700,15 +707,17 @@ def exibir_gestao_pedidos(_supabase):
                             try:
                                 with st.spinner("🗑️ Limpando banco de dados..."):
                                     tenant_id = st.session_state.get("tenant_id")
-                                    _supabase.table("pedidos").delete().eq("tenant_id", tenant_id).execute()
-                                    res = _supabase.rpc("reset_tenant_data").execute()
+                                    executar(_supabase.table("pedidos").delete().eq("tenant_id", tenant_id))
+                                    res = executar(_supabase.rpc("reset_tenant_data"))
                                     st.success(f"✅ Limpeza concluída: {res.data}")
-                                    st.cache_data.clear()
+                                    invalidar("pedidos", "fornecedores", tenant_id=tenant_id)
                             except Exception as e_limpeza:
+                                if resultado_incerto(e_limpeza):
+                                    invalidar("pedidos", "fornecedores", tenant_id=st.session_state.get("tenant_id"))
                                 st.error(f"❌ Erro ao limpar banco: {e_limpeza}")
                                 st.stop()
 
-                        df_fornecedores = carregar_fornecedores(_supabase)
+                        df_fornecedores = ctx.fornecedores()
                         mapa_fornecedores = {
                             int(f["cod_fornecedor"]): f["id"] for _, f in df_fornecedores.iterrows()
                             if pd.notna(f.get("cod_fornecedor"))
@@ -740,7 +749,7 @@ def exibir_gestao_pedidos(_supabase):
                             ocs = [x for x in ocs.tolist() if x]
                             if ocs:
                                 try:
-                                    res_oc = _supabase.table("pedidos").select("id,nr_oc").in_("nr_oc", ocs).execute()
+                                    res_oc = executar(_supabase.table("pedidos").select("id,nr_oc").in_("nr_oc", ocs))
                                     for r in (res_oc.data or []):
                                         nr_oc_db = str(r.get("nr_oc") or "").strip()
                                         if nr_oc_db:
@@ -755,7 +764,7 @@ def exibir_gestao_pedidos(_supabase):
                             sols = [x for x in sols.tolist() if x]
                             if sols:
                                 try:
-                                    res_sol = _supabase.table("pedidos").select("id,nr_solicitacao,nr_oc").in_("nr_solicitacao", sols).execute()
+                                    res_sol = executar(_supabase.table("pedidos").select("id,nr_solicitacao,nr_oc").in_("nr_solicitacao", sols))
                                     for r in (res_sol.data or []):
                                         sol_db = str(r.get("nr_solicitacao") or "").strip()
                                         oc_db = str(r.get("nr_oc") or "").strip()
@@ -805,11 +814,10 @@ def exibir_gestao_pedidos(_supabase):
                                     if cod_forn not in mapa_fornecedores:
                                         if criar_fornecedores:
                                             try:
-                                                busca_forn = (
+                                                busca_forn = executar(
                                                     _supabase.table("fornecedores")
                                                     .select("id")
                                                     .eq("cod_fornecedor", cod_forn)
-                                                    .execute()
                                                 )
                                                 if busca_forn.data and len(busca_forn.data) > 0:
                                                     fornecedor_id = busca_forn.data[0]["id"]
@@ -825,8 +833,8 @@ def exibir_gestao_pedidos(_supabase):
                                                         "uf": str(row.get("uf_fornecedor", "SP"))[:2].upper(),
                                                         "ativo": True,
                                                     }
-                                                    resultado_forn = (
-                                                        _supabase.table("fornecedores").insert(novo_fornecedor).execute()
+                                                    resultado_forn = executar(
+                                                        _supabase.table("fornecedores").insert(novo_fornecedor)
                                                     )
                                                     if resultado_forn.data:
                                                         fornecedor_id = resultado_forn.data[0]["id"]
@@ -838,11 +846,10 @@ def exibir_gestao_pedidos(_supabase):
                                             except Exception as e_forn:
                                                 erro_str = str(e_forn)
                                                 if "duplicate key" in erro_str or "23505" in erro_str:
-                                                    busca_forn = (
+                                                    busca_forn = executar(
                                                         _supabase.table("fornecedores")
                                                         .select("id")
                                                         .eq("cod_fornecedor", cod_forn)
-                                                        .execute()
                                                     )
                                                     if busca_forn.data and len(busca_forn.data) > 0:
                                                         fornecedor_id = busca_forn.data[0]["id"]
@@ -906,19 +913,19 @@ def exibir_gestao_pedidos(_supabase):
                                 }
 
                                 if modo_importacao == "Atualizar pedidos existentes (por N° OC)" and pedido_data.get("nr_oc"):
-                                    pedido_existente = (
-                                        _supabase.table("pedidos").select("id").eq("nr_oc", pedido_data["nr_oc"]).execute()
+                                    pedido_existente = executar(
+                                        _supabase.table("pedidos").select("id").eq("nr_oc", pedido_data["nr_oc"])
                                     )
                                     if pedido_existente.data:
-                                        _supabase.table("pedidos").update(pedido_data).eq("nr_oc", pedido_data["nr_oc"]).execute()
+                                        executar(_supabase.table("pedidos").update(pedido_data).eq("nr_oc", pedido_data["nr_oc"]))
                                         registros_atualizados += 1
                                     else:
                                         pedido_data["criado_por"] = st.session_state.usuario["id"]
-                                        _supabase.table("pedidos").insert(pedido_data).execute()
+                                        executar(_supabase.table("pedidos").insert(pedido_data))
                                         registros_inseridos += 1
                                 else:
                                     pedido_data["criado_por"] = st.session_state.usuario["id"]
-                                    _supabase.table("pedidos").insert(pedido_data).execute()
+                                    executar(_supabase.table("pedidos").insert(pedido_data))
                                     registros_inseridos += 1
                                 registros_processados += 1
                                 if total_rows and (registros_processados % 10 == 0 or registros_processados == total_rows):
@@ -929,7 +936,7 @@ def exibir_gestao_pedidos(_supabase):
                                 registros_erro += 1
                                 erros.append(f"Linha {idx + 2}: {str(e)}")
 
-                        st.cache_data.clear()
+                        invalidar("pedidos", "fornecedores", tenant_id=st.session_state.get("tenant_id"))
 
                         if registros_erro == 0:
                             st.success(
@@ -968,7 +975,7 @@ def exibir_gestao_pedidos(_supabase):
                                     st.warning(f"... e mais {len(erros) - 50} erros não exibidos")
 
                         try:
-                            _supabase.table("log_importacoes").insert(
+                            executar(_supabase.table("log_importacoes").insert(
                                 {
                                     "usuario_id": st.session_state.usuario["id"],
                                     "nome_arquivo": arquivo_upload.name,
@@ -978,7 +985,7 @@ def exibir_gestao_pedidos(_supabase):
                                     "registros_erro": registros_erro,
                                     "detalhes_erro": "\n".join(erros[:100]) if erros else None,
                                 }
-                            ).execute()
+                            ))
                         except Exception:
                             pass
 
@@ -992,7 +999,7 @@ def exibir_gestao_pedidos(_supabase):
     with tab3:
         st.subheader("Editar Pedido Existente")
 
-        df_pedidos = carregar_pedidos(_supabase)
+        df_pedidos = ctx.pedidos()
         # Ponte vinda da Consulta: pré-seleciona pedido para edição
         pedido_pre = st.session_state.pop("gp_open_pedido_id", None)
         if pedido_pre and not df_pedidos.empty and "id" in df_pedidos.columns:
@@ -1102,7 +1109,6 @@ def exibir_gestao_pedidos(_supabase):
             sucesso, mensagem = salvar_pedido(pedido_atualizado, _supabase)
             if sucesso:
                 st.success(mensagem)
-                st.cache_data.clear()
                 st.rerun()
             else:
                 st.error(mensagem)
@@ -1121,7 +1127,7 @@ def exibir_gestao_pedidos(_supabase):
                     disabled=not confirmar_exclusao,
                 ):
                     try:
-                        _supabase.table("pedidos").delete().eq("id", pedido_editar).execute()
+                        executar(_supabase.table("pedidos").delete().eq("id", pedido_editar))
                         try:
                             ba.registrar_acao(
                                 _supabase,
@@ -1132,9 +1138,11 @@ def exibir_gestao_pedidos(_supabase):
                         except Exception:
                             pass
                         st.success("✅ Pedido excluído.")
-                        st.cache_data.clear()
+                        invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
                         st.rerun()
                     except Exception as e_del:
+                        if resultado_incerto(e_del):
+                            invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
                         st.error(f"❌ Erro ao excluir: {e_del}")
 
         # Registrar entrega
@@ -1167,7 +1175,6 @@ def exibir_gestao_pedidos(_supabase):
                     )
                     if sucesso:
                         st.success(mensagem)
-                        st.cache_data.clear()
                         st.rerun()
                     else:
                         st.error(mensagem)
@@ -1180,7 +1187,7 @@ def exibir_gestao_pedidos(_supabase):
         st.subheader("⚡ Ações em Massa")
         st.caption("Atualize vários pedidos de uma vez (status / previsão / fornecedor). Use filtros para selecionar o conjunto.")
     
-        df_pedidos = carregar_pedidos(_supabase)
+        df_pedidos = ctx.pedidos()
         if df_pedidos.empty:
             st.info("📭 Nenhum pedido cadastrado.")
             return
@@ -1269,7 +1276,7 @@ def exibir_gestao_pedidos(_supabase):
                                       {"qtd": len(selecionados), "status": novo_status})
                 except Exception:
                     pass
-                st.cache_data.clear()
+                invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
                 st.rerun()
     
         # 2) Previsão em massa
@@ -1289,13 +1296,13 @@ def exibir_gestao_pedidos(_supabase):
                                       {"qtd": len(selecionados), "previsao": nova_prev.isoformat()})
                 except Exception:
                     pass
-                st.cache_data.clear()
+                invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
                 st.rerun()
     
         # 3) Fornecedor em massa
         with a3:
             st.markdown("### 🏭 Fornecedor")
-            df_fornecedores = carregar_fornecedores(_supabase)
+            df_fornecedores = ctx.fornecedores()
             if df_fornecedores is None or df_fornecedores.empty:
                 st.warning("Sem fornecedores cadastrados.")
             else:
@@ -1321,7 +1328,7 @@ def exibir_gestao_pedidos(_supabase):
                                                   {"qtd": len(selecionados), "cod_fornecedor": cod})
                             except Exception:
                                 pass
-                            st.cache_data.clear()
+                            invalidar("pedidos", tenant_id=st.session_state.get("tenant_id"))
                             st.rerun()
                     except Exception as e:
                         st.error(f"Erro ao aplicar fornecedor: {e}")
@@ -10,11 +10,12 @@ import streamlit as st
 import backup_auditoria as ba
 from src.core.auth import criar_senha_hash
 
-def exibir_gestao_usuarios(_supabase):
+def exibir_gestao_usuarios(ctx):
     """
     Gestão completa de usuários - Apenas Admin
     Permite criar, editar, ativar/desativar e controlar permissões
     """
+    _supabase = ctx.supabase
     
     # Verificar se é admin
     if st.session_state.usuario['perfil'] != 'admin':
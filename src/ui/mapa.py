@@ -4,14 +4,20 @@ from __future__ import annotations
 import streamlit as st
 
 import mapa_geografico as mg
-from src.repositories.pedidos import carregar_pedidos
+from src.repositories.pedidos import registrar_projecao
 
-def exibir_mapa(_supabase):
+# Colunas lidas pela tela e por mapa_geografico (agregações por UF/fornecedor)
+_COLUNAS_MAPA = registrar_projecao(
+    'status', 'departamento', 'valor_total',
+    'fornecedor_nome', 'fornecedor_cidade', 'fornecedor_uf',
+)
+
+def exibir_mapa(ctx):
     """Exibe mapa geográfico REAL dos fornecedores com mapa coroplético do Brasil"""
     
     st.title("🗺️ Mapa Geográfico de Fornecedores")
     
-    df_pedidos = carregar_pedidos(_supabase)
+    df_pedidos = ctx.pedidos(_COLUNAS_MAPA)
     
     if df_pedidos.empty:
         st.info("📭 Nenhum pedido cadastrado ainda")
@@ -24,8 +30,8 @@ def exibir_mapa(_supabase):
     with col1:
         status_filtro = st.multiselect(
             "Status",
-            options=df_pedidos['status'].unique(),
-            default=df_pedidos['status'].unique()
+            options=df_pedidos['status'].unique().tolist(),
+            default=df_pedidos['status'].unique().tolist()
         )
     
     with col2:
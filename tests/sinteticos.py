@@ -0,0 +1,112 @@
+"""
+Dados sintéticos compartilhados pelos testes e pelos benchmarks.
+
+Linhas de vw_pedidos_completo como vêm do PostgREST, a tabela de
+fornecedores correspondente, rodadas de alterações como as de um delta de
+carregar_pedidos e a conferência exata entre dois resultados de
+calcular_alertas. Os benchmarks importam daqui (tests.sinteticos); os testes
+não dependem dos scripts de benchmarks/.
+"""
+from __future__ import annotations
+
+import random
+import uuid
+
+import pandas as pd
+
+from src.repositories.pedidos import _normalizar_pedidos
+
+
+def linhas_pedidos(n: int, seed: int = 42) -> list[dict]:
+    """`n` linhas de vw_pedidos_completo como o PostgREST devolve (datas em texto ISO), 200 fornecedores."""
+    rnd = random.Random(seed)
+    fornecedores = [
+        dict(cod=i + 1, nome=f"Fornecedor {i} Ltda", cidade=rnd.choice(["São Paulo", "Belo Horizonte", "Recife"]),
+             uf=rnd.choice(["SP", "MG", "PE"]))
+        for i in range(200)
+    ]
+    linhas = []
+    for i in range(n):
+        f = rnd.choice(fornecedores)
+        entregue = rnd.random() < 0.4
+        linhas.append({
+            "id": str(uuid.UUID(int=rnd.getrandbits(128))),
+            "tenant_id": "00000000-0000-0000-0000-000000000001",
+            "nr_solicitacao": f"{rnd.randint(1, 99999):06d}",
+            "nr_oc": f"{rnd.randint(1, 99999):06d}" if rnd.random() < 0.8 else None,
+            "departamento": rnd.choice(["Manutenção", "Operação", "Almoxarifado", "Frota"]),
+            "cod_equipamento": f"EQ-{rnd.randint(1, 500)}",
+            "cod_material": f"MAT{rnd.randint(1, 20000)}",
+            "descricao": f"Material {i}, conforme especificação técnica \"rev. {i % 7}\"",
+            "qtde_solicitada": rnd.randint(1, 100),
+            "qtde_entregue": rnd.randint(0, 100) if entregue else 0,
+            "qtde_pendente": rnd.randint(0, 100),
+            "data_solicitacao": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "data_oc": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "previsao_entrega": f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" if rnd.random() < 0.9 else None,
+            "data_entrega_real": f"2026-{rnd.randint(1, 9):02d}-{rnd.randint(1, 28):02d}" if entregue else None,
+            "entregue": entregue,
+            "atrasado": False,
+            "status": rnd.choice(["Sem OC", "Tem OC", "Em Transporte", "Entregue"]),
+            "valor_ultima_compra": round(rnd.uniform(1, 5000), 2),
+            "valor_total": round(rnd.uniform(10, 100000), 2),
+            "observacoes": "Urgente" if rnd.random() < 0.1 else None,
+            "criado_em": "2025-01-01T08:00:00.123456+00:00",
+            "atualizado_em": f"2026-{rnd.randint(1, 9):02d}-{rnd.randint(1, 28):02d}T10:00:00.123456+00:00",
+            "fornecedor_id": str(uuid.UUID(int=f["cod"])),
+            "cod_fornecedor": f["cod"],
+            "fornecedor_nome": f["nome"],
+            "fornecedor_cidade": f["cidade"],
+            "fornecedor_uf": f["uf"],
+        })
+    return linhas
+
+
+def fornecedores_sinteticos() -> pd.DataFrame:
+    """Os mesmos 200 fornecedores de linhas_pedidos; parte sem nome, para exercitar os fallbacks."""
+    return pd.DataFrame({
+        "id": [str(uuid.UUID(int=cod)) for cod in range(1, 201)],
+        "nome": [f"Fornecedor {cod - 1} Ltda" if cod % 10 else None for cod in range(1, 201)],
+    })
+
+
+def _alterar(rnd: random.Random, linha: dict, carimbo: int) -> dict:
+    """Cópia de `linha` com um dos campos que mexem nos alertas alterado (e atualizado_em novo)."""
+    linha = dict(linha)
+    campo = rnd.choice(["entregue", "valor_total", "previsao_entrega", "qtde_pendente", "fornecedor"])
+    if campo == "entregue":
+        linha["entregue"] = not linha["entregue"]
+    elif campo == "valor_total":
+        linha["valor_total"] = rnd.choice([0.0, linha["valor_total"], round(rnd.uniform(10, 200000), 2)])
+    elif campo == "previsao_entrega":
+        dia = pd.Timestamp.now().normalize() + pd.Timedelta(days=rnd.randint(-10, 10))
+        linha["previsao_entrega"] = rnd.choice([None, dia.strftime("%Y-%m-%d")])
+    elif campo == "qtde_pendente":
+        linha["qtde_pendente"] = rnd.choice([0, rnd.randint(1, 100)])
+    else:
+        cod = rnd.randint(1, 200)
+        linha.update(fornecedor_id=str(uuid.UUID(int=cod)), cod_fornecedor=cod, fornecedor_nome=f"Fornecedor {cod - 1} Ltda")
+    linha["atualizado_em"] = f"2026-10-{carimbo % 28 + 1:02d}T{carimbo % 24:02d}:00:00.{carimbo:06d}+00:00"
+    return linha
+
+
+def rodada_delta(rnd: random.Random, linhas: list[dict], carimbo: int):
+    """Altera, remove e acrescenta pedidos; devolve (linhas novas, alterados, removidos)."""
+    escolhidos = rnd.sample(range(len(linhas)), min(len(linhas), rnd.randint(0, 12)))
+    removidos = {linhas[i]["id"] for i in escolhidos[: len(escolhidos) // 3]}
+    alterados = [_alterar(rnd, linhas[i], carimbo) for i in escolhidos[len(escolhidos) // 3:]]
+    alterados += linhas_pedidos(rnd.randint(0, 3), seed=carimbo)
+    saem = removidos | {a["id"] for a in alterados}
+    return [l for l in linhas if l["id"] not in saem] + alterados, alterados, removidos
+
+
+def frame_pedidos(linhas: list[dict]) -> pd.DataFrame:
+    """As linhas normalizadas como no carregamento (_normalizar_pedidos)."""
+    return _normalizar_pedidos(pd.DataFrame(linhas))
+
+
+def conferir_alertas(esperado: dict, obtido: dict) -> None:
+    """Os dois resultados de calcular_alertas são idênticos (total e cada lista, campo a campo)."""
+    assert esperado["total"] == obtido["total"]
+    for chave in ("pedidos_atrasados", "pedidos_vencendo", "fornecedores_baixa_performance", "pedidos_criticos"):
+        pd.testing.assert_frame_equal(pd.DataFrame(esperado[chave]), pd.DataFrame(obtido[chave]))
@@ -0,0 +1,43 @@
+"""
+Testes do aquecimento do cache (src.services.aquecimento).
+
+Uso (na raiz do repositório):
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import aquecimento  # noqa: E402
+
+
+def test_nao_sobe_sem_service_role(monkeypatch):
+    monkeypatch.setattr(aquecimento, "service_role_configurada", lambda: False)
+    monkeypatch.setattr(aquecimento, "AQUECIMENTO_NA_PARTIDA", True)
+    monkeypatch.setattr(aquecimento, "_thread", None)
+
+    assert aquecimento.iniciar_aquecedor(object()) is False
+    assert aquecimento._thread is None
+
+
+def test_aquece_dentro_de_preservando_residentes(monkeypatch):
+    visto = []
+
+    class Contexto:
+        def __init__(self, _supabase, tenant_id):
+            pass
+
+        def pedidos(self, colunas=None):
+            visto.append(aquecimento.store.preservando())
+
+        fornecedores = pedidos
+        contagem_alertas = alertas = property(lambda self: visto.append(aquecimento.store.preservando()))
+
+    monkeypatch.setattr(aquecimento, "ContextoDados", Contexto)
+    aquecimento.aquecer_tenant(object(), "t1")
+
+    assert visto and all(visto)
+    assert not aquecimento.store.preservando()
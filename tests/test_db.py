@@ -0,0 +1,51 @@
+"""
+Testes dos clientes Supabase (src.core.db).
+
+Uso (na raiz do repositório):
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from src.core import db  # noqa: E402
+
+
+class _Postgrest:
+    def __init__(self):
+        self.token = None
+
+    def auth(self, token):
+        self.token = token
+
+
+class _Client:
+    def __init__(self, url, key):
+        self.url, self.key = url, key
+        self.postgrest = _Postgrest()
+        self.auth = "auth do cliente"
+        self.storage = "storage do cliente"
+
+
+def test_cliente_usuario_delega_o_que_nao_expoe(monkeypatch):
+    criados = []
+    monkeypatch.setattr(db, "create_client", lambda url, key: criados.append(_Client(url, key)) or criados[-1])
+
+    cliente = db.ClienteUsuario("https://x.supabase.co", "anon", "jwt-do-usuario")
+    assert criados == []  # table/rpc não precisam do Client completo
+
+    assert cliente.auth == "auth do cliente"
+    assert cliente.storage == "storage do cliente"
+    assert len(criados) == 1  # criado uma vez, na primeira delegação
+    assert (criados[0].url, criados[0].key, criados[0].postgrest.token) == ("https://x.supabase.co", "anon", "jwt-do-usuario")
+
+
+def test_cliente_usuario_atributo_inexistente():
+    cliente = db.ClienteUsuario("https://x.supabase.co", "anon", "jwt")
+    with pytest.raises(AttributeError):
+        cliente._nao_existe
@@ -0,0 +1,237 @@
+"""
+Testes do repositório de pedidos (src.repositories.pedidos).
+
+Uso (na raiz do repositório):
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+from postgrest.exceptions import APIError  # noqa: E402
+
+from src.repositories import pedidos  # noqa: E402
+
+LINHAS = pd.DataFrame({"id": ["1", "2", "3"]})
+
+
+def _faixas(monkeypatch, erro: BaseException):
+    """_buscar_faixa falha com `erro` nas faixas por id e devolve LINHAS no percurso sequencial."""
+    chamadas = []
+
+    def buscar_faixa(_supabase, tenant_id, inicio, fim, *args, **kwargs):
+        chamadas.append((inicio, fim))
+        if inicio is not None:
+            raise erro
+        return LINHAS
+
+    monkeypatch.setattr(pedidos, "_buscar_faixa", buscar_faixa)
+    monkeypatch.setattr(pedidos, "_contar_pedidos", lambda *a, **k: len(LINHAS))
+    return chamadas
+
+
+def test_ids_fora_do_formato_uuid_caem_para_o_percurso_sequencial(monkeypatch):
+    erro = APIError({"code": "22P02", "message": 'invalid input syntax for type bigint: "00000000-..."'})
+    chamadas = _faixas(monkeypatch, erro)
+
+    df = pedidos._buscar_pedidos_paginado(None, "t1", max_workers=4)
+
+    assert df["id"].tolist() == ["1", "2", "3"]
+    assert (None, None) in chamadas
+
+
+@pytest.mark.parametrize("erro", [
+    TimeoutError("Supabase não respondeu"),
+    APIError({"code": "503", "message": "Service Unavailable"}),
+    APIError({"code": "42501", "message": "permission denied"}),
+])
+def test_outras_falhas_sobem_sem_refazer_a_carga(monkeypatch, erro):
+    chamadas = _faixas(monkeypatch, erro)
+
+    with pytest.raises(type(erro)):
+        pedidos._buscar_pedidos_paginado(None, "t1", max_workers=4)
+
+    assert (None, None) not in chamadas
+
+
+def test_fornecedores_ativos_por_tenant(monkeypatch):
+    from src.core import store
+    from src.repositories import fornecedores
+
+    def buscar(_supabase, tenant_id, incluir_inativos, formato="json"):
+        assert incluir_inativos is False
+        return pd.DataFrame({"id": [f"{tenant_id}-f1"], "tenant_id": [tenant_id]})
+
+    monkeypatch.setattr(fornecedores, "_buscar_fornecedores", buscar)
+    store.descartar()
+    try:
+        assert pedidos.carregar_fornecedores(None, "t1")["id"].tolist() == ["t1-f1"]
+        assert pedidos.carregar_fornecedores(None, "t2")["id"].tolist() == ["t2-f1"]
+    finally:
+        store.descartar()
+
+
+# --------------------------------------------
+# Sincronização incremental (delta por atualizado_em)
+# --------------------------------------------
+
+BRUTO = pd.DataFrame({
+    "id": ["1", "2", "3"],
+    "atualizado_em": ["2026-01-01T10:00:00", "2026-01-02T10:00:00", "2026-01-03T10:00:00"],
+    "status": ["Aberto", "Aberto", "Entregue"],
+})
+
+
+def _snapshot() -> pedidos._SnapshotPedidos:
+    return pedidos._SnapshotPedidos(
+        df=pedidos._normalizar_pedidos(BRUTO.copy()),
+        watermark=pedidos._watermark(BRUTO),
+        completo_em=pedidos.time.monotonic(),
+    )
+
+
+def _servidor(monkeypatch, linhas: pd.DataFrame):
+    """O banco tem `linhas`: o delta traz as de atualizado_em >= desde e o count, o total (ou as < antes_de)."""
+    def buscar_faixa(_supabase, tenant_id, inicio, fim, tamanho_pagina, desde=None, *args, **kwargs):
+        if desde is None:
+            return linhas.copy()
+        return linhas[linhas["atualizado_em"] >= desde].reset_index(drop=True)
+
+    def contar(_supabase, tenant_id, tabela=pedidos._VIEW, antes_de=None):
+        return len(linhas) if antes_de is None else int((linhas["atualizado_em"] < antes_de).sum())
+
+    monkeypatch.setattr(pedidos, "_buscar_faixa", buscar_faixa)
+    monkeypatch.setattr(pedidos, "_contar_pedidos", contar)
+
+
+def test_delta_so_com_o_watermark_devolve_o_mesmo_snapshot(monkeypatch):
+    _servidor(monkeypatch, BRUTO)
+    snap = _snapshot()
+
+    assert pedidos._sincronizar_delta(None, "t1", snap, 1000) is snap
+
+
+def test_delta_com_linha_alterada_mescla(monkeypatch):
+    alterado = BRUTO.copy()
+    alterado.loc[1, ["atualizado_em", "status"]] = ["2026-01-04T10:00:00", "Entregue"]
+    _servidor(monkeypatch, alterado)
+    snap = _snapshot()
+
+    novo = pedidos._sincronizar_delta(None, "t1", snap, 1000)
+
+    assert novo is not snap
+    assert novo.watermark == "2026-01-04T10:00:00"
+    assert novo.df.set_index("id").loc["2", "status"] == "Entregue"
+    assert len(novo.df) == 3
+
+
+def test_delta_sem_novidade_nao_regrava_o_disco(monkeypatch):
+    _servidor(monkeypatch, BRUTO)
+    gravados = []
+    monkeypatch.setattr(pedidos, "_gravar_snapshot_disco", lambda *a: gravados.append(a))
+    monkeypatch.setattr(pedidos, "_ler_snapshot_disco", lambda *a: None)
+    chave = ("t1", pedidos._VIEW, "*")
+    monkeypatch.setitem(pedidos._snapshots, chave, _snapshot())
+
+    pedidos._carregar_snapshot(None, "t1", 1000, 1, True)
+
+    assert gravados == []
+
+
+def test_exclusao_de_linha_recente_sai_sem_carga_completa(monkeypatch):
+    # "3" (no watermark) foi excluído e "4" incluído: o total continua 3
+    servidor = pd.concat([BRUTO.iloc[:2], pd.DataFrame({
+        "id": ["4"], "atualizado_em": ["2026-01-05T10:00:00"], "status": ["Aberto"],
+    })], ignore_index=True)
+    _servidor(monkeypatch, servidor)
+
+    novo = pedidos._sincronizar_delta(None, "t1", _snapshot(), 1000)
+
+    assert sorted(novo.df["id"]) == ["1", "2", "4"]
+
+
+def test_exclusao_de_linha_antiga_com_inclusao_refaz_a_carga(monkeypatch):
+    # "1" (antes do watermark) foi excluído e "4" incluído: o total não muda,
+    # mas a contagem das linhas anteriores ao watermark não fecha.
+    servidor = pd.concat([BRUTO.iloc[1:], pd.DataFrame({
+        "id": ["4"], "atualizado_em": ["2026-01-05T10:00:00"], "status": ["Aberto"],
+    })], ignore_index=True)
+    _servidor(monkeypatch, servidor)
+
+    def contar(_supabase, tenant_id, tabela=pedidos._VIEW, antes_de=None):
+        if antes_de is None:
+            return len(servidor) + 1  # total lido antes da exclusão: sozinho, deixaria passar
+        return int((servidor["atualizado_em"] < antes_de).sum())
+
+    monkeypatch.setattr(pedidos, "_contar_pedidos", contar)
+
+    assert pedidos._sincronizar_delta(None, "t1", _snapshot(), 1000) is None
+
+
+def test_recarga_sem_novidade_mantem_a_geracao(monkeypatch):
+    from src.core import store
+
+    _servidor(monkeypatch, BRUTO)
+    monkeypatch.setattr(pedidos, "PEDIDOS_TTL_SEGUNDOS", 0)
+    monkeypatch.setattr(pedidos, "PEDIDOS_MAX_DEFASAGEM_SEGUNDOS", 0)
+    monkeypatch.setattr(pedidos, "_ler_snapshot_disco", lambda *a: None)
+    monkeypatch.setattr(pedidos, "_gravar_snapshot_disco", lambda *a: None)
+    store.descartar()
+    pedidos.descartar_snapshot_pedidos("t1")
+    try:
+        primeiro = pedidos.carregar_pedidos(None, "t1", max_workers=1)
+        segundo = pedidos.carregar_pedidos(None, "t1", max_workers=1)
+        projecao = pedidos.carregar_pedidos(None, "t1", max_workers=1, colunas=("status",))
+        de_novo = pedidos.carregar_pedidos(None, "t1", max_workers=1, colunas=("status",))
+    finally:
+        store.descartar()
+        pedidos.descartar_snapshot_pedidos("t1")
+
+    assert len(primeiro) == 3
+    assert store.geracao(segundo) == store.geracao(primeiro)
+    assert store.geracao(de_novo) == store.geracao(projecao)
+
+
+# --------------------------------------------
+# Leitura curta (exclusão entre o count e o percurso)
+# --------------------------------------------
+
+def _percursos(monkeypatch, *resultados):
+    """Cada _percorrer_faixas devolve o próximo (linhas, total) de `resultados`."""
+    fila = list(resultados)
+    monkeypatch.setattr(pedidos, "_percorrer_faixas", lambda *a, **k: fila.pop(0))
+    return fila
+
+
+def test_leitura_curta_refaz_o_percurso_uma_vez(monkeypatch):
+    fila = _percursos(monkeypatch, (LINHAS.iloc[:2], 3), (LINHAS.iloc[:2], 2))
+
+    df = pedidos._buscar_pedidos_paginado(None, "t1")
+
+    assert df["id"].tolist() == ["1", "2"]
+    assert fila == []
+
+
+def test_leitura_curta_repetida_serve_o_ultimo_residente(monkeypatch):
+    from src.core import store
+
+    _percursos(monkeypatch, (LINHAS.iloc[:2], 3), (LINHAS.iloc[:2], 3))
+    store.descartar()
+    try:
+        with pytest.raises(pedidos.CargaIncompleta):
+            pedidos._buscar_pedidos_paginado(None, "t1")
+
+        store.obter("pedidos", "t1", "antiga", lambda: LINHAS.copy())
+        monkeypatch.setattr(pedidos, "_montar_pedidos", lambda *a, **k: pedidos._buscar_pedidos_paginado(None, "t1"))
+        _percursos(monkeypatch, (LINHAS.iloc[:2], 3), (LINHAS.iloc[:2], 3))
+
+        df = pedidos.carregar_pedidos(None, "t1")
+    finally:
+        store.descartar()
+
+    assert df["id"].tolist() == ["1", "2", "3"]
@@ -0,0 +1,58 @@
+"""
+Testes da execução das consultas ao Supabase (src.core.resiliencia).
+
+Uso (na raiz do repositório):
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from src.core import resiliencia  # noqa: E402
+
+
+def _lenta(segundos: float, threads: list):
+    def fn():
+        threads.append(threading.current_thread())
+        time.sleep(segundos)
+        return "ok"
+    return fn
+
+
+def test_leitura_tem_timeout(monkeypatch):
+    monkeypatch.setattr(resiliencia, "SUPABASE_TENTATIVAS", 1)
+
+    with pytest.raises(TimeoutError):
+        resiliencia.chamar(_lenta(0.3, []), leitura=True, circuito="teste-leitura", timeout=0.05)
+
+
+def test_escrita_roda_na_thread_do_chamador_sem_timeout():
+    threads = []
+
+    resultado = resiliencia.chamar(_lenta(0.2, threads), leitura=False, circuito="teste-escrita", timeout=0.05)
+
+    # não foi abandonada numa thread do pool: terminou, e o chamador viu o resultado
+    assert resultado == "ok"
+    assert threads == [threading.current_thread()]
+
+
+def test_escrita_nao_e_repetida(monkeypatch):
+    monkeypatch.setattr(resiliencia, "SUPABASE_TENTATIVAS", 3)
+    chamadas = []
+
+    def falha():
+        chamadas.append(1)
+        raise TimeoutError("sem resposta")
+
+    with pytest.raises(TimeoutError) as erro:
+        resiliencia.chamar(falha, leitura=False, circuito="teste-escrita-falha")
+
+    assert len(chamadas) == 1
+    assert resiliencia.resultado_incerto(erro.value)
@@ -0,0 +1,171 @@
+"""
+Testes dos alertas (src.services.sistema_alertas).
+
+Uso (na raiz do repositório):
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random  # noqa: E402
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from src.services.sistema_alertas import (  # noqa: E402
+    AlertasIncrementais,
+    Limiares,
+    _com_descricao,
+    _html_card_pedido,
+    _ListaOrdenada,
+    calcular_alertas,
+)
+from tests.sinteticos import (  # noqa: E402
+    conferir_alertas,
+    fornecedores_sinteticos,
+    frame_pedidos,
+    linhas_pedidos,
+    rodada_delta,
+)
+
+CHAVES_PEDIDO = ("pedidos_atrasados", "pedidos_vencendo", "pedidos_criticos")
+RODADAS = 20
+# limiares de tenants com configuração própria (ver limiares_tenant)
+LIMIARES_TENANT = [
+    Limiares(janela_dias=5, taxa_sucesso_minima=80, pedidos_minimos_fornecedor=3, percentil_critico=90),
+    Limiares(janela_dias=1, taxa_sucesso_minima=50, pedidos_minimos_fornecedor=10, percentil_critico=33),
+]
+
+
+def _pedidos() -> pd.DataFrame:
+    hoje = pd.Timestamp.now().normalize()
+    dia = lambda n: hoje + pd.Timedelta(days=n)  # noqa: E731
+    return pd.DataFrame({
+        "id": ["p1", "p2", "p3", "p4"],
+        "nr_oc": ["100", "200", "300", "400"],
+        "fornecedor_id": ["f1", "f1", "f2", "f2"],
+        "fornecedor_nome": ["", "", "Beta (view)", "Beta (view)"],
+        "previsao_entrega": [dia(-5), dia(1), dia(2), dia(-1)],
+        "entregue": [False, False, False, False],
+        "qtde_pendente": [1, 1, 1, 1],
+        "valor_total": [100.0, 200.0, 5000.0, 9000.0],
+        "departamento": ["Frota"] * 4,
+    })
+
+
+def _fornecedores() -> pd.DataFrame:
+    return pd.DataFrame({"id": ["f1", "f2"], "nome": ["Alfa Ltda", "Beta Ltda"]})
+
+
+def test_cards_com_fornecedores_mantem_id_do_pedido():
+    com = calcular_alertas(_pedidos(), _fornecedores())
+    sem = calcular_alertas(_pedidos())
+
+    for chave in CHAVES_PEDIDO:
+        assert com[chave], chave
+        assert [p["id"] for p in com[chave]] == [p["id"] for p in sem[chave]]
+        assert all(p["id"] in {"p1", "p2", "p3", "p4"} for p in com[chave])
+    # o nome vem da tabela de fornecedores
+    assert {p["fornecedor"] for p in com["pedidos_atrasados"]} == {"Alfa Ltda", "Beta Ltda"}
+
+
+def test_cards_com_fornecedores_hidratam_descricao():
+    textos = {pid: {"descricao": f"Descrição de {pid}"} for pid in ("p1", "p2", "p3", "p4")}
+    pedidos = []
+    for chave in CHAVES_PEDIDO:
+        pedidos += calcular_alertas(_pedidos(), _fornecedores())[chave]
+
+    hidratados = _com_descricao(pedidos, lambda ids: {i: textos[i] for i in ids})
+
+    assert [p["descricao"] for p in hidratados] == [f"Descrição de {p['id']}" for p in pedidos]
+
+
+def test_departamento_nulo_no_frame_compacto_sai_vazio_no_card():
+    from src.repositories.pedidos import _compactar
+
+    df = _pedidos()
+    df["departamento"] = [None, "Frota", None, "Frota"]
+    df["atualizado_em"] = pd.Timestamp("2026-01-01")
+    df = _compactar(df)  # departamento categórico, como no frame de carregar_pedidos
+
+    for alertas in (calcular_alertas(df), AlertasIncrementais(df).alertas()):
+        atrasados = {p["id"]: p for p in alertas["pedidos_atrasados"]}
+        assert atrasados["p1"]["departamento"] is None
+        html_card = _html_card_pedido(atrasados["p1"], "atrasado", str)
+        assert "<strong>Departamento:</strong> </p>" in html_card
+        assert "nan" not in html_card
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 5, 7, 100, 513, 1025, 5000])
+def test_quantil_igual_ao_do_pandas(n):
+    rnd = random.Random(n)
+    valores = [rnd.choice([0.0, 10.0, 99.5, round(rnd.uniform(0, 1e6), 2)]) for _ in range(2 * n)]
+    lista = _ListaOrdenada(valores[:n])
+    for v in valores[n:]:
+        lista.adicionar(v)
+    for v in rnd.sample(valores, n):
+        lista.remover(v)
+        valores.remove(v)
+
+    for q in (0, 0.25, 0.33, 0.5, 0.75, 0.9, 0.95, 1):
+        assert lista.quantil(q) == pd.Series(valores).quantile(q), q
+
+
+def test_quantil_repete_o_arredondamento_de_q_do_pandas():
+    # Series.quantile(q) usa q * 100 / 100, que para 0.007 é 0.007000000000000001
+    assert pd.Series([0.0, 1.0]).quantile(0.007) == 0.007000000000000001
+
+    assert _ListaOrdenada([0.0, 1.0]).quantil(0.007) == 0.007000000000000001
+
+
+def _rodadas(n: int):
+    """
+    Frame inicial e, por rodada (semente fixa), o frame do delta com as
+    alterações, exclusões e pedidos novos: (df, alterados, removidos).
+    """
+    rnd = random.Random(7)
+    linhas = linhas_pedidos(n)
+    df = frame_pedidos(linhas)
+    yield df, [], set()
+    for carimbo in range(1, RODADAS + 1):
+        linhas, alterados, removidos = rodada_delta(rnd, linhas, carimbo)
+        # o frame novo é o do delta: mantidas (na ordem) + alteradas no fim
+        saem = removidos | {a["id"] for a in alterados}
+        df = pd.concat([df[~df["id"].isin(saem)], frame_pedidos(alterados)], ignore_index=True) if alterados \
+            else df[~df["id"].isin(removidos)].reset_index(drop=True)
+        yield df, alterados, removidos
+
+
+@pytest.mark.parametrize("n", [1_000, 5_000, 20_000])
+def test_incremental_igual_ao_completo(n):
+    fornecedores = fornecedores_sinteticos()
+    rodadas = _rodadas(n)
+    df, _, _ = next(rodadas)
+    estado = AlertasIncrementais(df, fornecedores)
+    conferir_alertas(calcular_alertas(df, fornecedores), estado.alertas())
+
+    for df, alterados, removidos in rodadas:
+        estado.aplicar(df.iloc[len(df) - len(alterados):], removidos)
+        conferir_alertas(calcular_alertas(df, fornecedores), estado.alertas())
+
+    # frame reordenado: atualizar() recusa (o estado é remontado por quem chama)
+    assert not estado.atualizar(df.sample(frac=1, random_state=1))
+
+
+@pytest.mark.parametrize("limiares", LIMIARES_TENANT, ids=lambda l: f"p{l.percentil_critico:g}")
+@pytest.mark.parametrize("n", [1_000, 5_000, 20_000])
+def test_incremental_com_limiares_do_tenant(n, limiares):
+    """Estado por atualizar(frame novo), com limiares diferentes dos padrões."""
+    fornecedores = fornecedores_sinteticos()
+    rodadas = _rodadas(n)
+    df, _, _ = next(rodadas)
+    estado = AlertasIncrementais(df, fornecedores, limiares=limiares)
+    conferir_alertas(calcular_alertas(df, fornecedores, limiares), estado.alertas())
+
+    for df, _, _ in rodadas:
+        assert estado.atualizar(df), "atualizar() não casou as linhas do delta"
+        conferir_alertas(calcular_alertas(df, fornecedores, limiares), estado.alertas())
@@ -0,0 +1,114 @@
+"""
+Testes do armazém do processo (src.core.store).
+
+Uso (na raiz do repositório):
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from src.core import store  # noqa: E402
+
+CHEIO = pd.DataFrame({"id": ["p1", "p2"]})
+VAZIO = pd.DataFrame()
+
+
+@pytest.fixture(autouse=True)
+def _armazem_limpo():
+    store.descartar()
+    yield
+    store.descartar()
+
+
+def test_carga_vazia_preservando_residentes_nao_substitui_o_frame():
+    store.obter("pedidos", "t1", 1, lambda: CHEIO.copy())
+
+    with store.preservando_residentes():
+        df = store.obter("pedidos", "t1", 2, lambda: VAZIO.copy())
+
+    assert df["id"].tolist() == ["p1", "p2"]  # quem pediu recebe o residente
+    assert store.residente("pedidos", "t1", 2) is None
+    assert store.ultima("pedidos", "t1")[0]["id"].tolist() == ["p1", "p2"]
+
+
+def test_carga_vazia_preservando_residentes_sem_residente_nao_publica():
+    with store.preservando_residentes():
+        assert store.obter("pedidos", "t1", 1, lambda: VAZIO.copy()).empty
+
+    assert store.ultima("pedidos", "t1") is None
+
+
+def test_carga_vazia_fora_do_bloco_e_publicada():
+    store.obter("pedidos", "t1", 1, lambda: CHEIO.copy())
+
+    assert store.obter("pedidos", "t1", 2, lambda: VAZIO.copy()).empty
+    assert store.residente("pedidos", "t1", 2) is not None
+
+
+def test_loader_que_devolve_o_residente_so_renova_o_ttl():
+    primeiro = store.obter("pedidos", "t1", 1, lambda: CHEIO.copy(), ttl=0)
+
+    segundo = store.obter("pedidos", "t1", 1, lambda: store.residente("pedidos", "t1", 1), ttl=0)
+
+    assert store.geracao(segundo) == store.geracao(primeiro)
+    assert store.estatisticas()["renovacoes"] >= 1
+
+
+def test_residente_de_outra_chave_ganha_geracao_nova():
+    primeiro = store.obter("pedidos", "t1", 1, lambda: CHEIO.copy())
+
+    segundo = store.obter("pedidos", "t1", 2, lambda: store.ultima("pedidos", "t1")[0])
+
+    assert store.geracao(segundo) != store.geracao(primeiro)
+
+
+def test_memo_coalesce_calculos_simultaneos():
+    calculos = []
+
+    def calcular():
+        calculos.append(1)
+        time.sleep(0.2)
+        return [1, 2, 3]
+
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(store.memo("derivado", "t1", 1, calcular)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calculos) == 1
+    assert resultados == [[1, 2, 3]] * 5
+
+
+def test_memoizar_guarda_sob_o_tenant(monkeypatch):
+    @store.memoizar()
+    def por_argumento(tenant_id, x):
+        return [tenant_id, x]
+
+    @store.memoizar()
+    def pela_sessao(x):
+        return [x]
+
+    por_argumento("t1", 1)
+    monkeypatch.setattr(store, "_tenant_da_sessao", lambda: "t2")
+    pela_sessao(1)
+
+    derivados = {e["tenant_id"] for e in store.entradas_residentes() if e["tipo"] == "derivado"}
+    assert derivados == {"t1", "t2"}
+
+    store.descartar(tenant_id="t2")
+    derivados = {e["tenant_id"] for e in store.entradas_residentes() if e["tipo"] == "derivado"}
+    assert derivados == {"t1"}